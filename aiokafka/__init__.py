@@ -6,7 +6,8 @@ from .consumer import AIOKafkaConsumer
 from .errors import ConsumerStoppedError, IllegalOperation
 from .producer import AIOKafkaProducer
 from .structs import (
-    TopicPartition, ConsumerRecord, OffsetAndTimestamp, OffsetAndMetadata
+    TopicPartition, ConsumerRecord, OffsetAndTimestamp, OffsetAndMetadata,
+    RecordColumns
 )
 from .util import PY_35, ensure_future
 
@@ -21,7 +22,7 @@ __all__ = [
     "ConsumerStoppedError", "IllegalOperation",
     # Structs
     "ConsumerRecord", "TopicPartition", "OffsetAndTimestamp",
-    "OffsetAndMetadata"
+    "OffsetAndMetadata", "RecordColumns"
 ]
 
 (PY_35, ensure_future, AIOKafkaClient)
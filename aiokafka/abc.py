@@ -62,7 +62,9 @@ class ConsumerRebalanceListener(BaseConsumerRebalanceListener):
 
         Arguments:
             revoked (list of TopicPartition): the partitions that were assigned
-                to the consumer on the last rebalance
+                to the consumer on the last rebalance. With the cooperative
+                rebalance protocol only partitions moved to other members are
+                passed.
         """
         pass
 
@@ -82,7 +84,9 @@ class ConsumerRebalanceListener(BaseConsumerRebalanceListener):
 
         Arguments:
             assigned (list of TopicPartition): the partitions assigned to the
-                consumer (may include partitions that were previously assigned)
+                consumer (may include partitions that were previously
+                assigned). With the cooperative rebalance protocol only newly
+                added partitions are passed.
         """
         pass
 
@@ -1,18 +1,22 @@
 import asyncio
+import collections
+import functools
 import logging
 import random
 
 from kafka.conn import collect_hosts
+from kafka.protocol.admin import ApiVersionRequest
 from kafka.protocol.metadata import MetadataRequest
 from kafka.protocol.commit import OffsetFetchRequest
 from kafka.protocol.fetch import FetchRequest
 
 import aiokafka.errors as Errors
 from aiokafka import __version__
-from aiokafka.conn import create_conn, CloseReason
-from aiokafka.cluster import ClusterMetadata
+from aiokafka.conn import create_conn, CloseReason, ReceiveBufferPool
+from aiokafka.cluster import ClusterMetadata, MetadataCache
 from aiokafka.protocol.coordination import FindCoordinatorRequest
 from aiokafka.protocol.produce import ProduceRequest
+from aiokafka.structs import TopicPartition, ThrottleStats
 from aiokafka.errors import (
     KafkaError,
     KafkaConnectionError,
@@ -79,6 +83,28 @@ class AIOKafkaClient:
         connections_max_idle_ms (int): Close idle connections after the number
             of milliseconds specified by this config. Specifying `None` will
             disable idle checks. Default: 540000 (9 minutes).
+        reconnect_backoff_ms (int): Milliseconds to wait before reconnecting
+            to a broker after a failed connection attempt. Requests to the
+            broker fail with NodeNotReadyError during this time, without a
+            connection attempt. Default: 50.
+        reconnect_backoff_max_ms (int): The backoff doubles on each
+            consecutive failure up to this number of milliseconds. A random
+            jitter of 20% is applied to avoid connection storms.
+            Default: 1000.
+        bootstrap_stagger_ms (int): Milliseconds to wait for a bootstrap
+            server to respond before also trying the next one in parallel.
+            The first server to return metadata is used, so unreachable
+            servers do not delay startup by a whole connect timeout. A
+            failed attempt starts the next one right away. Default: 250.
+        metadata_cache_path (str): path of a file to cache the broker API
+            version and cluster layout in, so following starts don't wait
+            for version probing and a metadata response. Cached data is used
+            right away and verified in the background: the layout is
+            refreshed (from bootstrap servers if cached brokers are gone) and
+            the cache is rewritten if the broker version changed. Entries
+            are keyed by `bootstrap_servers` and `security_protocol`, so one
+            file can be shared by clients of different clusters. Only
+            brokers 0.10 and above are cached. Default: None
     """
 
     def __init__(self, *, loop=None, bootstrap_servers='localhost',
@@ -94,7 +120,11 @@ class AIOKafkaClient:
                  sasl_plain_username=None,
                  sasl_plain_password=None,
                  sasl_kerberos_service_name='kafka',
-                 sasl_kerberos_domain_name=None):
+                 sasl_kerberos_domain_name=None,
+                 reconnect_backoff_ms=50,
+                 reconnect_backoff_max_ms=1000,
+                 bootstrap_stagger_ms=250,
+                 metadata_cache_path=None):
         if loop is None:
             loop = get_running_loop()
 
@@ -133,17 +163,45 @@ class AIOKafkaClient:
         self._sasl_plain_password = sasl_plain_password
         self._sasl_kerberos_service_name = sasl_kerberos_service_name
         self._sasl_kerberos_domain_name = sasl_kerberos_domain_name
+        self._reconnect_backoff = reconnect_backoff_ms / 1000
+        self._reconnect_backoff_max = reconnect_backoff_max_ms / 1000
+        self._bootstrap_stagger = bootstrap_stagger_ms / 1000
+        self._metadata_cache = None
+        if metadata_cache_path is not None:
+            self._metadata_cache = MetadataCache(metadata_cache_path)
+        self._cache_check_task = None
+        # Last entry passed to the cache, so unchanged metadata is not
+        # written again. Writes are done in order by an executor.
+        self._metadata_cache_entry = None
+        self._cache_write_task = None
 
         self.cluster = ClusterMetadata(metadata_max_age_ms=metadata_max_age_ms)
 
         self._topics = set()  # empty set will fetch all topic metadata
         self._conns = {}
+        # conn_id -> (consecutive failures, time of next connection attempt)
+        self._conn_backoff = {}
+        # node_id -> time until the node is muted due to quota throttling
+        self._throttled_until = {}
+        # node_id -> [throttled responses, total throttle time in ms]
+        self._throttle_stats = {}
         self._loop = loop
         self._sync_task = None
+        # Shared by all connections, so large fetch responses reuse memory
+        self._buffer_pool = ReceiveBufferPool()
 
         self._md_update_fut = None
         self._md_update_waiter = create_future(loop=self._loop)
-        self._get_conn_lock = asyncio.Lock(loop=loop)
+        # Topics of a pending partial update, None for a full one
+        self._md_update_topics = None
+        # Connections to different nodes are established in parallel
+        self._get_conn_locks = collections.defaultdict(
+            functools.partial(asyncio.Lock, loop=loop))
+
+        # Topics tracked by each share, see `share()`
+        self._shares = {}
+        self._started_shares = set()
+        self._shares_lock = asyncio.Lock(loop=loop)
 
     def __repr__(self):
         return '<AIOKafkaClient client_id=%s>' % self._client_id
@@ -160,6 +218,17 @@ class AIOKafkaClient:
         return collect_hosts(self._bootstrap_servers)
 
     async def close(self):
+        if self._cache_check_task is not None:
+            self._cache_check_task.cancel()
+            try:
+                await self._cache_check_task
+            except asyncio.CancelledError:
+                pass
+            self._cache_check_task = None
+        if self._cache_write_task is not None:
+            # Let pending writes finish, they are not cancellable anyway
+            await asyncio.wait([self._cache_write_task], loop=self._loop)
+            self._cache_write_task = None
         if self._sync_task:
             self._sync_task.cancel()
             try:
@@ -177,6 +246,22 @@ class AIOKafkaClient:
 
     async def bootstrap(self):
         """Try to to bootstrap initial cluster metadata"""
+        if self._metadata_cache is not None and self._bootstrap_from_cache():
+            return
+
+        await self._bootstrap_metadata()
+
+        # detect api version if need
+        if self._api_version == 'auto':
+            self._api_version = await self.check_version()
+        self._store_metadata_cache()
+
+        if self._sync_task is None:
+            # starting metadata synchronizer task
+            self._sync_task = ensure_future(
+                self._md_synchronizer(), loop=self._loop)
+
+    async def _bootstrap_metadata(self):
         # using request v0 for bootstrap if not sure v1 is available
         if self._api_version == "auto" or self._api_version < (0, 10):
             metadata_request = MetadataRequest[0]([])
@@ -187,59 +272,216 @@ class AIOKafkaClient:
         if self._api_version != "auto":
             version_hint = self._api_version
 
-        for host, port, _ in self.hosts:
-            log.debug("Attempting to bootstrap via node at %s:%s", host, port)
+        bootstrap_conn, metadata = await self._bootstrap_any(
+            metadata_request, version_hint)
+        self.cluster.update_metadata(metadata)
 
-            try:
-                bootstrap_conn = await create_conn(
-                    host, port, loop=self._loop, client_id=self._client_id,
-                    request_timeout_ms=self._request_timeout_ms,
-                    ssl_context=self._ssl_context,
-                    security_protocol=self._security_protocol,
-                    max_idle_ms=self._connections_max_idle_ms,
-                    sasl_mechanism=self._sasl_mechanism,
-                    sasl_plain_username=self._sasl_plain_username,
-                    sasl_plain_password=self._sasl_plain_password,
-                    sasl_kerberos_service_name=self._sasl_kerberos_service_name,  # noqa: ignore=E501
-                    sasl_kerberos_domain_name=self._sasl_kerberos_domain_name,
-                    version_hint=version_hint)
-            except (OSError, asyncio.TimeoutError) as err:
-                log.error('Unable connect to "%s:%s": %s', host, port, err)
-                continue
+        # A cluster with no topics can return no broker metadata...
+        # In that case, we should keep the bootstrap connection till
+        # we get a normal cluster layout.
+        if not len(self.cluster.brokers()):
+            bootstrap_id = ('bootstrap', ConnectionGroup.DEFAULT)
+            self._conns[bootstrap_id] = bootstrap_conn
+        else:
+            bootstrap_conn.close()
+
+        log.debug('Received cluster metadata: %s', self.cluster)
+
+    @property
+    def _metadata_cache_key(self):
+        hosts = sorted(
+            "{}:{}".format(host, port) for host, port, _ in self.hosts)
+        return "{}://{}".format(self._security_protocol, ",".join(hosts))
+
+    def _bootstrap_from_cache(self):
+        cached = self._metadata_cache.load(self._metadata_cache_key)
+        if cached is None:
+            return False
+        api_version, metadata = cached
+        log.debug("Using cached cluster metadata for %s",
+                  self._metadata_cache_key)
+        self.cluster.update_metadata(metadata)
+        self._metadata_cache_entry = self._metadata_cache.entry(
+            api_version, self.cluster)
+        version_cached = self._api_version == "auto"
+        if version_cached:
+            self._api_version = api_version
 
+        if self._sync_task is None:
+            self._sync_task = ensure_future(
+                self._md_synchronizer(), loop=self._loop)
+        if self._cache_check_task is None:
+            self._cache_check_task = ensure_future(
+                self._check_cached_metadata(version_cached), loop=self._loop)
+        return True
+
+    async def _check_cached_metadata(self, version_cached):
+        """ Verify data loaded from metadata cache in the background """
+        if not await self.force_metadata_update():
+            log.warning(
+                "Unable to update cached cluster metadata, bootstrapping "
+                "from %s", self.hosts)
+            self._metadata_cache_entry = None
+            await self._cache_write(
+                self._metadata_cache.invalidate, self._metadata_cache_key)
             try:
-                metadata = await bootstrap_conn.send(metadata_request)
-            except (KafkaError, asyncio.TimeoutError) as err:
-                log.warning('Unable to request metadata from "%s:%s": %s',
-                            host, port, err)
-                bootstrap_conn.close()
-                continue
+                await self._bootstrap_metadata()
+            except KafkaConnectionError as err:
+                log.error("Bootstrap failed: %s", err)
+                return
+            await self.force_metadata_update()
 
-            self.cluster.update_metadata(metadata)
+        if version_cached:
+            version = await self._probe_api_version()
+            if version is not None and version != self._api_version:
+                # Can't change version of a running client, but following
+                # starts will use the right one
+                log.warning(
+                    "Cached API version %s does not match broker version %s",
+                    self._api_version, version)
+                self._store_metadata_cache(version)
+                return
+        self._store_metadata_cache()
+
+    async def _probe_api_version(self):
+        node_id = self.get_random_node()
+        conn = None
+        if node_id is not None:
+            conn = await self._get_conn(node_id)
+        if conn is None:
+            return None
+        try:
+            response = await conn.send(ApiVersionRequest[0]())
+        except (KafkaError, asyncio.TimeoutError) as err:
+            log.error("Unable to request API versions from node %s: %s",
+                      node_id, err)
+            return None
+        return self._check_api_version_response(response)
+
+    def _store_metadata_cache(self, api_version=None):
+        if self._metadata_cache is None:
+            return
+        if api_version is None:
+            api_version = self.api_version
+            if api_version < (0, 10):
+                return
+        # Only write if brokers, leaders or version changed
+        entry = self._metadata_cache.entry(api_version, self.cluster)
+        if entry is None or entry == self._metadata_cache_entry:
+            return
+        self._metadata_cache_entry = entry
+        self._cache_write(
+            self._metadata_cache.store_entry, self._metadata_cache_key, entry)
+
+    def _cache_write(self, func, *args):
+        # Blocking file I/O is done in the default executor, one write at a
+        # time and in order
+        self._cache_write_task = ensure_future(self._do_cache_write(
+            self._cache_write_task, func, args), loop=self._loop)
+        return self._cache_write_task
+
+    async def _do_cache_write(self, previous, func, args):
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous], loop=self._loop)
+        await self._loop.run_in_executor(None, func, *args)
+
+    async def _bootstrap_any(self, metadata_request, version_hint):
+        """ Request metadata from bootstrap servers "happy eyeballs" style:
+        a new server is tried each time the previous attempt fails or does
+        not finish within `bootstrap_stagger_ms`, and the first response wins.
+        """
+        hosts = iter(self.hosts)
+        pending = set()
+        result = None
+        try:
+            while result is None:
+                host = next(hosts, None)
+                if host is not None:
+                    pending.add(ensure_future(self._bootstrap_from(
+                        host[0], host[1], metadata_request, version_hint),
+                        loop=self._loop))
+                elif not pending:
+                    raise KafkaConnectionError(
+                        'Unable to bootstrap from {}'.format(self.hosts))
+                done, pending = await asyncio.wait(
+                    pending, loop=self._loop,
+                    timeout=self._bootstrap_stagger if host else None,
+                    return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    res = task.result()
+                    if result is None:
+                        result = res
+                    elif res is not None:
+                        res[0].close()
+        finally:
+            if pending:
+                for task in pending:
+                    task.cancel()
+                await asyncio.wait(pending, loop=self._loop)
+                for task in pending:
+                    if not task.cancelled() and task.exception() is None \
+                            and task.result() is not None:
+                        task.result()[0].close()
+        return result
+
+    async def _bootstrap_from(self, host, port, metadata_request,
+                              version_hint):
+        log.debug("Attempting to bootstrap via node at %s:%s", host, port)
 
-            # A cluster with no topics can return no broker metadata...
-            # In that case, we should keep the bootstrap connection till
-            # we get a normal cluster layout.
-            if not len(self.cluster.brokers()):
-                bootstrap_id = ('bootstrap', ConnectionGroup.DEFAULT)
-                self._conns[bootstrap_id] = bootstrap_conn
-            else:
-                bootstrap_conn.close()
+        try:
+            bootstrap_conn = await create_conn(
+                host, port, loop=self._loop, client_id=self._client_id,
+                request_timeout_ms=self._request_timeout_ms,
+                ssl_context=self._ssl_context,
+                security_protocol=self._security_protocol,
+                max_idle_ms=self._connections_max_idle_ms,
+                sasl_mechanism=self._sasl_mechanism,
+                sasl_plain_username=self._sasl_plain_username,
+                sasl_plain_password=self._sasl_plain_password,
+                sasl_kerberos_service_name=self._sasl_kerberos_service_name,
+                sasl_kerberos_domain_name=self._sasl_kerberos_domain_name,
+                version_hint=version_hint,
+                buffer_pool=self._buffer_pool)
+        except (OSError, asyncio.TimeoutError) as err:
+            log.error('Unable connect to "%s:%s": %s', host, port, err)
+            return None
 
-            log.debug('Received cluster metadata: %s', self.cluster)
-            break
-        else:
-            raise KafkaConnectionError(
-                'Unable to bootstrap from {}'.format(self.hosts))
+        try:
+            metadata = await bootstrap_conn.send(metadata_request)
+        except (KafkaError, asyncio.TimeoutError) as err:
+            log.warning('Unable to request metadata from "%s:%s": %s',
+                        host, port, err)
+            bootstrap_conn.close()
+            return None
+        except asyncio.CancelledError:
+            bootstrap_conn.close()
+            raise
+        return bootstrap_conn, metadata
 
-        # detect api version if need
-        if self._api_version == 'auto':
-            self._api_version = await self.check_version()
+    async def warm_up(self, topics=None):
+        """ Open connections to the leaders of all partitions of `topics`
+        in parallel, so first requests to them don't pay connection setup
+        latency. Connects to all known brokers if `topics` is None.
+        Connection failures are logged and ignored.
 
-        if self._sync_task is None:
-            # starting metadata synchronizer task
-            self._sync_task = ensure_future(
-                self._md_synchronizer(), loop=self._loop)
+        Arguments:
+            topics (list of str): topics, leaders of which to connect to
+        """
+        if topics is None:
+            node_ids = {broker.nodeId for broker in self.cluster.brokers()}
+        else:
+            node_ids = set()
+            for topic in topics:
+                partitions = self.cluster.partitions_for_topic(topic) or ()
+                for partition in partitions:
+                    leader = self.cluster.leader_for_partition(
+                        TopicPartition(topic, partition))
+                    if leader is not None and leader != -1:
+                        node_ids.add(leader)
+        if node_ids:
+            await asyncio.gather(
+                *(self._get_conn(node_id) for node_id in node_ids),
+                loop=self._loop)
 
     async def _md_synchronizer(self):
         """routine (async task) for synchronize cluster metadata every
@@ -253,11 +495,23 @@ class AIOKafkaClient:
             topics = self._topics
             if self._md_update_fut is None:
                 self._md_update_fut = create_future(loop=self._loop)
-            ret = await self._metadata_update(self.cluster, topics)
+                self._md_update_topics = None
+            partial = self._md_update_topics
+            if partial is not None:
+                partial = set(partial)
+                ret = await self._metadata_update(
+                    self.cluster, partial, partial=True)
+            else:
+                ret = await self._metadata_update(self.cluster, topics)
+            if ret:
+                self._store_metadata_cache()
             # If list of topics changed during metadata update we must update
             # it again right away.
             if topics != self._topics:
                 continue
+            # Same if more topics were requested in the meantime
+            if partial != self._md_update_topics:
+                continue
             # Earlier this waiter was set before sending metadata_request,
             # but that was to avoid topic list changes being unnoticed, which
             # is handled explicitly now.
@@ -277,9 +531,11 @@ class AIOKafkaClient:
             return None
         return random.choice(nodeids)
 
-    async def _metadata_update(self, cluster_metadata, topics):
+    async def _metadata_update(self, cluster_metadata, topics, *,
+                               partial=False):
         assert isinstance(cluster_metadata, ClusterMetadata)
         topics = list(topics)
+        assert topics or not partial
         version_id = 0 if self.api_version < (0, 10) else 1
         if version_id == 1 and not topics:
             topics = None
@@ -311,7 +567,7 @@ class AIOKafkaClient:
             if not metadata.brokers:
                 return False
 
-            cluster_metadata.update_metadata(metadata)
+            cluster_metadata.update_metadata(metadata, partial=partial)
 
             # We only keep bootstrap connection to update metadata until
             # proper cluster layout is available.
@@ -326,17 +582,31 @@ class AIOKafkaClient:
             return False
         return True
 
-    def force_metadata_update(self):
+    def force_metadata_update(self, topics=None):
         """Update cluster metadata
 
+        Arguments:
+            topics (list of str): only request metadata for these topics and
+                merge it into current metadata, like after a partition
+                leader change. All tracked topics are updated if None.
+
         Returns:
             True/False - metadata updated or not
         """
+        if topics is not None and not topics:
+            topics = None
         if self._md_update_fut is None:
             # Wake up the `_md_synchronizer` task
             if not self._md_update_waiter.done():
                 self._md_update_waiter.set_result(None)
             self._md_update_fut = create_future(loop=self._loop)
+            self._md_update_topics = None if topics is None else set(topics)
+        elif self._md_update_topics is not None:
+            # Update is not started yet or will be repeated with new topics
+            if topics is None:
+                self._md_update_topics = None
+            elif not self._md_update_topics.issuperset(topics):
+                self._md_update_topics = self._md_update_topics | set(topics)
         # Metadata will be updated in the background by syncronizer
         return asyncio.shield(self._md_update_fut, loop=self._loop)
 
@@ -378,6 +648,55 @@ class AIOKafkaClient:
         self._topics = set(topics)
         return res
 
+    def remove_topics(self, topics):
+        """Stop tracking metadata of specific topics. Topics are kept if
+        none would be left, as an empty set means all topics.
+
+        Arguments:
+            topics (list of str): topics to remove
+        """
+        remaining = self._topics.difference(topics)
+        if not remaining:
+            res = create_future(loop=self._loop)
+            res.set_result(True)
+            return res
+        return self.set_topics(remaining)
+
+    def share(self):
+        """ Create a :class:`ClientShare` to pass this client to a producer or
+        consumer. The client is bootstrapped when the first share starts and
+        closed once all started shares are closed.
+        """
+        return ClientShare(self)
+
+    async def _acquire(self, share):
+        async with self._shares_lock:
+            if not self._started_shares:
+                await self.bootstrap()
+            self._started_shares.add(share)
+
+    async def _release(self, share):
+        async with self._shares_lock:
+            self._shares.pop(share, None)
+            if share in self._started_shares:
+                self._started_shares.remove(share)
+                if not self._started_shares:
+                    await self.close()
+                    return
+            if self._started_shares:
+                self._update_shared_topics()
+
+    def _update_shared_topics(self):
+        # Metadata is fetched for the union of topics of all shares. An empty
+        # set means all topics, same as for `set_topics()`.
+        topics = set()
+        for share_topics in self._shares.values():
+            if not share_topics:
+                topics = set()
+                break
+            topics |= share_topics
+        return self.set_topics(topics)
+
     def _on_connection_closed(self, conn, reason):
         """ Callback called when connection is closed
         """
@@ -400,6 +719,11 @@ class AIOKafkaClient:
             else:
                 return conn
 
+        backoff = self._conn_backoff.get(conn_id)
+        if backoff is not None and self._loop.time() < backoff[1]:
+            # Last connection attempt failed, don't hammer the node
+            return None
+
         try:
             if group == ConnectionGroup.DEFAULT:
                 broker = self.cluster.broker_metadata(node_id)
@@ -417,7 +741,7 @@ class AIOKafkaClient:
             log.debug("Initiating connection to node %s at %s:%s",
                       node_id, broker.host, broker.port)
 
-            async with self._get_conn_lock:
+            async with self._get_conn_locks[conn_id]:
                 if conn_id in self._conns:
                     return self._conns[conn_id]
 
@@ -438,30 +762,103 @@ class AIOKafkaClient:
                     sasl_plain_password=self._sasl_plain_password,
                     sasl_kerberos_service_name=self._sasl_kerberos_service_name,  # noqa: ignore=E501
                     sasl_kerberos_domain_name=self._sasl_kerberos_domain_name,
-                    version_hint=version_hint
+                    version_hint=version_hint,
+                    buffer_pool=self._buffer_pool
                 )
         except (OSError, asyncio.TimeoutError, KafkaError) as err:
             log.error('Unable connect to node with id %s: %s', node_id, err)
-            if group == ConnectionGroup.DEFAULT:
+            failures = 1 if backoff is None else backoff[0] + 1
+            delay = min(
+                self._reconnect_backoff * 2 ** (failures - 1),
+                self._reconnect_backoff_max)
+            delay *= random.uniform(0.8, 1.2)
+            self._conn_backoff[conn_id] = (failures, self._loop.time() + delay)
+            if group == ConnectionGroup.DEFAULT and failures == 1:
                 # Connection failures imply that our metadata is stale, so
                 # let's refresh
                 self.force_metadata_update()
             return None
         else:
+            self._conn_backoff.pop(conn_id, None)
             return self._conns[conn_id]
 
+    def nodes_in_backoff(self):
+        """ Nodes, that can't be connected to for some time after failed
+        connection attempts (see `reconnect_backoff_ms` option).
+
+        Returns:
+            dict: node id -> seconds till next connection attempt
+        """
+        now = self._loop.time()
+        nodes = {}
+        for (node_id, group), (_, retry_at) in self._conn_backoff.items():
+            if group == ConnectionGroup.DEFAULT and retry_at > now:
+                nodes[node_id] = retry_at - now
+        for node_id, until in list(self._throttled_until.items()):
+            if until <= now:
+                del self._throttled_until[node_id]
+            elif until - now > nodes.get(node_id, 0):
+                nodes[node_id] = until - now
+        return nodes
+
+    def throttle(self, node_id, throttle_time_ms, sent_at):
+        """ Mute the node after it returned a response with non-zero
+        `throttle_time_ms`, i.e. we exceeded a broker quota. Produce and
+        Fetch requests are not sent to a muted node (see
+        `nodes_in_backoff()`).
+
+        Brokers before 2.0 delay the response by the throttle time
+        themselves, so the node is only muted for the time left since the
+        request was sent.
+
+        Arguments:
+            node_id (int): broker, that returned the response
+            throttle_time_ms (int): `throttle_time_ms` of the response
+            sent_at (float): loop time, when the request was sent
+        """
+        if not throttle_time_ms or throttle_time_ms <= 0:
+            return
+        stats = self._throttle_stats.setdefault(node_id, [0, 0])
+        stats[0] += 1
+        stats[1] += throttle_time_ms
+        log.debug("Node %s throttled the request for %s ms",
+                  node_id, throttle_time_ms)
+
+        until = sent_at + throttle_time_ms / 1000
+        if until > self._throttled_until.get(node_id, self._loop.time()):
+            self._throttled_until[node_id] = until
+
+    def throttle_stats(self):
+        """ Quota throttling reported by brokers so far.
+
+        Returns:
+            dict: node id -> :class:`~aiokafka.structs.ThrottleStats`
+        """
+        now = self._loop.time()
+        stats = {}
+        for node_id, (responses, throttle_time) in \
+                self._throttle_stats.items():
+            until = self._throttled_until.get(node_id, now)
+            stats[node_id] = ThrottleStats(
+                responses, throttle_time, max(0, int((until - now) * 1000)))
+        return stats
+
     async def ready(self, node_id, *, group=ConnectionGroup.DEFAULT):
         conn = await self._get_conn(node_id, group=group)
         if conn is None:
             return False
         return True
 
-    async def send(self, node_id, request, *, group=ConnectionGroup.DEFAULT):
+    async def send(self, node_id, request, *, group=ConnectionGroup.DEFAULT,
+                   stream=False):
         """Send a request to a specific node.
 
         Arguments:
             node_id (int): destination node
             request (Struct): request object (not-encoded)
+            stream (bool): only for FetchRequest. Decode response
+                incrementally and resolve to a `FetchResponseStream` as soon
+                as response header arrives.
 
         Raises:
             kafka.errors.RequestTimedOutError
@@ -484,7 +881,7 @@ class AIOKafkaClient:
             expect_response = False
 
         future = self._conns[(node_id, group)].send(
-            request, expect_response=expect_response)
+            request, expect_response=expect_response, stream=stream)
         try:
             result = await future
         except asyncio.TimeoutError:
@@ -661,3 +1058,73 @@ class AIOKafkaClient:
             resp.coordinator_id, resp.host, resp.port, rack=None,
             purpose=(coordinator_type, coordinator_key))
         return resp.coordinator_id
+
+
+class ClientShare:
+    """ A producer's or consumer's use of a shared :class:`AIOKafkaClient`.
+
+    Shares use the connections, metadata and API version of the client, while
+    topics are tracked per share, so each can set its topics like with a
+    client of its own. Created by :meth:`AIOKafkaClient.share`. All other
+    attributes are taken from the client.
+
+    Example::
+
+        client = AIOKafkaClient(bootstrap_servers="localhost:9092")
+        # Both call `client.share()`
+        producer = AIOKafkaProducer(client=client)
+        consumer = AIOKafkaConsumer("topic", client=client)
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def __repr__(self):
+        return '<ClientShare of {!r}>'.format(self.client)
+
+    async def bootstrap(self):
+        await self.client._acquire(self)
+
+    async def close(self):
+        await self.client._release(self)
+
+    def add_topic(self, topic):
+        """Add a topic to the list of topics this share tracks via metadata.
+
+        Arguments:
+            topic (str): topic to track
+        """
+        topics = self.client._shares.get(self, set())
+        return self.set_topics(topics | {topic})
+
+    def set_topics(self, topics):
+        """Set specific topics this share tracks via metadata.
+
+        Arguments:
+            topics (list of str): topics to track
+        """
+        assert not isinstance(topics, str)
+        self.client._shares[self] = set(topics)
+        return self.client._update_shared_topics()
+
+    def remove_topics(self, topics):
+        """Stop tracking metadata of specific topics for this share. Topics
+        are kept if none would be left, as an empty set means all topics.
+
+        Arguments:
+            topics (list of str): topics to remove
+        """
+        remaining = self.client._shares.get(self, set()).difference(topics)
+        if not remaining:
+            res = create_future(loop=self.client._loop)
+            res.set_result(True)
+            return res
+        return self.set_topics(remaining)
+
+    async def _wait_on_metadata(self, topic):
+        if topic not in self.client._shares.get(self, ()):
+            self.add_topic(topic)
+        return await self.client._wait_on_metadata(topic)
@@ -1,8 +1,12 @@
 import collections
+import json
 import logging
+import os
+import tempfile
 import time
 
 from kafka.cluster import ClusterMetadata as BaseClusterMetadata
+from kafka.protocol.metadata import MetadataResponse
 from aiokafka.structs import BrokerMetadata, PartitionMetadata, TopicPartition
 from aiokafka import errors as Errors
 
@@ -15,6 +19,19 @@ class ClusterMetadata(BaseClusterMetadata):
         super().__init__(*args, **kw)
         self._coordinators = {}
         self._coordinator_by_key = {}
+        self._diff_listeners = set()
+
+    def add_diff_listener(self, listener):
+        """ Add a callback, that is called with this cluster and a set of
+        TopicPartitions, whose metadata was added, changed or removed, on
+        each metadata update. Listeners added with `add_listener()` are
+        called with the cluster only.
+        """
+        self._diff_listeners.add(listener)
+
+    def remove_diff_listener(self, listener):
+        """ Remove a callback added with `add_diff_listener()` """
+        self._diff_listeners.remove(listener)
 
     def coordinator_metadata(self, node_id):
         return self._coordinators.get(node_id)
@@ -31,11 +48,43 @@ class ClusterMetadata(BaseClusterMetadata):
         self._coordinators[node_id] = BrokerMetadata(node_id, host, port, rack)
         self._coordinator_by_key[purpose] = node_id
 
-    def update_metadata(self, metadata):
+    def racks_for_partition(self, partition):
+        """ Racks of the brokers hosting a partition.
+
+        Arguments:
+            partition (TopicPartition): partition to check
+
+        Returns:
+            tuple: (rack of the leader or None, set of racks of all
+            replicas). None if the partition is unknown.
+        """
+        topic_partitions = self._partitions.get(partition.topic)
+        if topic_partitions is None or \
+                partition.partition not in topic_partitions:
+            return None
+        metadata = topic_partitions[partition.partition]
+        leader_rack = None
+        replica_racks = set()
+        for node_id in metadata.replicas:
+            broker = self._brokers.get(node_id)
+            if broker is None or broker.rack is None:
+                continue
+            replica_racks.add(broker.rack)
+            if node_id == metadata.leader:
+                leader_rack = broker.rack
+        return leader_rack, replica_racks
+
+    def update_metadata(self, metadata, *, partial=False):
         """Update cluster state given a MetadataResponse.
 
+        Listeners are called with this cluster. Diff listeners (see
+        `add_diff_listener()`) also get a set of TopicPartitions, whose
+        metadata was added, changed or removed by this update.
+
         Arguments:
             metadata (MetadataResponse): broker response to a metadata request
+            partial (bool): if True, `metadata` only covers some topics.
+                Those are replaced, while metadata of other topics is kept.
 
         Returns: None
         """
@@ -63,6 +112,20 @@ class ClusterMetadata(BaseClusterMetadata):
         _new_broker_partitions = collections.defaultdict(set)
         _new_unauthorized_topics = set()
         _new_internal_topics = set()
+        if partial:
+            updated_topics = {topic_data[1] for topic_data in metadata.topics}
+            for topic, partitions in self._partitions.items():
+                if topic not in updated_topics:
+                    _new_partitions[topic] = partitions
+            for node_id, tps in self._broker_partitions.items():
+                tps = {tp for tp in tps if tp.topic not in updated_topics}
+                if tps:
+                    _new_broker_partitions[node_id] = tps
+            _new_unauthorized_topics = \
+                self.unauthorized_topics - updated_topics
+            _new_internal_topics = self.internal_topics - updated_topics
+        else:
+            updated_topics = None
 
         for topic_data in metadata.topics:
             if metadata.API_VERSION == 0:
@@ -97,6 +160,11 @@ class ClusterMetadata(BaseClusterMetadata):
                 log.error("Error fetching metadata for topic %s: %s",
                           topic, error_type)
 
+        changes = None
+        if self._diff_listeners:
+            changes = self._partition_changes(
+                _new_partitions, updated_topics)
+
         with self._lock:
             self._brokers = _new_brokers
             self.controller = _new_controller
@@ -113,3 +181,159 @@ class ClusterMetadata(BaseClusterMetadata):
 
         for listener in self._listeners:
             listener(self)
+        for listener in self._diff_listeners:
+            listener(self, changes)
+
+    def _partition_changes(self, new_partitions, topics=None):
+        """ TopicPartitions with different metadata in `new_partitions` """
+        old_partitions = self._partitions
+        if topics is None:
+            topics = set(old_partitions) | set(new_partitions)
+        changes = set()
+        for topic in topics:
+            old = old_partitions.get(topic, {})
+            new = new_partitions.get(topic, {})
+            if old == new:
+                continue
+            for partition in set(old) | set(new):
+                if old.get(partition) != new.get(partition):
+                    changes.add(TopicPartition(topic, partition))
+        return changes
+
+
+class MetadataCache:
+    """ On-disk cache of negotiated API version and cluster layout, so a
+    client can start without probing the broker version and waiting for a
+    metadata response. Entries are stored as JSON in a single file, keyed by
+    bootstrap servers (see `AIOKafkaClient` ``metadata_cache_path`` option).
+
+    Arguments:
+        path (str): path of the cache file. Created if missing.
+    """
+
+    def __init__(self, path):
+        self._path = path
+
+    def _read(self):
+        try:
+            with open(self._path, "r") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as err:
+            log.warning("Unable to read metadata cache %s: %s",
+                        self._path, err)
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return entries
+
+    def _write(self, entries):
+        # Write to a temporary file first, so concurrent readers never see
+        # a partially written cache
+        dirname = os.path.dirname(os.path.abspath(self._path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix=".aiokafka")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self._path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as err:
+            log.warning("Unable to write metadata cache %s: %s",
+                        self._path, err)
+
+    def load(self, key):
+        """ Get cached API version and cluster layout
+
+        Arguments:
+            key (str): cache key of the cluster
+
+        Returns:
+            tuple: (api_version tuple, MetadataResponse) or None if there's
+            no valid entry for `key`.
+        """
+        entry = self._read().get(key)
+        if entry is None:
+            return None
+        try:
+            api_version = tuple(entry["api_version"])
+            metadata = MetadataResponse[1](
+                [tuple(broker) for broker in entry["brokers"]],
+                entry["controller_id"],
+                [(0, topic, is_internal, [
+                    (0, partition, leader, replicas, isr)
+                    for partition, leader, replicas, isr in partitions])
+                 for topic, is_internal, partitions in entry["topics"]])
+        except (KeyError, TypeError, ValueError) as err:
+            log.warning("Invalid metadata cache entry for %s: %r", key, err)
+            return None
+        if not metadata.brokers:
+            return None
+        return api_version, metadata
+
+    @staticmethod
+    def entry(api_version, cluster):
+        """ Build the cache entry for API version and current layout of
+        `cluster`. Entries of the same layout compare equal.
+
+        Arguments:
+            api_version (tuple): negotiated API version
+            cluster (ClusterMetadata): metadata to save
+
+        Returns:
+            dict: entry to pass to `store_entry()`, or None if there are no
+            brokers to save
+        """
+        brokers = sorted(list(broker) for broker in cluster.brokers())
+        if not brokers:
+            return None
+        controller = cluster.controller
+        topics = []
+        for topic, partitions in sorted(cluster._partitions.items()):
+            topics.append([
+                topic, topic in cluster.internal_topics, [
+                    [p.partition, p.leader, list(p.replicas), list(p.isr)]
+                    for _, p in sorted(partitions.items())]])
+        return {
+            "api_version": list(api_version),
+            "brokers": brokers,
+            "controller_id": (
+                controller.nodeId if controller is not None else -1),
+            "topics": topics,
+        }
+
+    def store_entry(self, key, entry):
+        """ Save an entry built by `entry()`. Does blocking file I/O.
+
+        Arguments:
+            key (str): cache key of the cluster
+            entry (dict): entry to save
+        """
+        entries = self._read()
+        entries[key] = entry
+        self._write(entries)
+
+    def store(self, key, api_version, cluster):
+        """ Save API version and current layout of `cluster`
+
+        Arguments:
+            key (str): cache key of the cluster
+            api_version (tuple): negotiated API version
+            cluster (ClusterMetadata): metadata to save
+        """
+        entry = self.entry(api_version, cluster)
+        if entry is not None:
+            self.store_entry(key, entry)
+
+    def invalidate(self, key):
+        """ Remove the entry of a cluster, if any
+
+        Arguments:
+            key (str): cache key of the cluster
+        """
+        entries = self._read()
+        if entries.pop(key, None) is not None:
+            self._write(entries)
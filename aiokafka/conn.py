@@ -20,6 +20,7 @@ from kafka.protocol.commit import (
     GroupCoordinatorResponse_v0 as GroupCoordinatorResponse)
 
 import aiokafka.errors as Errors
+from aiokafka.protocol.fetch_stream import FetchResponseStream
 from aiokafka.util import ensure_future, create_future, PY_36
 
 try:
@@ -65,6 +66,136 @@ class VersionInfo:
         )
 
 
+class PooledBuffer:
+    """ Receive buffer allocated from `ReceiveBufferPool`.
+
+    `view` is a memoryview of exactly the requested size. The buffer is
+    reference counted: every owner should `acquire()` it and `release()` when
+    done with the data. When the last reference is released the buffer is
+    returned to the pool.
+    """
+
+    __slots__ = ("view", "_data", "_pool", "_refs")
+
+    def __init__(self, pool, data, size):
+        self._pool = pool
+        self._data = data
+        self._refs = 1
+        self.view = memoryview(data)[:size]
+
+    def acquire(self):
+        assert self._refs > 0, "Buffer already released"
+        self._refs += 1
+        return self
+
+    def release(self):
+        assert self._refs > 0, "Buffer already released"
+        self._refs -= 1
+        if self._refs:
+            return
+        view, self.view = self.view, None
+        data, self._data = self._data, None
+        try:
+            view.release()
+        except BufferError:
+            # Someone still holds the data, let GC handle it
+            return
+        self._pool._recycle(data)
+
+
+class ReceiveBufferPool:
+    """ Pool of reusable buffers to read large responses into.
+
+    Buffers are allocated in power of 2 size classes, from `min_size` up to
+    `max_size`. Larger buffers are not pooled. At most `max_pooled_bytes` of
+    free buffers are kept.
+    """
+
+    def __init__(self, min_size=READER_LIMIT, max_size=32 * 1024 * 1024,
+                 max_pooled_bytes=32 * 1024 * 1024):
+        self.min_size = min_size
+        self._max_size = max_size
+        self._max_pooled_bytes = max_pooled_bytes
+        self._pooled_bytes = 0
+        self._free = collections.defaultdict(list)
+
+    def _size_class(self, size):
+        if size <= self.min_size:
+            return self.min_size
+        return 1 << (size - 1).bit_length()
+
+    def allocate(self, size):
+        size_class = self._size_class(size)
+        free = self._free.get(size_class)
+        if free:
+            data = free.pop()
+            self._pooled_bytes -= size_class
+        elif size_class <= self._max_size:
+            data = bytearray(size_class)
+        else:
+            data = bytearray(size)
+        return PooledBuffer(self, data, size)
+
+    def _recycle(self, data):
+        size_class = len(data)
+        if size_class > self._max_size or \
+                self._pooled_bytes + size_class > self._max_pooled_bytes:
+            return
+        try:
+            # Fails if there are still views of the buffer around, for
+            # example record batches kept by the user. Does not reallocate.
+            data.append(data.pop())
+        except BufferError:
+            return
+        self._free[size_class].append(data)
+        self._pooled_bytes += size_class
+
+    async def readexactly(self, reader, size):
+        """ Read exactly `size` bytes from StreamReader into a pooled buffer.
+
+        Unlike `StreamReader.readexactly()` the data is copied in chunks as
+        it arrives, so the reader's internal buffer is not grown to the size
+        of the whole response.
+        """
+        buffer = self.allocate(size)
+        view = buffer.view
+        pos = 0
+        try:
+            while pos < size:
+                chunk = await reader.read(size - pos)
+                if not chunk:
+                    raise asyncio.IncompleteReadError(
+                        view[:pos].tobytes(), size)
+                view[pos:pos + len(chunk)] = chunk
+                pos += len(chunk)
+        except BaseException:
+            buffer.release()
+            raise
+        return buffer
+
+
+class FrameReader:
+    """ File-like reader to decode a response frame with. Unlike
+    `io.BytesIO` the frame is not copied as a whole, only the fields read,
+    so frames in pooled buffers are decoded straight from them. Values are
+    returned as `bytes`, so they stay valid once the buffer is released.
+    """
+
+    __slots__ = ("_view", "_pos")
+
+    def __init__(self, data, pos=0):
+        self._view = memoryview(data)
+        self._pos = pos
+
+    def read(self, size=-1):
+        start = self._pos
+        end = len(self._view)
+        if size is not None and size >= 0:
+            end = min(start + size, end)
+        self._pos = end
+        return self._view[start:end].tobytes()
+
+
 async def create_conn(
     host, port, *, loop=None, client_id='aiokafka',
     request_timeout_ms=40000, api_version=(0, 8, 2),
@@ -75,7 +206,8 @@ async def create_conn(
     sasl_plain_password=None,
     sasl_kerberos_service_name='kafka',
     sasl_kerberos_domain_name=None,
-    version_hint=None
+    version_hint=None,
+    buffer_pool=None
 ):
     if loop is None:
         loop = asyncio.get_event_loop()
@@ -90,8 +222,14 @@ async def create_conn(
         sasl_plain_password=sasl_plain_password,
         sasl_kerberos_service_name=sasl_kerberos_service_name,
         sasl_kerberos_domain_name=sasl_kerberos_domain_name,
-        version_hint=version_hint)
-    await conn.connect()
+        version_hint=version_hint,
+        buffer_pool=buffer_pool)
+    try:
+        await conn.connect()
+    except BaseException:
+        # Don't leak the socket if handshake failed or we were cancelled
+        conn.close()
+        raise
     return conn
 
 
@@ -122,7 +260,7 @@ class AIOKafkaConnection:
                  sasl_plain_password=None, sasl_plain_username=None,
                  sasl_kerberos_service_name='kafka',
                  sasl_kerberos_domain_name=None,
-                 version_hint=None):
+                 version_hint=None, buffer_pool=None):
         if sasl_mechanism == "GSSAPI":
             assert gssapi is not None, "gssapi library required"
 
@@ -144,6 +282,9 @@ class AIOKafkaConnection:
         self._version_hint = version_hint
         self._version_info = VersionInfo({})
 
+        # Optional `ReceiveBufferPool` for large responses
+        self._buffer_pool = buffer_pool
+
         self._reader = self._writer = self._protocol = None
         # Even on small size seems to be a bit faster than list.
         # ~2x on size of 2 in Python3.6
@@ -155,6 +296,8 @@ class AIOKafkaConnection:
         self._max_idle_ms = max_idle_ms
         self._last_action = loop.time()
         self._idle_handle = None
+        # Fires if a streamed response is not read by its deadline
+        self._stream_timeout_handle = None
 
         self._on_close_cb = on_close
 
@@ -386,7 +529,13 @@ class AIOKafkaConnection:
     def port(self):
         return self._port
 
-    def send(self, request, expect_response=True):
+    def send(self, request, expect_response=True, *, stream=False):
+        """ Send request to the broker.
+
+        If `stream` is set the response is decoded incrementally and the
+        returned future resolves to a `FetchResponseStream` right after the
+        response header is read. Only supported for FetchRequest.
+        """
         if self._writer is None:
             raise Errors.KafkaConnectionError(
                 "No connection to broker at {0}:{1}"
@@ -412,7 +561,16 @@ class AIOKafkaConnection:
         if not expect_response:
             return self._writer.drain()
         fut = create_future(loop=self._loop)
-        self._requests.append((correlation_id, request.RESPONSE_TYPE, fut))
+        if stream:
+            resp_type = FetchResponseStream(
+                request.RESPONSE_TYPE, loop=self._loop,
+                buffer_pool=self._buffer_pool)
+            # `request_timeout_ms` covers the whole response, not only the
+            # wait for its header
+            resp_type.deadline = self._loop.time() + self._request_timeout
+        else:
+            resp_type = request.RESPONSE_TYPE
+        self._requests.append((correlation_id, resp_type, fut))
         return asyncio.wait_for(fut, self._request_timeout, loop=self._loop)
 
     def _send_sasl_token(self, payload, expect_response=True):
@@ -448,21 +606,27 @@ class AIOKafkaConnection:
             if not self._read_task.done():
                 self._read_task.cancel()
                 self._read_task = None
-            for _, _, fut in self._requests:
+            for _, resp_type, fut in self._requests:
+                error = Errors.KafkaConnectionError(
+                    "Connection at {0}:{1} closed".format(
+                        self._host, self._port))
+                if exc is not None:
+                    error.__cause__ = exc
+                    error.__context__ = exc
                 if not fut.done():
-                    error = Errors.KafkaConnectionError(
-                        "Connection at {0}:{1} closed".format(
-                            self._host, self._port))
-                    if exc is not None:
-                        error.__cause__ = exc
-                        error.__context__ = exc
                     fut.set_exception(error)
+                elif isinstance(resp_type, FetchResponseStream):
+                    # Response is already being consumed
+                    resp_type.set_exception(error)
             self._requests = collections.deque()
             if self._on_close_cb is not None:
                 self._on_close_cb(self, reason)
                 self._on_close_cb = None
         if self._idle_handle is not None:
             self._idle_handle.cancel()
+        if self._stream_timeout_handle is not None:
+            self._stream_timeout_handle.cancel()
+            self._stream_timeout_handle = None
 
         # transport.close() will close socket, but not right ahead. Return
         # a future in case we need to wait on it.
@@ -483,43 +647,112 @@ class AIOKafkaConnection:
         # NOTE: all errors will be handled by done callback
 
         reader = self_ref()._reader
+        buffer_pool = self_ref()._buffer_pool
         while True:
             resp = await reader.readexactly(4)
             size, = struct.unpack(">i", resp)
 
-            resp = await reader.readexactly(size)
-            self_ref()._handle_frame(resp)
+            stream = self_ref()._response_stream()
+            if stream is None:
+                if buffer_pool is not None and size > buffer_pool.min_size:
+                    buffer = await buffer_pool.readexactly(reader, size)
+                    try:
+                        self_ref()._handle_frame(buffer.view)
+                    finally:
+                        buffer.release()
+                else:
+                    resp = await reader.readexactly(size)
+                    self_ref()._handle_frame(resp)
+            else:
+                # Decode response as it arrives, without buffering the
+                # whole frame
+                resp = await reader.readexactly(4)
+                await stream.read_header(reader, size - 4)
+                if not self_ref()._handle_stream_header(resp):
+                    return
+                await stream.read_partitions()
+                self_ref()._handle_stream_end()
+
+    def _response_stream(self):
+        if self._requests:
+            resp_type = self._requests[0][1]
+            if isinstance(resp_type, FetchResponseStream):
+                return resp_type
+        return None
+
+    def _check_correlation_id(self, resp):
+        correlation_id, resp_type, fut = self._requests[0]
+        recv_correlation_id, = struct.unpack_from(">i", resp, 0)
+
+        if (self._api_version == (0, 8, 2) and
+                resp_type is GroupCoordinatorResponse and
+                correlation_id != 0 and recv_correlation_id == 0):
+            self.log.warning(
+                'Kafka 0.8.2 quirk -- GroupCoordinatorResponse'
+                ' coorelation id does not match request. This'
+                ' should go away once at least one topic has been'
+                ' initialized on the broker')
+
+        elif correlation_id != recv_correlation_id:
+            error = Errors.CorrelationIdError(
+                'Correlation ids do not match: sent {}, recv {}'
+                .format(correlation_id, recv_correlation_id))
+            if not fut.done():
+                fut.set_exception(error)
+            self.close(reason=CloseReason.OUT_OF_SYNC)
+            return False
+        return True
+
+    def _handle_stream_header(self, resp):
+        if not self._check_correlation_id(resp):
+            return False
+        correlation_id, stream, fut = self._requests[0]
+        if not fut.done():
+            self.log.debug(
+                '%s Response %d: %s', self, correlation_id, stream)
+            fut.set_result(stream)
+        else:
+            # Request timed out or was cancelled, drop the data
+            stream.close()
+        self._stream_timeout_handle = self._loop.call_at(
+            stream.deadline, self._stream_timeout, weakref.ref(self))
+        return True
+
+    def _handle_stream_end(self):
+        self._stream_timeout_handle.cancel()
+        self._stream_timeout_handle = None
+        # Update idle timer.
+        self._last_action = self._loop.time()
+        self._requests.popleft()
+
+    @staticmethod
+    def _stream_timeout(self_ref):
+        # Broker stalled in the middle of a response. The rest of the frame
+        # can't be skipped, so the connection is closed, failing the stream
+        # with KafkaConnectionError.
+        self = self_ref()
+        if self is None:
+            return
+        self._stream_timeout_handle = None
+        self.log.warning(
+            "%s Response was not read within %s seconds, closing connection",
+            self, self._request_timeout)
+        self.close(reason=CloseReason.CONNECTION_BROKEN,
+                   exc=asyncio.TimeoutError())
 
     def _handle_frame(self, resp):
         correlation_id, resp_type, fut = self._requests[0]
 
         if correlation_id is None:  # Is a SASL packet, just pass it though
             if not fut.done():
-                fut.set_result(resp)
+                fut.set_result(bytes(resp))
         else:
-
-            recv_correlation_id, = struct.unpack_from(">i", resp, 0)
-
-            if (self._api_version == (0, 8, 2) and
-                    resp_type is GroupCoordinatorResponse and
-                    correlation_id != 0 and recv_correlation_id == 0):
-                self.log.warning(
-                    'Kafka 0.8.2 quirk -- GroupCoordinatorResponse'
-                    ' coorelation id does not match request. This'
-                    ' should go away once at least one topic has been'
-                    ' initialized on the broker')
-
-            elif correlation_id != recv_correlation_id:
-                error = Errors.CorrelationIdError(
-                    'Correlation ids do not match: sent {}, recv {}'
-                    .format(correlation_id, recv_correlation_id))
-                if not fut.done():
-                    fut.set_exception(error)
-                self.close(reason=CloseReason.OUT_OF_SYNC)
+            if not self._check_correlation_id(resp):
                 return
 
             if not fut.done():
-                response = resp_type.decode(resp[4:])
+                # Skip correlation id without copying the frame
+                response = resp_type.decode(FrameReader(resp, 4))
                 self.log.debug(
                     '%s Response %d: %s', self, correlation_id, response)
                 fut.set_result(response)
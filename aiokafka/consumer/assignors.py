@@ -0,0 +1,725 @@
+import collections
+import heapq
+import logging
+import math
+from enum import Enum
+
+from kafka.coordinator.assignors.abstract import AbstractPartitionAssignor
+from kafka.coordinator.protocol import (
+    ConsumerProtocolMemberMetadata, ConsumerProtocolMemberAssignment)
+from kafka.protocol.struct import Struct
+from kafka.protocol.types import (
+    Array, Bytes, Int16, Int32, Int64, Schema, String)
+
+from aiokafka.structs import TopicPartition
+
+log = logging.getLogger(__name__)
+
+
+class RebalanceProtocol(Enum):
+    """ How partitions are handed over between members during a rebalance.
+
+    * EAGER: every member revokes all of its partitions before rejoining.
+    * COOPERATIVE: members keep their partitions during the rebalance and
+      only revoke the ones that move to another member (KIP-429). Moved
+      partitions are assigned to the new owner in a follow-up rebalance.
+    """
+
+    EAGER = 0
+    COOPERATIVE = 1
+
+
+# State of the local member passed to `member_metadata()` of assignors:
+#   * previous_assignment: partitions assigned in the last completed rebalance
+#   * generation: generation of that assignment
+#   * rack: rack of the consumer (`client_rack` option), or None
+#   * partition_stats: {TopicPartition: (consumption rate in offsets per
+#     second or None, lag or None)} for the previously assigned partitions
+MemberState = collections.namedtuple(
+    "MemberState",
+    ["previous_assignment", "generation", "rack", "partition_stats"])
+
+
+class ConsumerProtocolMemberMetadata_v1(Struct):
+    """ Member metadata with the partitions currently owned by the member
+    (KIP-429). Version 0 parsers ignore the trailing `owned_partitions`
+    field, so it's safe to send it to members that don't know about it.
+    """
+    SCHEMA = Schema(
+        ('version', Int16),
+        ('subscription', Array(String('utf-8'))),
+        ('user_data', Bytes),
+        ('owned_partitions', Array(
+            ('topic', String('utf-8')),
+            ('partitions', Array(Int32)))))
+
+    def owned_topic_partitions(self):
+        return [TopicPartition(topic, partition)
+                for topic, partitions in self.owned_partitions
+                for partition in partitions]
+
+
+def _group_by_topic(partitions):
+    by_topic = collections.defaultdict(list)
+    for tp in partitions:
+        by_topic[tp.topic].append(tp.partition)
+    return [
+        (topic, sorted(p_ids)) for topic, p_ids in sorted(by_topic.items())]
+
+
+def encode_member_metadata(metadata, owned_partitions):
+    """ Add owned partitions to metadata returned by an assignor.
+
+    Arguments:
+        metadata (ConsumerProtocolMemberMetadata or bytes): version 0
+            metadata
+        owned_partitions (iterable of TopicPartition): partitions currently
+            assigned to this member
+
+    Returns:
+        bytes: encoded version 1 metadata
+    """
+    if isinstance(metadata, bytes):
+        metadata = ConsumerProtocolMemberMetadata.decode(metadata)
+    metadata = ConsumerProtocolMemberMetadata_v1(
+        max(metadata.version, 1), metadata.subscription, metadata.user_data,
+        _group_by_topic(owned_partitions))
+    return metadata.encode()
+
+
+def decode_member_metadata(data):
+    """ Decode member metadata of any version. Metadata of version 0 is
+    returned with no owned partitions.
+    """
+    metadata = ConsumerProtocolMemberMetadata.decode(data)
+    if metadata.version >= 1:
+        return ConsumerProtocolMemberMetadata_v1.decode(data)
+    return ConsumerProtocolMemberMetadata_v1(
+        metadata.version, metadata.subscription, metadata.user_data, [])
+
+
+def rebalance_protocol(assignors):
+    """ Select the rebalance protocol supported by all given assignors.
+    Assignors without a `rebalance_protocols` attribute, like the ones from
+    kafka-python, only support the EAGER protocol.
+    """
+    supported = set(RebalanceProtocol)
+    for assignor in assignors:
+        supported &= set(getattr(
+            assignor, "rebalance_protocols", (RebalanceProtocol.EAGER, )))
+    if RebalanceProtocol.COOPERATIVE in supported:
+        return RebalanceProtocol.COOPERATIVE
+    return RebalanceProtocol.EAGER
+
+
+class _BalancedAssignment:
+    """ Assignment of partitions to members, that keeps members subscribed to
+    the same topics balanced.
+
+    For each group of members we look up the least loaded member of (like
+    the members subscribed to a topic) we keep a heap of `(load, member_id)`
+    pairs, so the lookup does not depend on the number of members. Entries
+    are pushed on every load change and outdated ones are dropped lazily.
+
+    Arguments:
+        member_ids (list of str): all members of the group
+        members_per_topic (dict): {topic: sorted list of member ids}
+    """
+
+    def __init__(self, member_ids, members_per_topic):
+        self.assignment = {member_id: [] for member_id in member_ids}
+        self._loads = {member_id: 0 for member_id in member_ids}
+        self._heaps = {}
+        self._member_heaps = collections.defaultdict(list)
+        self._topic_heaps = {
+            topic: self._heap(tuple(topic_members))
+            for topic, topic_members in members_per_topic.items()}
+
+    def _heap(self, member_ids):
+        heap = self._heaps.get(member_ids)
+        if heap is None:
+            heap = self._heaps[member_ids] = [
+                (self._loads[member_id], member_id)
+                for member_id in member_ids]
+            heapq.heapify(heap)
+            for member_id in member_ids:
+                self._member_heaps[member_id].append(heap)
+        return heap
+
+    def load(self, member_id):
+        return self._loads[member_id]
+
+    def _load_changed(self, member_id):
+        entry = (self._loads[member_id], member_id)
+        for heap in self._member_heaps[member_id]:
+            heapq.heappush(heap, entry)
+
+    def add(self, member_id, tp, weight=1):
+        self.assignment[member_id].append(tp)
+        self._loads[member_id] += weight
+        self._load_changed(member_id)
+
+    def _least_loaded(self, heap):
+        loads = self._loads
+        while True:
+            load, member_id = heap[0]
+            if load == loads[member_id]:
+                return member_id
+            heapq.heappop(heap)
+
+    def least_loaded(self, topic):
+        """ Least loaded member, that can consume `topic`. """
+        return self._least_loaded(self._topic_heaps[topic])
+
+    def least_loaded_of(self, member_ids):
+        """ Least loaded member out of a sorted tuple of members. Returns
+        None if the tuple is empty.
+        """
+        if not member_ids:
+            return None
+        return self._least_loaded(self._heap(member_ids))
+
+    def balance(self):
+        """ Move partitions from the most loaded members to the least loaded
+        ones, until no partition can be moved to a member that has at least 2
+        partitions less than its current owner. Partitions added last are
+        moved first, so the ones added as previously owned stay in place.
+        Only valid if all partitions were added with the default weight.
+
+        The most loaded member always gives away the next partition, so no
+        member drops below the load it needs to keep. Every move reduces the
+        sum of squared loads, so the number of moves is bounded by the number
+        of partitions.
+        """
+        assignment = self.assignment
+        moved = True
+        while moved:
+            moved = False
+            sources = [(-len(assignment[m]), m) for m in assignment]
+            heapq.heapify(sources)
+            while sources:
+                load, member_id = heapq.heappop(sources)
+                partitions = assignment[member_id]
+                if -load != len(partitions):
+                    continue
+                for i in range(len(partitions) - 1, -1, -1):
+                    tp = partitions[i]
+                    target = self.least_loaded(tp.topic)
+                    if len(assignment[target]) + 1 < len(partitions):
+                        del partitions[i]
+                        self._loads[member_id] -= 1
+                        self._load_changed(member_id)
+                        self.add(target, tp)
+                        heapq.heappush(
+                            sources, (-len(partitions), member_id))
+                        moved = True
+                        break
+
+
+def _members_per_topic(members):
+    members_per_topic = collections.defaultdict(list)
+    for member_id in sorted(members):
+        for topic in sorted(set(members[member_id].subscription)):
+            members_per_topic[topic].append(member_id)
+    return members_per_topic
+
+
+def _all_partitions(cluster, topics):
+    all_partitions = set()
+    for topic in topics:
+        partitions = cluster.partitions_for_topic(topic)
+        if partitions is None:
+            log.warning("No partition metadata for topic %s", topic)
+            continue
+        for partition in partitions:
+            all_partitions.add(TopicPartition(topic, partition))
+    return all_partitions
+
+
+class CooperativeStickyAssignor(AbstractPartitionAssignor):
+    """ Assignor for the COOPERATIVE rebalance protocol (KIP-429).
+
+    Partitions are balanced between members, so that the number of assigned
+    partitions differs by at most 1 between any 2 members subscribed to the
+    same topics. Members keep as many of the partitions they already own as
+    possible.
+
+    A partition that moves to another member is only removed from its
+    previous owner in the first rebalance. The previous owner revokes it and
+    requests a follow-up rebalance, in which it's assigned to the new owner.
+    Members never stop consuming partitions that don't move.
+    """
+    name = 'cooperative-sticky'
+    version = 0
+    rebalance_protocols = (
+        RebalanceProtocol.EAGER, RebalanceProtocol.COOPERATIVE)
+
+    @classmethod
+    def assign(cls, cluster, members):
+        """ Perform group assignment given cluster metadata and member
+        subscriptions
+
+        Arguments:
+            cluster (ClusterMetadata): metadata for use in assignment
+            members (dict of {member_id: MemberMetadata}): decoded metadata
+                for each member in the group. Owned partitions are taken from
+                version 1 metadata, if present.
+
+        Returns:
+            dict: {member_id: MemberAssignment}
+        """
+        member_ids = sorted(members)
+        members_per_topic = _members_per_topic(members)
+        all_partitions = _all_partitions(cluster, members_per_topic)
+        state = _BalancedAssignment(member_ids, members_per_topic)
+
+        # Start from the current ownership. If several members claim the
+        # same partition only the first one keeps it.
+        owners = {}
+        for member_id in member_ids:
+            metadata = members[member_id]
+            subscription = set(metadata.subscription)
+            owned = getattr(metadata, "owned_topic_partitions", list)()
+            for tp in sorted(owned):
+                if tp.topic in subscription and tp in all_partitions and \
+                        tp not in owners:
+                    owners[tp] = member_id
+                    state.add(member_id, tp)
+
+        # Give partitions nobody owns to the least loaded members
+        for tp in sorted(all_partitions.difference(owners)):
+            state.add(state.least_loaded(tp.topic), tp)
+
+        state.balance()
+
+        # Partitions that change owner are not assigned in this generation,
+        # the previous owner needs to revoke them first.
+        group_assignment = {}
+        for member_id, partitions in state.assignment.items():
+            kept = [tp for tp in partitions
+                    if owners.get(tp, member_id) == member_id]
+            group_assignment[member_id] = ConsumerProtocolMemberAssignment(
+                cls.version, _group_by_topic(kept), b'')
+        return group_assignment
+
+    @classmethod
+    def metadata(cls, topics):
+        return ConsumerProtocolMemberMetadata(cls.version, list(topics), b'')
+
+    @classmethod
+    def on_assignment(cls, assignment):
+        pass
+
+
+class StickyAssignorUserData_v0(Struct):
+    SCHEMA = Schema(
+        ('previous_assignment', Array(
+            ('topic', String('utf-8')),
+            ('partitions', Array(Int32)))))
+
+
+class StickyAssignorUserData_v1(Struct):
+    """ Previous assignment of a member, sent in the `user_data` of its
+    metadata. Same format as used by the Java client's StickyAssignor.
+    """
+    SCHEMA = Schema(
+        ('previous_assignment', Array(
+            ('topic', String('utf-8')),
+            ('partitions', Array(Int32)))),
+        ('generation', Int32))
+
+
+class StickyPartitionAssignor(AbstractPartitionAssignor):
+    """ Assignor that keeps partitions on the members that consumed them in
+    the previous generation (KIP-54).
+
+    Each member sends the partitions it was assigned and the generation of
+    that assignment in `user_data`. If several members claim the same
+    partition the one with the highest generation keeps it. Partitions are
+    then balanced between members subscribed to the same topics with the
+    minimal number of moves.
+
+    Compatible with the `sticky` assignor of the Java client.
+    """
+    name = 'sticky'
+    version = 0
+
+    DEFAULT_GENERATION_ID = -1
+
+    @classmethod
+    def assign(cls, cluster, members):
+        """ Perform group assignment given cluster metadata and member
+        subscriptions
+
+        Arguments:
+            cluster (ClusterMetadata): metadata for use in assignment
+            members (dict of {member_id: MemberMetadata}): decoded metadata
+                for each member in the group
+
+        Returns:
+            dict: {member_id: MemberAssignment}
+        """
+        member_ids = sorted(members)
+        members_per_topic = _members_per_topic(members)
+        all_partitions = _all_partitions(cluster, members_per_topic)
+        state = _BalancedAssignment(member_ids, members_per_topic)
+
+        # Partitions stay with the member of the latest generation that
+        # consumed them.
+        owners = {}
+        for member_id in member_ids:
+            metadata = members[member_id]
+            subscription = set(metadata.subscription)
+            previous, generation = cls.parse_user_data(metadata.user_data)
+            for tp in previous:
+                if tp.topic not in subscription or tp not in all_partitions:
+                    continue
+                owner = owners.get(tp)
+                if owner is None or owner[0] < generation:
+                    owners[tp] = (generation, member_id)
+        for tp, (_, member_id) in sorted(owners.items()):
+            state.add(member_id, tp)
+
+        # Partitions with less potential consumers are placed first, as they
+        # have less options to be balanced.
+        unowned = sorted(
+            all_partitions.difference(owners),
+            key=lambda tp: (len(members_per_topic[tp.topic]), tp))
+        for tp in unowned:
+            state.add(state.least_loaded(tp.topic), tp)
+
+        state.balance()
+
+        group_assignment = {}
+        for member_id, partitions in state.assignment.items():
+            group_assignment[member_id] = ConsumerProtocolMemberAssignment(
+                cls.version, _group_by_topic(partitions), b'')
+        return group_assignment
+
+    @classmethod
+    def parse_user_data(cls, user_data):
+        """ Decode the previous assignment of a member.
+
+        Returns:
+            tuple: (list of TopicPartition, generation)
+        """
+        if not user_data:
+            return [], cls.DEFAULT_GENERATION_ID
+        try:
+            data = StickyAssignorUserData_v1.decode(user_data)
+            generation = data.generation
+        except ValueError:
+            try:
+                data = StickyAssignorUserData_v0.decode(user_data)
+            except ValueError:
+                log.warning("Could not decode sticky assignor user data")
+                return [], cls.DEFAULT_GENERATION_ID
+            generation = cls.DEFAULT_GENERATION_ID
+        partitions = [
+            TopicPartition(topic, partition)
+            for topic, partitions in data.previous_assignment
+            for partition in partitions]
+        return partitions, generation
+
+    @classmethod
+    def metadata(cls, topics):
+        return cls.member_metadata(
+            topics, MemberState((), cls.DEFAULT_GENERATION_ID, None, {}))
+
+    @classmethod
+    def member_metadata(cls, topics, member):
+        """ Metadata including the member's previous assignment. Called by
+        the group coordinator instead of `metadata()`, if present.
+
+        Arguments:
+            topics (set of str): topics the member is subscribed to
+            member (MemberState): state of the local member
+        """
+        user_data = StickyAssignorUserData_v1(
+            _group_by_topic(member.previous_assignment), member.generation)
+        return ConsumerProtocolMemberMetadata(
+            cls.version, sorted(topics), user_data.encode())
+
+    @classmethod
+    def on_assignment(cls, assignment):
+        pass
+
+
+class RackAwareAssignorUserData_v0(Struct):
+    SCHEMA = Schema(
+        ('rack', String('utf-8')))
+
+
+class RackAwarePartitionAssignor(AbstractPartitionAssignor):
+    """ Assignor that prefers members in the same rack (availability zone)
+    as the brokers hosting a partition, to avoid cross-rack fetch traffic.
+
+    Members send their rack, configured with the `client_rack` consumer
+    option, in `user_data`. Racks of partitions are taken from the cluster
+    metadata. As the consumer fetches from partition leaders, a member in the
+    rack of the leader is preferred over a member in the rack of another
+    replica.
+
+    Balance comes first: the number of assigned partitions differs by at
+    most 1 between members subscribed to the same topics, so some
+    partitions are assigned to other racks if the racks are not balanced.
+    """
+    name = 'rack-aware'
+    version = 0
+
+    @classmethod
+    def assign(cls, cluster, members):
+        """ Perform group assignment given cluster metadata and member
+        subscriptions
+
+        Arguments:
+            cluster (ClusterMetadata): metadata for use in assignment
+            members (dict of {member_id: MemberMetadata}): decoded metadata
+                for each member in the group
+
+        Returns:
+            dict: {member_id: MemberAssignment}
+        """
+        member_ids = sorted(members)
+        members_per_topic = _members_per_topic(members)
+        all_partitions = _all_partitions(cluster, members_per_topic)
+        state = _BalancedAssignment(member_ids, members_per_topic)
+
+        member_racks = {
+            member_id: cls.parse_user_data(members[member_id].user_data)
+            for member_id in member_ids}
+
+        # Maximum load of a member, if partitions were spread evenly between
+        # the members sharing a subscription.
+        totals = collections.Counter()
+        for tp in all_partitions:
+            totals[tuple(members_per_topic[tp.topic])] += 1
+        caps = {
+            key: -(-total // len(key)) for key, total in totals.items()}
+
+        rack_members = {}
+
+        def members_in_racks(key, racks):
+            cache_key = (key, frozenset(racks))
+            result = rack_members.get(cache_key)
+            if result is None:
+                result = rack_members[cache_key] = tuple(
+                    member_id for member_id in key
+                    if member_racks[member_id] in racks)
+            return result
+
+        # Racks of the leader first, as we fetch from it, then the racks of
+        # the other replicas.
+        leader_racks = {}
+        replica_racks = {}
+        for tp in all_partitions:
+            racks = cluster.racks_for_partition(tp)
+            if racks is not None:
+                leader_racks[tp] = {racks[0]} - {None}
+                replica_racks[tp] = racks[1]
+
+        pending = sorted(
+            all_partitions,
+            key=lambda tp: (len(members_per_topic[tp.topic]), tp))
+        for partition_racks in (leader_racks, replica_racks):
+            remaining = []
+            for tp in pending:
+                key = tuple(members_per_topic[tp.topic])
+                member_id = state.least_loaded_of(members_in_racks(
+                    key, partition_racks.get(tp, ())))
+                if member_id is not None and \
+                        state.load(member_id) < caps[key]:
+                    state.add(member_id, tp)
+                else:
+                    remaining.append(tp)
+            pending = remaining
+
+        for tp in pending:
+            state.add(state.least_loaded(tp.topic), tp)
+
+        # Partitions placed without a rack match are added last, so these
+        # are moved first if some members are still overloaded.
+        state.balance()
+
+        group_assignment = {}
+        for member_id, partitions in state.assignment.items():
+            group_assignment[member_id] = ConsumerProtocolMemberAssignment(
+                cls.version, _group_by_topic(partitions), b'')
+        return group_assignment
+
+    @classmethod
+    def parse_user_data(cls, user_data):
+        """ Decode the rack of a member. Returns None if not set. """
+        if not user_data:
+            return None
+        try:
+            return RackAwareAssignorUserData_v0.decode(user_data).rack
+        except ValueError:
+            log.warning("Could not decode rack-aware assignor user data")
+            return None
+
+    @classmethod
+    def metadata(cls, topics):
+        return cls.member_metadata(topics, MemberState((), -1, None, {}))
+
+    @classmethod
+    def member_metadata(cls, topics, member):
+        """ Metadata including the rack of the member. Called by the group
+        coordinator instead of `metadata()`, if present.
+
+        Arguments:
+            topics (set of str): topics the member is subscribed to
+            member (MemberState): state of the local member
+        """
+        user_data = RackAwareAssignorUserData_v0(member.rack)
+        return ConsumerProtocolMemberMetadata(
+            cls.version, sorted(topics), user_data.encode())
+
+    @classmethod
+    def on_assignment(cls, assignment):
+        pass
+
+
+class LagAwareAssignorUserData_v0(Struct):
+    """ Consumption rate (offsets per second, rounded up) and lag of the
+    partitions previously assigned to a member. -1 if unknown.
+    """
+    SCHEMA = Schema(
+        ('partitions', Array(
+            ('topic', String('utf-8')),
+            ('partitions', Array(
+                ('partition', Int32),
+                ('rate', Int64),
+                ('lag', Int64))))))
+
+
+class LagAwarePartitionAssignor(AbstractPartitionAssignor):
+    """ Assignor that balances the load of partitions, instead of their
+    number.
+
+    Members report the consumption rate and lag of their partitions in
+    `user_data`. The weight of a partition is its rate plus the rate needed
+    to consume its lag within `LAG_HORIZON_S` seconds. Partitions nobody
+    reported get the average weight of their topic (or of all partitions).
+    Partitions are then assigned from the heaviest one to the member with
+    the least total weight (greedy bin-packing).
+
+    Weights are floored at `MIN_WEIGHT_RATIO` of the average weight, so idle
+    partitions are still spread between members. Partitions are not kept on
+    their previous owners, so assignments can change on every rebalance.
+    """
+    name = 'lag-aware'
+    version = 0
+
+    LAG_HORIZON_S = 60
+    MIN_WEIGHT_RATIO = 0.1
+
+    @classmethod
+    def assign(cls, cluster, members):
+        """ Perform group assignment given cluster metadata and member
+        subscriptions
+
+        Arguments:
+            cluster (ClusterMetadata): metadata for use in assignment
+            members (dict of {member_id: MemberMetadata}): decoded metadata
+                for each member in the group
+
+        Returns:
+            dict: {member_id: MemberAssignment}
+        """
+        member_ids = sorted(members)
+        members_per_topic = _members_per_topic(members)
+        all_partitions = _all_partitions(cluster, members_per_topic)
+        state = _BalancedAssignment(member_ids, members_per_topic)
+
+        weights = cls._weights(all_partitions, members)
+
+        for tp in sorted(all_partitions, key=lambda tp: (-weights[tp], tp)):
+            state.add(state.least_loaded(tp.topic), tp, weights[tp])
+
+        group_assignment = {}
+        for member_id, partitions in state.assignment.items():
+            group_assignment[member_id] = ConsumerProtocolMemberAssignment(
+                cls.version, _group_by_topic(partitions), b'')
+        return group_assignment
+
+    @classmethod
+    def _weights(cls, all_partitions, members):
+        reported = {}
+        for member_id in sorted(members):
+            stats = cls.parse_user_data(members[member_id].user_data)
+            for tp, (rate, lag) in stats.items():
+                if tp not in all_partitions or (rate is None and lag is None):
+                    continue
+                weight = (rate or 0) + (lag or 0) / cls.LAG_HORIZON_S
+                # Stale reports of a partition should not hide a fresh one
+                reported[tp] = max(weight, reported.get(tp, 0))
+
+        by_topic = collections.defaultdict(list)
+        for tp, weight in reported.items():
+            by_topic[tp.topic].append(weight)
+        if reported:
+            average = sum(reported.values()) / len(reported)
+        else:
+            average = 1
+        min_weight = average * cls.MIN_WEIGHT_RATIO
+
+        weights = {}
+        for tp in all_partitions:
+            weight = reported.get(tp)
+            if weight is None:
+                topic_weights = by_topic.get(tp.topic)
+                if topic_weights:
+                    weight = sum(topic_weights) / len(topic_weights)
+                else:
+                    weight = average
+            weights[tp] = max(weight, min_weight)
+        return weights
+
+    @classmethod
+    def parse_user_data(cls, user_data):
+        """ Decode the partition stats reported by a member.
+
+        Returns:
+            dict: {TopicPartition: (rate or None, lag or None)}
+        """
+        if not user_data:
+            return {}
+        try:
+            data = LagAwareAssignorUserData_v0.decode(user_data)
+        except ValueError:
+            log.warning("Could not decode lag-aware assignor user data")
+            return {}
+        stats = {}
+        for topic, partitions in data.partitions:
+            for partition, rate, lag in partitions:
+                stats[TopicPartition(topic, partition)] = (
+                    rate if rate >= 0 else None, lag if lag >= 0 else None)
+        return stats
+
+    @classmethod
+    def metadata(cls, topics):
+        return cls.member_metadata(topics, MemberState((), -1, None, {}))
+
+    @classmethod
+    def member_metadata(cls, topics, member):
+        """ Metadata including the rate and lag of the member's partitions.
+        Called by the group coordinator instead of `metadata()`, if present.
+
+        Arguments:
+            topics (set of str): topics the member is subscribed to
+            member (MemberState): state of the local member
+        """
+        by_topic = collections.defaultdict(list)
+        for tp, (rate, lag) in sorted((member.partition_stats or {}).items()):
+            by_topic[tp.topic].append((
+                tp.partition,
+                -1 if rate is None else math.ceil(rate),
+                -1 if lag is None else lag))
+        user_data = LagAwareAssignorUserData_v0(sorted(by_topic.items()))
+        return ConsumerProtocolMemberMetadata(
+            cls.version, sorted(topics), user_data.encode())
+
+    @classmethod
+    def on_assignment(cls, assignment):
+        pass
@@ -22,6 +22,7 @@ from aiokafka import __version__
 
 from .fetcher import Fetcher, OffsetResetStrategy
 from .group_coordinator import GroupCoordinator, NoGroupCoordinator
+from .runner import ConsumerRunner
 from .subscription_state import SubscriptionState
 
 log = logging.getLogger(__name__)
@@ -56,11 +57,28 @@ class AIOKafkaConsumer(object):
             server-side log entries that correspond to this client. Also
             submitted to GroupCoordinator for logging with respect to
             consumer group administration. Default: 'aiokafka-{version}'
+        client (AIOKafkaClient): a client shared with other producers and
+            consumers, so they use the same connections and metadata. The
+            client is bootstrapped by the first one to start and closed when
+            all of them are stopped. Connection related options of this
+            consumer, like ``bootstrap_servers``, are ignored if passed.
+            Default: None
         group_id (str or None): name of the consumer group to join for dynamic
             partition assignment (if enabled), and to use for fetching and
             committing offsets. If None, auto-partition assignment (via
             group coordinator) and offset commits are disabled.
             Default: None
+        group_instance_id (str or None): a unique identifier of the consumer
+            instance provided by the end user. If set, the consumer is a
+            static member of the group (KIP-345): it does not leave the group
+            on ``stop()``, and a restarted consumer with the same id that
+            rejoins within ``session_timeout_ms`` gets its partitions back
+            without a rebalance. Requires ``group_id`` and Kafka 2.3+.
+            Default: None
+        client_rack (str or None): rack (for example availability zone) the
+            consumer runs in. Sent to the group leader, so that
+            :class:`~aiokafka.consumer.assignors.RackAwarePartitionAssignor`
+            can assign partitions hosted in the same rack. Default: None
         key_deserializer (callable): Any callable that takes a
             raw message key and returns a deserialized key.
         value_deserializer (callable, optional): Any callable that takes a
@@ -91,6 +109,13 @@ class AIOKafkaConsumer(object):
             message on a certain partition. Default: 1048576.
         max_poll_records (int): The maximum number of records returned in a
             single call to ``getmany()``. Defaults ``None``, no limit.
+        max_unacked_offsets (int): If set, records returned by
+            :meth:`getone` and :meth:`getmany` have to be acknowledged using
+            :meth:`ack` once processed, in any order. Offsets are committed,
+            both automatically and by :meth:`commit`, only up to the first
+            record not acknowledged yet. Fetching from a partition is paused
+            while its unacknowledged records span this many offsets. Default:
+            ``None``, no acknowledgements required.
         request_timeout_ms (int): Client request timeout in milliseconds.
             Default: 40000.
         retry_backoff_ms (int): Milliseconds to backoff when retrying on
@@ -103,7 +128,19 @@ class AIOKafkaConsumer(object):
         enable_auto_commit (bool): If true the consumer's offset will be
             periodically committed in the background. Default: True.
         auto_commit_interval_ms (int): milliseconds between automatic
-            offset commits, if enable_auto_commit is True. Default: 5000.
+            offset commits, if enable_auto_commit is True. Only partitions
+            consumed since the last commit are included. Default: 5000.
+        auto_commit_max_records (int): also commit automatically as soon as
+            this many records were returned since the last automatic commit,
+            if enable_auto_commit is True. Default: None
+        auto_commit_max_bytes (int): also commit automatically as soon as
+            records with keys and values of this many bytes in total were
+            returned since the last automatic commit, if enable_auto_commit
+            is True. Default: None
+        commit_min_interval_ms (int): minimum milliseconds between OffsetCommit
+            requests sent by :meth:`commit`. Offsets of calls made in between
+            are merged and sent in a single request, keeping the highest
+            offset per partition. Default: 0.
         check_crcs (bool): Automatically check the CRC32 of the records
             consumed. This ensures no on-the-wire or on-disk corruption to
             the messages occurred. This check adds some overhead, so it may
@@ -120,7 +157,18 @@ class AIOKafkaConsumer(object):
             enable support both for the old assignment strategy and the new
             one. The coordinator will choose the old assignment strategy until
             all members have been updated. Then it will choose the new
-            strategy. Default: [RoundRobinPartitionAssignor]
+            strategy.
+            :class:`~aiokafka.consumer.assignors.StickyPartitionAssignor`
+            keeps partitions on their previous owners across rebalances,
+            :class:`~aiokafka.consumer.assignors.RackAwarePartitionAssignor`
+            prefers consumers in the rack of the partition leader and
+            :class:`~aiokafka.consumer.assignors.LagAwarePartitionAssignor`
+            balances partitions by consumption rate and lag.
+            If all strategies support it, like
+            :class:`~aiokafka.consumer.assignors.CooperativeStickyAssignor`,
+            the cooperative rebalance protocol is used: partitions are kept
+            and consumed during rebalances and only the ones moved to other
+            members are revoked. Default: [RoundRobinPartitionAssignor]
 
         max_poll_interval_ms (int): Maximum allowed time between calls to
             consume messages (e.g., ``consumer.getmany()``). If this interval
@@ -175,6 +223,18 @@ class AIOKafkaConsumer(object):
         connections_max_idle_ms (int): Close idle connections after the number
             of milliseconds specified by this config. Specifying `None` will
             disable idle checks. Default: 540000 (9 minutes).
+        reconnect_backoff_ms (int): Milliseconds to wait before reconnecting
+            to a broker after a failed connection attempt. Default: 50.
+        reconnect_backoff_max_ms (int): The reconnect backoff doubles on
+            each consecutive failure up to this number of milliseconds.
+            Default: 1000.
+        warm_up_connections (bool): If ``True``, connections to leaders of
+            partitions of subscribed topics are opened in parallel during
+            :meth:`start`, instead of on first fetch. Default: False
+        metadata_cache_path (str): path of a file to cache the broker API
+            version and cluster layout in, so following starts don't wait
+            for version probing and a metadata response. Cached data is
+            verified and refreshed in the background. Default: None
         isolation_level (str): Controls how to read messages written
             transactionally. If set to *read_committed*,
             ``consumer.getmany()``
@@ -196,6 +256,13 @@ class AIOKafkaConsumer(object):
             to the high watermark when there are in flight transactions.
             Further, when in *read_committed* the seek_to_end method will
             return the LSO. See method docs below. Default: "read_uncommitted"
+        stream_fetch_responses (bool): Decode fetch responses incrementally,
+            as data arrives from the broker, instead of waiting for the whole
+            response. Records of each partition are available to
+            ``getmany()`` as soon as that partition is read, and the event
+            loop is not blocked while a large response is decoded. Peak
+            memory use per response is also lower. Useful with large
+            ``fetch_max_bytes``. Default: False
 
         sasl_mechanism (str): Authentication mechanism when security_protocol
             is configured for SASL_PLAINTEXT or SASL_SSL. Valid values are:
@@ -218,6 +285,8 @@ class AIOKafkaConsumer(object):
                  bootstrap_servers='localhost',
                  client_id='aiokafka-' + __version__,
                  group_id=None,
+                 group_instance_id=None,
+                 client_rack=None,
                  key_deserializer=None, value_deserializer=None,
                  fetch_max_wait_ms=500,
                  fetch_max_bytes=52428800,
@@ -228,6 +297,9 @@ class AIOKafkaConsumer(object):
                  auto_offset_reset='latest',
                  enable_auto_commit=True,
                  auto_commit_interval_ms=5000,
+                 auto_commit_max_records=None,
+                 auto_commit_max_bytes=None,
+                 commit_min_interval_ms=0,
                  check_crcs=True,
                  metadata_max_age_ms=5 * 60 * 1000,
                  partition_assignment_strategy=(RoundRobinPartitionAssignor,),
@@ -237,17 +309,24 @@ class AIOKafkaConsumer(object):
                  heartbeat_interval_ms=3000,
                  consumer_timeout_ms=200,
                  max_poll_records=None,
+                 max_unacked_offsets=None,
                  ssl_context=None,
                  security_protocol='PLAINTEXT',
                  api_version='auto',
                  exclude_internal_topics=True,
                  connections_max_idle_ms=540000,
+                 reconnect_backoff_ms=50,
+                 reconnect_backoff_max_ms=1000,
+                 warm_up_connections=False,
+                 metadata_cache_path=None,
                  isolation_level="read_uncommitted",
+                 stream_fetch_responses=False,
                  sasl_mechanism="PLAIN",
                  sasl_plain_password=None,
                  sasl_plain_username=None,
                  sasl_kerberos_service_name='kafka',
-                 sasl_kerberos_domain_name=None):
+                 sasl_kerberos_domain_name=None,
+                 client=None):
         if loop is None:
             loop = get_running_loop()
 
@@ -258,22 +337,34 @@ class AIOKafkaConsumer(object):
         if rebalance_timeout_ms is None:
             rebalance_timeout_ms = session_timeout_ms
 
-        self._client = AIOKafkaClient(
-            loop=loop, bootstrap_servers=bootstrap_servers,
-            client_id=client_id, metadata_max_age_ms=metadata_max_age_ms,
-            request_timeout_ms=request_timeout_ms,
-            retry_backoff_ms=retry_backoff_ms,
-            api_version=api_version,
-            ssl_context=ssl_context,
-            security_protocol=security_protocol,
-            connections_max_idle_ms=connections_max_idle_ms,
-            sasl_mechanism=sasl_mechanism,
-            sasl_plain_username=sasl_plain_username,
-            sasl_plain_password=sasl_plain_password,
-            sasl_kerberos_service_name=sasl_kerberos_service_name,
-            sasl_kerberos_domain_name=sasl_kerberos_domain_name)
+        if group_instance_id is not None and group_id is None:
+            raise ValueError("`group_instance_id` requires `group_id`")
+
+        if client is not None:
+            self._client = client.share()
+        else:
+            self._client = AIOKafkaClient(
+                loop=loop, bootstrap_servers=bootstrap_servers,
+                client_id=client_id, metadata_max_age_ms=metadata_max_age_ms,
+                request_timeout_ms=request_timeout_ms,
+                retry_backoff_ms=retry_backoff_ms,
+                api_version=api_version,
+                ssl_context=ssl_context,
+                security_protocol=security_protocol,
+                connections_max_idle_ms=connections_max_idle_ms,
+                reconnect_backoff_ms=reconnect_backoff_ms,
+                reconnect_backoff_max_ms=reconnect_backoff_max_ms,
+                sasl_mechanism=sasl_mechanism,
+                sasl_plain_username=sasl_plain_username,
+                sasl_plain_password=sasl_plain_password,
+                sasl_kerberos_service_name=sasl_kerberos_service_name,
+                sasl_kerberos_domain_name=sasl_kerberos_domain_name,
+                metadata_cache_path=metadata_cache_path)
 
         self._group_id = group_id
+        self._group_instance_id = group_instance_id
+        self._client_rack = client_rack
+        self._warm_up_connections = warm_up_connections
         self._heartbeat_interval_ms = heartbeat_interval_ms
         self._session_timeout_ms = session_timeout_ms
         self._retry_backoff_ms = retry_backoff_ms
@@ -281,6 +372,13 @@ class AIOKafkaConsumer(object):
         self._request_timeout_ms = request_timeout_ms
         self._enable_auto_commit = enable_auto_commit
         self._auto_commit_interval_ms = auto_commit_interval_ms
+        self._auto_commit_max_records = auto_commit_max_records
+        self._auto_commit_max_bytes = auto_commit_max_bytes
+        # Coordinator has to know the amount of consumed data
+        self._count_consumed = enable_auto_commit and group_id is not None \
+            and (auto_commit_max_records is not None or
+                 auto_commit_max_bytes is not None)
+        self._commit_min_interval_ms = commit_min_interval_ms
         self._partition_assignment_strategy = partition_assignment_strategy
         self._key_deserializer = key_deserializer
         self._value_deserializer = value_deserializer
@@ -290,8 +388,12 @@ class AIOKafkaConsumer(object):
         self._max_partition_fetch_bytes = max_partition_fetch_bytes
         self._exclude_internal_topics = exclude_internal_topics
         self._max_poll_records = max_poll_records
+        if max_unacked_offsets is not None and max_unacked_offsets < 1:
+            raise ValueError("`max_unacked_offsets` must be positive")
+        self._max_unacked_offsets = max_unacked_offsets
         self._consumer_timeout = consumer_timeout_ms / 1000
         self._isolation_level = isolation_level
+        self._stream_fetch_responses = stream_fetch_responses
         self._rebalance_timeout_ms = rebalance_timeout_ms
         self._max_poll_interval_ms = max_poll_interval_ms
 
@@ -335,6 +437,10 @@ class AIOKafkaConsumer(object):
         assert self._fetcher is None, "Did you call `start` twice?"
         await self._client.bootstrap()
         await self._wait_topics()
+        if self._warm_up_connections and \
+                self._subscription.subscription is not None:
+            await self._client.warm_up(
+                self._subscription.subscription.topics)
 
         if self._client.api_version < (0, 9):
             raise ValueError("Unsupported Kafka version: {}".format(
@@ -346,6 +452,12 @@ class AIOKafkaConsumer(object):
                 "`read_committed` isolation_level available only for Brokers "
                 "0.11 and above")
 
+        if self._group_instance_id is not None and \
+                self._client.api_version < (2, 3):
+            raise UnsupportedVersionError(
+                "`group_instance_id` available only for Brokers 2.3 and "
+                "above")
+
         self._fetcher = Fetcher(
             self._client, self._subscription, loop=self._loop,
             key_deserializer=self._key_deserializer,
@@ -358,7 +470,8 @@ class AIOKafkaConsumer(object):
             fetcher_timeout=self._consumer_timeout,
             retry_backoff_ms=self._retry_backoff_ms,
             auto_offset_reset=self._auto_offset_reset,
-            isolation_level=self._isolation_level)
+            isolation_level=self._isolation_level,
+            stream_responses=self._stream_fetch_responses)
 
         if self._group_id is not None:
             # using group coordinator for automatic partitions assignment
@@ -373,7 +486,12 @@ class AIOKafkaConsumer(object):
                 assignors=self._partition_assignment_strategy,
                 exclude_internal_topics=self._exclude_internal_topics,
                 rebalance_timeout_ms=self._rebalance_timeout_ms,
-                max_poll_interval_ms=self._max_poll_interval_ms
+                max_poll_interval_ms=self._max_poll_interval_ms,
+                group_instance_id=self._group_instance_id,
+                client_rack=self._client_rack,
+                commit_min_interval_ms=self._commit_min_interval_ms,
+                auto_commit_max_records=self._auto_commit_max_records,
+                auto_commit_max_bytes=self._auto_commit_max_bytes
             )
             if self._subscription.subscription is not None:
                 if self._subscription.partitions_auto_assigned():
@@ -544,6 +662,62 @@ class AIOKafkaConsumer(object):
 
         await self._coordinator.commit_offsets(assignment, offsets)
 
+    def ack(self, *records):
+        """ Acknowledge records as processed. Requires the
+        ``max_unacked_offsets`` option.
+
+        Records can be acknowledged in any order, for example when processed
+        concurrently. Committed offset of a partition never moves past a
+        record, that was returned and not acknowledged yet::
+
+            async def process(msg):
+                await do_work(msg)
+                consumer.ack(msg)
+
+            async for msg in consumer:
+                loop.create_task(process(msg))
+
+        Records of partitions, that were reassigned or seeked since they were
+        returned, are ignored.
+
+        Arguments:
+            *records (ConsumerRecord): Records to acknowledge.
+        Raises:
+            IllegalOperation: If used without ``max_unacked_offsets``.
+        """
+        if self._max_unacked_offsets is None:
+            raise IllegalOperation("Requires max_unacked_offsets")
+        subscription = self._subscription.subscription
+        if subscription is None or subscription.assignment is None:
+            return
+        assignment = subscription.assignment
+        for record in records:
+            tp_state = assignment.state_value(
+                TopicPartition(record.topic, record.partition))
+            if tp_state is not None:
+                tp_state.ack(record.offset)
+
+    def _record_bytes(self, messages):
+        if self._auto_commit_max_bytes is None:
+            return 0
+        nbytes = 0
+        for msg in messages:
+            nbytes += max(msg.serialized_key_size, 0) + \
+                max(msg.serialized_value_size, 0)
+        return nbytes
+
+    def _track_delivered(self, records):
+        subscription = self._subscription.subscription
+        if subscription is None or subscription.assignment is None:
+            return
+        assignment = subscription.assignment
+        for tp, messages in records.items():
+            tp_state = assignment.state_value(tp)
+            if tp_state is not None and messages:
+                tp_state.delivered(
+                    [msg.offset for msg in messages],
+                    self._max_unacked_offsets)
+
     async def committed(self, partition):
         """ Get the last committed offset for the given partition. (whether the
         commit happened by this process or another).
@@ -600,6 +774,17 @@ class AIOKafkaConsumer(object):
         """
         return self._client.cluster.partitions_for_topic(topic)
 
+    def throttle_stats(self):
+        """ Get quota throttling reported by brokers in fetch responses.
+
+        Partitions are not fetched from a broker while it's muted by
+        throttling.
+
+        Returns:
+            dict: node id -> :class:`~aiokafka.structs.ThrottleStats`
+        """
+        return self._client.throttle_stats()
+
     async def position(self, partition):
         """ Get the offset of the *next record* that will be fetched (if a
         record with that offset exists on broker).
@@ -1121,6 +1306,12 @@ class AIOKafkaConsumer(object):
 
         with self._subscription.fetch_context():
             msg = await self._fetcher.next_record(partitions)
+        if self._max_unacked_offsets is not None:
+            self._track_delivered(
+                {TopicPartition(msg.topic, msg.partition): (msg,)})
+        if self._count_consumed:
+            self._coordinator.records_consumed(
+                1, self._record_bytes((msg,)))
         return msg
 
     async def getmany(self, *partitions, timeout_ms=0, max_records=None):
@@ -1172,8 +1363,182 @@ class AIOKafkaConsumer(object):
             records = await self._fetcher.fetched_records(
                 partitions, timeout,
                 max_records=max_records or self._max_poll_records)
+        if self._max_unacked_offsets is not None:
+            self._track_delivered(records)
+        if self._count_consumed and records:
+            count = 0
+            nbytes = 0
+            for messages in records.values():
+                count += len(messages)
+                nbytes += self._record_bytes(messages)
+            self._coordinator.records_consumed(count, nbytes)
         return records
 
+    async def getbatches(self, *partitions, timeout_ms=0, max_batches=None):
+        """Get raw record batches from assigned topics / partitions.
+
+        Same as :meth:`.getmany`, but returns record batches as they were
+        fetched from the broker, without decompressing them or parsing
+        separate records. This is useful for applications, that only move
+        bytes around, like archivers or mirroring tools.
+
+        Each batch is a ``DefaultRecordBatch`` (message format v2) or a
+        ``LegacyRecordBatch`` (v0 and v1) and exposes attributes like
+        ``base_offset``, ``next_offset``, ``compression_type`` and
+        ``is_transactional``. Use ``batch.raw_bytes()`` to get the batch data
+        in wire format. Aborted transactional batches (with
+        ``isolation_level="read_committed"``) and control batches are
+        skipped. Consumed position is advanced past the last returned batch.
+
+        Note:
+            Batches are returned whole, so the first batch of a partition may
+            contain offsets lower than the current position. Records, already
+            returned by :meth:`.getone` or :meth:`.getmany`, may also be
+            returned again as part of a batch. Deserializers are not applied.
+
+        Arguments:
+            partitions (List[TopicPartition]): The partitions that need
+                fetching batches. If no one partition specified then all
+                subscribed partitions will be used
+            timeout_ms (int, optional): milliseconds spent waiting if
+                data is not available in the buffer. If 0, returns immediately
+                with any batches that are available currently in the buffer,
+                else returns empty. Must not be negative. Default: 0
+            max_batches (int, optional): maximum number of batches returned
+                in total. Default: None (no limit)
+        Returns:
+            dict: topic partition to list of record batches since the last
+                fetch for the subscribed list of topics and partitions
+
+        Example usage:
+
+
+        .. code:: python
+
+            data = await consumer.getbatches()
+            for tp, batches in data.items():
+                for batch in batches:
+                    archive.write(tp, batch.base_offset, batch.next_offset)
+
+        """
+        assert all(map(lambda k: isinstance(k, TopicPartition), partitions))
+        if self._closed:
+            raise ConsumerStoppedError()
+
+        if max_batches is not None and (
+                not isinstance(max_batches, int) or max_batches < 1):
+            raise ValueError("`max_batches` must be a positive Integer")
+
+        # Raise coordination errors if any
+        self._coordinator.check_errors()
+
+        timeout = timeout_ms / 1000
+        with self._subscription.fetch_context():
+            batches = await self._fetcher.fetched_batches(
+                partitions, timeout, max_batches=max_batches)
+        return batches
+
+    async def getcolumns(self, *partitions, timeout_ms=0):
+        """Get records from assigned topics / partitions in columnar form.
+
+        All prefetched records of a partition are decoded into a single
+        :class:`~aiokafka.structs.RecordColumns` without creating a
+        :class:`~aiokafka.structs.ConsumerRecord` per message. All fields
+        support the buffer protocol, so they can be wrapped by libraries like
+        NumPy or pyarrow without copying. Deserializers and headers are not
+        applied.
+
+        Arguments:
+            partitions (List[TopicPartition]): The partitions that need
+                fetching records. If no one partition specified then all
+                subscribed partitions will be used
+            timeout_ms (int, optional): milliseconds spent waiting if
+                data is not available in the buffer. If 0, returns immediately
+                with any records that are available currently in the buffer,
+                else returns empty. Must not be negative. Default: 0
+        Returns:
+            dict: topic partition to :class:`~aiokafka.structs.RecordColumns`
+                with records since the last fetch
+
+        Example usage:
+
+
+        .. code:: python
+
+            data = await consumer.getcolumns()
+            for tp, columns in data.items():
+                offsets = numpy.frombuffer(columns.offsets, dtype=numpy.int64)
+                values = pyarrow.py_buffer(columns.data)
+
+        """
+        assert all(map(lambda k: isinstance(k, TopicPartition), partitions))
+        if self._closed:
+            raise ConsumerStoppedError()
+
+        # Raise coordination errors if any
+        self._coordinator.check_errors()
+
+        timeout = timeout_ms / 1000
+        with self._subscription.fetch_context():
+            columns = await self._fetcher.fetched_columns(partitions, timeout)
+        return columns
+
+    async def run(self, handler, *, concurrency=1, max_queued_records=500,
+                  key_affinity=False):
+        """Process records using the ``handler`` coroutine function, until the
+        consumer is stopped.
+
+        Records of each partition are handled in order, one at a time, while
+        up to ``concurrency`` partitions are processed in parallel. Records are
+        acknowledged once handled (see :meth:`ack`), so both automatic and
+        manual commits only include processed records. When partitions are
+        revoked by a group rebalance, records of those already fetched are
+        processed and their offsets committed before the
+        :class:`.ConsumerRebalanceListener` of the subscription is called.
+
+        With ``key_affinity`` records are routed by the hash of their key to
+        ``concurrency`` queues instead, so records with different keys from
+        the same partition are handled in parallel. Order is then preserved
+        only for records with the same key. Keys must be hashable (after
+        deserialization).
+
+        Example usage:
+
+
+        .. code:: python
+
+            async def handle(msg):
+                await process_msg(msg)
+
+            await consumer.run(handle, concurrency=10)
+
+        Arguments:
+            handler (coroutine function): called with each
+                :class:`~aiokafka.structs.ConsumerRecord`.
+            concurrency (int): maximum number of records handled at the same
+                time. Default: 1
+            max_queued_records (int): fetching from a partition is paused while
+                this many of its records are waiting to be handled.
+                Default: 500
+            key_affinity (bool): route records by key instead of partition.
+                Default: False
+        Raises:
+            Exception: raised by ``handler``. Processing of all partitions is
+                stopped and records not handled yet are not committed.
+        """
+        if self._closed:
+            raise ConsumerStoppedError()
+        if not isinstance(concurrency, int) or concurrency < 1:
+            raise ValueError("`concurrency` must be a positive Integer")
+        if not isinstance(max_queued_records, int) or max_queued_records < 1:
+            raise ValueError("`max_queued_records` must be a positive Integer")
+
+        runner = ConsumerRunner(
+            self, handler, concurrency=concurrency,
+            max_queued_records=max_queued_records,
+            key_affinity=key_affinity, loop=self._loop)
+        await runner.run()
+
     def pause(self, *partitions):
         """Suspend fetching from the requested partitions.
 
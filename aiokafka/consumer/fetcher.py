@@ -1,3 +1,4 @@
+import array
 import asyncio
 import collections
 import logging
@@ -12,12 +13,17 @@ import aiokafka.errors as Errors
 from aiokafka.errors import (
     ConsumerStoppedError, RecordTooLargeError, KafkaTimeoutError)
 from aiokafka.record.memory_records import MemoryRecords
+from aiokafka.record.default_records import DefaultRecordBatch
 from aiokafka.record.control_record import ControlRecord, ABORT_MARKER
-from aiokafka.structs import OffsetAndTimestamp, TopicPartition, ConsumerRecord
+from aiokafka.structs import (
+    OffsetAndTimestamp, TopicPartition, ConsumerRecord, RecordColumns)
 from aiokafka.util import ensure_future, create_future
 
 log = logging.getLogger(__name__)
 
+# Set if `ConsumerRecord` is the C implementation
+_consumer_record_from = getattr(ConsumerRecord, "from_record", None)
+
 UNKNOWN_OFFSET = -1
 
 # Isolation levels
@@ -68,6 +74,17 @@ class FetchResult:
 
         self._assignment = assignment
 
+    @property
+    def assignment(self):
+        """ Assignment the partition belongs to. If the partition was kept
+        after an incremental rebalance this is the new assignment.
+        """
+        assignment = self._assignment
+        if not assignment.active:
+            tp_state = assignment.state_value(self._topic_partition)
+            assignment = self._assignment = tp_state.assignment
+        return assignment
+
     def calculate_backoff(self):
         lifetime = self._loop.time() - self._created
         if lifetime < self._backoff:
@@ -75,7 +92,7 @@ class FetchResult:
         return 0
 
     def check_assignment(self, tp):
-        assignment = self._assignment
+        assignment = self.assignment
 
         # There are cases where the returned offset from broker differs from
         # what was requested. This would not be much of an issue if the user
@@ -100,12 +117,12 @@ class FetchResult:
             # fetched records are returned
             log.debug("Not returning fetched records for partition %s"
                       " since it is no fetchable (unassigned or paused)", tp)
-            self._partition_records = None
+            self._drop_records()
             return False
         return True
 
     def _update_position(self):
-        state = self._assignment.state_value(self._topic_partition)
+        state = self.assignment.state_value(self._topic_partition)
         state.consumed_to(self._partition_records.next_fetch_offset)
 
     def getone(self):
@@ -119,7 +136,7 @@ class FetchResult:
             except StopIteration:
                 # We should update position in any case
                 self._update_position()
-                self._partition_records = None
+                self._drop_records()
                 return
             else:
                 self._update_position()
@@ -138,13 +155,97 @@ class FetchResult:
                 break
         else:
             self._update_position()
-            self._partition_records = None
+            self._drop_records()
+
+        return ret_list
+
+    def getall_batches(self, max_batches=None):
+        tp = self._topic_partition
+        if not self.check_assignment(tp) or not self.has_more():
+            return []
+
+        ret_list = []
+        while True:
+            batch = self._partition_records.next_batch()
+            if batch is None:
+                self._update_position()
+                self._drop_records()
+                break
+            ret_list.append(batch)
+            if max_batches is not None and len(ret_list) >= max_batches:
+                self._update_position()
+                break
 
         return ret_list
 
+    def getall_columns(self):
+        tp = self._topic_partition
+        if not self.check_assignment(tp) or not self.has_more():
+            return None
+
+        # First batch can contain records before the current position
+        min_offset = self._partition_records.next_fetch_offset
+        columns = None
+        for batch in self.getall_batches():
+            if isinstance(batch, DefaultRecordBatch):
+                columns = batch.to_columns(columns, min_offset)
+            else:
+                if columns is None:
+                    columns = RecordColumns(
+                        array.array("q"), array.array("q"), array.array("q"),
+                        array.array("i"), array.array("q"), array.array("i"),
+                        bytearray())
+                self._legacy_to_columns(batch, columns, min_offset)
+        # Batches may hold only records below the position or control records
+        if columns is None or not columns.offsets:
+            return None
+        return columns
+
+    @staticmethod
+    def _legacy_to_columns(batch, columns, min_offset):
+        (offsets, timestamps, key_offsets, key_lengths, value_offsets,
+         value_lengths, data) = columns
+        for record in batch:
+            if record.offset < min_offset:
+                continue
+            offsets.append(record.offset)
+            if record.timestamp is None:
+                timestamps.append(-1)
+            else:
+                timestamps.append(record.timestamp)
+
+            key_offsets.append(len(data))
+            if record.key is None:
+                key_lengths.append(-1)
+            else:
+                key_lengths.append(len(record.key))
+                data += record.key
+
+            value_offsets.append(len(data))
+            if record.value is None:
+                value_lengths.append(-1)
+            else:
+                value_lengths.append(len(record.value))
+                data += record.value
+
     def has_more(self):
         return self._partition_records is not None
 
+    def compact(self, max_fill=0.5):
+        if self._partition_records is not None:
+            self._partition_records.compact(max_fill)
+
+    def _drop_records(self):
+        partition_records = self._partition_records
+        if partition_records is not None:
+            self._partition_records = None
+            partition_records.close()
+
+    def __del__(self):
+        # Results are dropped by Fetcher without being fully consumed on
+        # seek, rebalance, etc. Give the receive buffer back in those cases.
+        self._drop_records()
+
     def __repr__(self):
         return "<FetchResult position={!r}>".format(
             self._partition_records.next_fetch_offset)
@@ -175,9 +276,12 @@ class PartitionRecords:
 
     def __init__(
             self, tp, records, aborted_transactions, fetch_offset,
-            key_deserializer, value_deserializer, check_crcs, isolation_level):
+            key_deserializer, value_deserializer, check_crcs, isolation_level,
+            buffer=None):
         self._tp = tp
         self._records = records
+        # Pooled receive buffer `records` are read from, if any
+        self._buffer = buffer.acquire() if buffer is not None else None
         self._aborted_transactions = sorted(
             aborted_transactions or [], key=lambda x: x[1])
         self._aborted_producers = set()
@@ -191,6 +295,10 @@ class PartitionRecords:
         # empty compacted batches, etc.
         self.next_fetch_offset = fetch_offset
 
+        # Batch currently being unpacked into records, if any
+        self._current_batch = None
+
+        self._batches_iterator = self._unpack_batches()
         self._records_iterator = self._unpack_records()
 
     def __iter__(self):
@@ -204,9 +312,85 @@ class PartitionRecords:
             self._records_iterator = None
             raise
 
-    def _unpack_records(self):
-        # NOTE: if the batch is not compressed it's equal to 1 record in
-        #       v0 and v1.
+    def next_batch(self):
+        """ Return the next raw record batch without unpacking its records.
+        Aborted transactional batches and control batches are skipped, same
+        as for record iteration. Returns None if there are no more batches.
+        """
+        batch = self._current_batch
+        if batch is not None:
+            # Record iteration stopped in the middle of this batch. We can only
+            # return it whole, so the caller will see some offsets below the
+            # current position.
+            self._current_batch = None
+            self._records_iterator.close()
+            self._records_iterator = self._unpack_records()
+        else:
+            try:
+                batch = next(self._batches_iterator)
+            except StopIteration:
+                return None
+        self.next_fetch_offset = batch.next_offset
+        return batch
+
+    def close(self):
+        """ Drop all references to the fetched data and release the receive
+        buffer, if any. Called once the records are consumed or discarded.
+        """
+        self._current_batch = None
+        if self._records_iterator is not None:
+            self._records_iterator.close()
+            self._records_iterator = None
+        self._batches_iterator.close()
+        self._records = None
+        buffer, self._buffer = self._buffer, None
+        if buffer is not None:
+            buffer.release()
+
+    def compact(self, max_fill=0.5):
+        """ Copy the data not yet consumed out of the fetched buffer, if it
+        takes at most `max_fill` of it. This way records kept for a long time
+        only hold memory for what is left, not for the whole partition data
+        or a pooled receive buffer. Returns True if the data was copied.
+        """
+        if self._records is None or self._records_iterator is None:
+            return False
+        data = self._copy_tail(max_fill)
+        if data is None:
+            return False
+
+        self._current_batch = None
+        self._records_iterator.close()
+        self._batches_iterator.close()
+        self._records = MemoryRecords(data)
+        self._batches_iterator = self._unpack_batches()
+        self._records_iterator = self._unpack_records()
+        buffer, self._buffer = self._buffer, None
+        if buffer is not None:
+            buffer.release()
+        return True
+
+    def _copy_tail(self, max_fill):
+        records = self._records
+        tail = records.tail()
+        try:
+            size = records.size_in_bytes()
+            if len(tail) > size * max_fill or \
+                    (len(tail) == size and self._buffer is None):
+                # Too much data left, or nothing to gain from copying
+                return None
+            data = bytes(tail)
+        finally:
+            tail.release()
+
+        batch = self._current_batch
+        if batch is not None:
+            # Batch is partially consumed. We will iterate it again from the
+            # start, skipping records before `next_fetch_offset`.
+            data = batch.raw_bytes() + data
+        return data
+
+    def _unpack_batches(self):
         tp = self._tp
         records = self._records
         while records.has_next():
@@ -241,6 +425,14 @@ class PartitionRecords:
                 self.next_fetch_offset = next_batch.next_offset
                 continue
 
+            yield next_batch
+
+    def _unpack_records(self):
+        # NOTE: if the batch is not compressed it's equal to 1 record in
+        #       v0 and v1.
+        tp = self._tp
+        for next_batch in self._batches_iterator:
+            self._current_batch = next_batch
             for record in next_batch:
                 # It's OK for the offset to be larger than the current
                 # partition. It will happen in compacted topics.
@@ -250,6 +442,7 @@ class PartitionRecords:
                 consumer_record = self._consumer_record(tp, record)
                 self.next_fetch_offset = record.offset + 1
                 yield consumer_record
+            self._current_batch = None
 
             # Message format v2 preserves the last offset in a batch even if
             # the last record is removed through compaction. By using the next
@@ -283,10 +476,6 @@ class PartitionRecords:
         return ControlRecord.parse(control_record.key) == ABORT_MARKER
 
     def _consumer_record(self, tp, record):
-        key_size = len(record.key) if record.key is not None else -1
-        value_size = \
-            len(record.value) if record.value is not None else -1
-
         if self._key_deserializer:
             key = self._key_deserializer(record.key)
         else:
@@ -296,6 +485,13 @@ class PartitionRecords:
         else:
             value = record.value
 
+        if _consumer_record_from is not None:
+            return _consumer_record_from(
+                tp.topic, tp.partition, record, key, value)
+
+        key_size = len(record.key) if record.key is not None else -1
+        value_size = \
+            len(record.value) if record.value is not None else -1
         return ConsumerRecord(
             tp.topic, tp.partition, record.offset, record.timestamp,
             record.timestamp_type, key, value, record.checksum,
@@ -353,6 +549,9 @@ class Fetcher:
             ofther value will raise the exception. Default: 'latest'.
         isolation_level (str): Controls how to read messages written
             transactionally. See consumer description.
+        stream_responses (bool): Decode fetch responses incrementally as data
+            arrives from the broker. See consumer description.
+            Default: False
     """
 
     def __init__(
@@ -368,7 +567,8 @@ class Fetcher:
             prefetch_backoff=0.1,
             retry_backoff_ms=100,
             auto_offset_reset='latest',
-            isolation_level="read_uncommitted"):
+            isolation_level="read_uncommitted",
+            stream_responses=False):
         self._client = client
         self._loop = loop
         self._key_deserializer = key_deserializer
@@ -381,6 +581,7 @@ class Fetcher:
         self._fetcher_timeout = fetcher_timeout
         self._prefetch_backoff = prefetch_backoff
         self._retry_backoff = retry_backoff_ms / 1000
+        self._stream_responses = stream_responses
         self._subscriptions = subscriptions
         self._default_reset_strategy = OffsetResetStrategy.from_str(
             auto_offset_reset)
@@ -395,6 +596,9 @@ class Fetcher:
 
         self._records = collections.OrderedDict()
         self._in_flight = set()
+        # TopicPartition -> (old leader, metadata update future) for
+        # partitions that moved to another leader
+        self._stale_leaders = {}
         self._pending_tasks = set()
 
         self._wait_consume_future = None
@@ -494,7 +698,7 @@ class Fetcher:
                             task.cancel()
                         await task
                     self._pending_tasks.clear()
-                    self._records.clear()
+                    self._retain_records()
 
                     subscription = self._subscriptions.subscription
                     if subscription is None or \
@@ -555,6 +759,16 @@ class Fetcher:
             log.error("Unexpected error in fetcher routine", exc_info=True)
             raise Errors.KafkaError("Unexpected error during data retrieval")
 
+    def _retain_records(self):
+        """ Drop fetched data for partitions that are no longer assigned.
+        Partitions kept after an incremental (cooperative) rebalance retain
+        their data.
+        """
+        for tp, res_or_error in list(self._records.items()):
+            if type(res_or_error) != FetchResult or \
+                    not res_or_error.assignment.active:
+                del self._records[tp]
+
     def _get_actions_per_node(self, assignment):
         """ For each assigned partition determine the action needed to be
         performed and group those by leader node id.
@@ -567,10 +781,22 @@ class Fetcher:
         resume_futures = []
         invalid_metadata = False
 
+        # Don't fetch from brokers we failed to connect to recently
+        nodes_in_backoff = self._client.nodes_in_backoff()
+        stale_leaders = self._stale_leaders
+        for tp in list(stale_leaders):
+            if tp not in assignment.tps:
+                del stale_leaders[tp]
+
         for tp in assignment.tps:
             tp_state = assignment.state_value(tp)
 
             node_id = self._client.cluster.leader_for_partition(tp)
+            stale = stale_leaders.get(tp)
+            if stale is not None and \
+                    (stale[0] != node_id or stale[1].done()):
+                del stale_leaders[tp]
+                stale = None
             backoff = 0
             if tp in self._records:
                 # We have data still not consumed by user. In this case we
@@ -580,9 +806,22 @@ class Fetcher:
                 backoff = record.calculate_backoff()
                 if backoff:
                     backoff_by_nodes[node_id].append(backoff)
+                if isinstance(record, FetchResult):
+                    # Don't let data kept for long hold the whole buffer it
+                    # was fetched in. Paused partitions can stay unconsumed
+                    # indefinitely, so we copy out whatever is left for them.
+                    if tp_state.paused:
+                        record.compact(max_fill=1)
+                    elif not backoff:
+                        record.compact()
             elif node_id in self._in_flight:
                 # We have in-flight fetches to this node
                 continue
+            elif stale is not None:
+                # Wait for the new leader of the partition
+                resume_futures.append(stale[1])
+            elif node_id in nodes_in_backoff:
+                backoff_by_nodes[node_id].append(nodes_in_backoff[node_id])
             elif node_id is None or node_id == -1:
                 log.debug("No leader found for partition %s."
                           " Waiting metadata update", tp)
@@ -591,6 +830,9 @@ class Fetcher:
                 awaiting_reset[node_id].append(tp)
             elif tp_state.paused:
                 resume_futures.append(tp_state.resume_fut)
+            elif tp_state.acks_fut is not None:
+                # Too many records handed out are not acknowledged yet
+                resume_futures.append(tp_state.acks_fut)
             else:
                 position = tp_state.position
                 fetchable[node_id].append((tp, position))
@@ -655,8 +897,13 @@ class Fetcher:
 
     async def _proc_fetch_request(self, assignment, node_id, request):
         needs_wakeup = False
+        sent_at = self._loop.time()
         try:
-            response = await self._client.send(node_id, request)
+            if self._stream_responses:
+                response = await self._client.send(
+                    node_id, request, stream=True)
+            else:
+                response = await self._client.send(node_id, request)
         except Errors.KafkaError as err:
             log.error("Failed fetch messages from %s: %s", node_id, err)
             await asyncio.sleep(self._retry_backoff, loop=self._loop)
@@ -666,103 +913,159 @@ class Fetcher:
             # is no longer of interest.
             return False
 
-        if not assignment.active:
-            log.debug(
-                "Discarding fetch response since the assignment changed during"
-                " fetch")
-            return False
-
         fetch_offsets = {}
         for topic, partitions in request.topics:
             for partition, offset, _ in partitions:
                 fetch_offsets[TopicPartition(topic, partition)] = offset
 
         now_ms = int(1000 * time.time())
-        for topic, partitions in response.topics:
-            for partition, error_code, highwater, *part_data in partitions:
-                tp = TopicPartition(topic, partition)
-                error_type = Errors.for_code(error_code)
-                fetch_offset = fetch_offsets[tp]
-                tp_state = assignment.state_value(tp)
-                if not tp_state.has_valid_position or \
-                        tp_state.position != fetch_offset:
-                    log.debug(
-                        "Discarding fetch response for partition %s "
-                        "since its offset %s does not match the current "
-                        "position", tp, fetch_offset)
-                    continue
-
-                if error_type is Errors.NoError:
-                    if request.API_VERSION >= 4:
-                        aborted_transactions = part_data[-2]
-                        lso = part_data[-3]
-                    else:
-                        aborted_transactions = None
-                        lso = None
-                    tp_state.highwater = highwater
-                    tp_state.lso = lso
-                    tp_state.timestamp = now_ms
-
-                    # part_data also contains lso, aborted_transactions.
-                    # message_set is last
-                    records = MemoryRecords(part_data[-1])
-                    if records.has_next():
-                        log.debug(
-                            "Adding fetched record for partition %s with"
-                            " offset %d to buffered record list",
-                            tp, fetch_offset)
-
-                        partition_records = PartitionRecords(
-                            tp, records, aborted_transactions, fetch_offset,
-                            self._key_deserializer, self._value_deserializer,
-                            self._check_crcs, self._isolation_level)
-
-                        self._records[tp] = FetchResult(
-                            tp, partition_records=partition_records,
-                            assignment=assignment,
-                            backoff=self._prefetch_backoff,
-                            loop=self._loop)
-
-                        # We added at least 1 successful record
-                        needs_wakeup = True
-                    elif records.size_in_bytes() > 0:
-                        # we did not read a single message from a non-empty
-                        # buffer because that message's size is larger than
-                        # fetch size, in this case record this exception
-                        err = RecordTooLargeError(
-                            "There are some messages at [Partition=Offset]: "
-                            "%s=%s whose size is larger than the fetch size %s"
-                            " and hence cannot be ever returned. "
-                            "Increase the fetch size, or decrease the maximum "
-                            "message size the broker will allow.",
-                            tp, fetch_offset, self._max_partition_fetch_bytes)
-                        self._set_error(tp, err)
-                        tp_state.consumed_to(tp_state.position + 1)
+        if not self._stream_responses:
+            if response.API_VERSION >= 1:
+                self._client.throttle(
+                    node_id, response.throttle_time_ms, sent_at)
+            if not assignment.active:
+                log.debug(
+                    "Discarding fetch response since the assignment changed"
+                    " during fetch")
+                return False
+
+            for topic, partitions in response.topics:
+                for partition_data in partitions:
+                    if self._proc_fetch_partition(
+                            assignment, request, fetch_offsets, now_ms,
+                            topic, partition_data):
                         needs_wakeup = True
+            return needs_wakeup
 
-                elif error_type in (Errors.NotLeaderForPartitionError,
-                                    Errors.UnknownTopicOrPartitionError):
-                    self._client.force_metadata_update()
-                elif error_type is Errors.OffsetOutOfRangeError:
-                    if self._default_reset_strategy != \
-                            OffsetResetStrategy.NONE:
-                        tp_state.await_reset(self._default_reset_strategy)
-                    else:
-                        err = Errors.OffsetOutOfRangeError({tp: fetch_offset})
-                        self._set_error(tp, err)
-                        needs_wakeup = True
-                    log.info(
-                        "Fetch offset %s is out of range for partition %s,"
-                        " resetting offset", fetch_offset, tp)
-                elif error_type is Errors.TopicAuthorizationFailedError:
-                    log.warning(
-                        "Not authorized to read from topic %s.", tp.topic)
-                    err = Errors.TopicAuthorizationFailedError(tp.topic)
-                    self._set_error(tp, err)
+        # Partitions are processed as soon as their data arrives. Waiters
+        # are woken up right away, not after the whole response is read.
+        try:
+            async for topic, partition_data, buffer in response:
+                try:
+                    if not assignment.active:
+                        log.debug(
+                            "Discarding fetch response since the assignment"
+                            " changed during fetch")
+                        return False
+                    wakeup = self._proc_fetch_partition(
+                        assignment, request, fetch_offsets, now_ms,
+                        topic, partition_data, buffer)
+                finally:
+                    if buffer is not None:
+                        buffer.release()
+                if wakeup:
                     needs_wakeup = True
-                else:
-                    log.warning('Unexpected error while fetching data: %s',
-                                error_type.__name__)
+                    for waiter in self._fetch_waiters:
+                        self._notify(waiter)
+        except Errors.KafkaError as err:
+            log.error("Failed fetch messages from %s: %s", node_id, err)
+            await asyncio.sleep(self._retry_backoff, loop=self._loop)
+        except asyncio.CancelledError:
+            return False
+        finally:
+            # Read with the response header, so known even if we failed to
+            # read partition data
+            self._client.throttle(
+                node_id, response.throttle_time_ms, sent_at)
+            response.close()
+        return needs_wakeup
+
+    def _proc_fetch_partition(
+            self, assignment, request, fetch_offsets, now_ms,
+            topic, partition_data, buffer=None):
+        """ Process data for a single partition of a FetchResponse. Returns
+        True if fetch waiters need to be woken up. `buffer` is the pooled
+        receive buffer holding the record data, if any.
+        """
+        needs_wakeup = False
+        partition, error_code, highwater, *part_data = partition_data
+        tp = TopicPartition(topic, partition)
+        error_type = Errors.for_code(error_code)
+        fetch_offset = fetch_offsets[tp]
+        tp_state = assignment.state_value(tp)
+        if not tp_state.has_valid_position or \
+                tp_state.position != fetch_offset:
+            log.debug(
+                "Discarding fetch response for partition %s "
+                "since its offset %s does not match the current "
+                "position", tp, fetch_offset)
+            return False
+
+        if error_type is Errors.NoError:
+            if request.API_VERSION >= 4:
+                aborted_transactions = part_data[-2]
+                lso = part_data[-3]
+            else:
+                aborted_transactions = None
+                lso = None
+            tp_state.highwater = highwater
+            tp_state.lso = lso
+            tp_state.timestamp = now_ms
+
+            # part_data also contains lso, aborted_transactions.
+            # message_set is last
+            records = MemoryRecords(part_data[-1])
+            if records.has_next():
+                log.debug(
+                    "Adding fetched record for partition %s with"
+                    " offset %d to buffered record list",
+                    tp, fetch_offset)
+
+                partition_records = PartitionRecords(
+                    tp, records, aborted_transactions, fetch_offset,
+                    self._key_deserializer, self._value_deserializer,
+                    self._check_crcs, self._isolation_level, buffer)
+
+                self._records[tp] = FetchResult(
+                    tp, partition_records=partition_records,
+                    assignment=assignment,
+                    backoff=self._prefetch_backoff,
+                    loop=self._loop)
+
+                # We added at least 1 successful record
+                needs_wakeup = True
+            elif records.size_in_bytes() > 0:
+                # we did not read a single message from a non-empty
+                # buffer because that message's size is larger than
+                # fetch size, in this case record this exception
+                err = RecordTooLargeError(
+                    "There are some messages at [Partition=Offset]: "
+                    "%s=%s whose size is larger than the fetch size %s"
+                    " and hence cannot be ever returned. "
+                    "Increase the fetch size, or decrease the maximum "
+                    "message size the broker will allow.",
+                    tp, fetch_offset, self._max_partition_fetch_bytes)
+                self._set_error(tp, err)
+                tp_state.consumed_to(tp_state.position + 1)
+                needs_wakeup = True
+
+        elif error_type in (Errors.NotLeaderForPartitionError,
+                            Errors.UnknownTopicOrPartitionError):
+            # Don't fetch from the old leader again until metadata of the
+            # topic is updated, then fetch from the new one right away
+            self._stale_leaders[tp] = (
+                self._client.cluster.leader_for_partition(tp),
+                ensure_future(
+                    self._client.force_metadata_update([tp.topic]),
+                    loop=self._loop))
+        elif error_type is Errors.OffsetOutOfRangeError:
+            if self._default_reset_strategy != OffsetResetStrategy.NONE:
+                tp_state.await_reset(self._default_reset_strategy)
+            else:
+                err = Errors.OffsetOutOfRangeError({tp: fetch_offset})
+                self._set_error(tp, err)
+                needs_wakeup = True
+            log.info(
+                "Fetch offset %s is out of range for partition %s,"
+                " resetting offset", fetch_offset, tp)
+        elif error_type is Errors.TopicAuthorizationFailedError:
+            log.warning("Not authorized to read from topic %s.", tp.topic)
+            err = Errors.TopicAuthorizationFailedError(tp.topic)
+            self._set_error(tp, err)
+            needs_wakeup = True
+        else:
+            log.warning('Unexpected error while fetching data: %s',
+                        error_type.__name__)
         return needs_wakeup
 
     def _set_error(self, tp, error):
@@ -1052,6 +1355,25 @@ class Fetcher:
     async def fetched_records(self, partitions, timeout=0, max_records=None):
         """ Returns previously fetched records and updates consumed offsets.
         """
+        return (await self._drain_fetched(
+            partitions, timeout, max_records, FetchResult.getall))
+
+    async def fetched_batches(self, partitions, timeout=0, max_batches=None):
+        """ Returns previously fetched raw record batches and updates consumed
+        offsets. Batches are not decompressed or unpacked into records.
+        """
+        return (await self._drain_fetched(
+            partitions, timeout, max_batches, FetchResult.getall_batches))
+
+    async def fetched_columns(self, partitions, timeout=0):
+        """ Returns previously fetched records decoded in columnar form, one
+        `RecordColumns` per partition, and updates consumed offsets.
+        """
+        return (await self._drain_fetched(
+            partitions, timeout, None,
+            lambda result, max_records: result.getall_columns()))
+
+    async def _drain_fetched(self, partitions, timeout, max_records, getall):
         while True:
             # While the background routine will fetch new records up till new
             # assignment is finished, we don't want to return records, that may
@@ -1069,7 +1391,7 @@ class Fetcher:
                     continue
                 res_or_error = self._records[tp]
                 if type(res_or_error) == FetchResult:
-                    records = res_or_error.getall(max_records)
+                    records = getall(res_or_error, max_records)
                     if not res_or_error.has_more():
                         # We processed all messages - request new ones
                         del self._records[tp]
@@ -14,6 +14,12 @@ from kafka.protocol.group import (
 import aiokafka.errors as Errors
 from aiokafka.structs import OffsetAndMetadata, TopicPartition
 from aiokafka.client import ConnectionGroup, CoordinationType
+from aiokafka.consumer.assignors import (
+    MemberState, RebalanceProtocol, decode_member_metadata,
+    encode_member_metadata, rebalance_protocol)
+from aiokafka.protocol.group import (
+    HeartbeatRequest_v3, JoinGroupRequest_v5, OffsetCommitRequest_v7,
+    SyncGroupRequest_v3)
 from aiokafka.util import ensure_future, create_future
 
 log = logging.getLogger(__name__)
@@ -21,6 +27,38 @@ log = logging.getLogger(__name__)
 UNKNOWN_OFFSET = -1
 
 
+class _CommitBatch:
+    """ Offsets of concurrent ``commit_offsets()`` calls, that will be sent
+    in a single OffsetCommit request.
+    """
+
+    def __init__(self, assignment, *, loop):
+        self.assignment = assignment
+        self.offsets = {}
+        self.future = create_future(loop=loop)
+        # Number of ``commit_offsets()`` calls waiting for the result
+        self.waiters = 0
+        # Sent without the ``commit_min_interval_ms`` delay
+        self.urgent = False
+
+    def merge(self, offsets):
+        # Keep the highest offset per partition
+        for tp, offset in offsets.items():
+            current = self.offsets.get(tp)
+            if current is None or current.offset <= offset.offset:
+                self.offsets[tp] = offset
+
+    def covers(self, assignment, offsets):
+        if assignment is not self.assignment:
+            return False
+        for tp, offset in offsets.items():
+            current = self.offsets.get(tp)
+            if current is None or not (
+                    current.offset > offset.offset or current == offset):
+                return False
+        return True
+
+
 class BaseCoordinator(object):
 
     def __init__(self, client, subscription, *, loop,
@@ -218,7 +256,12 @@ class GroupCoordinator(BaseCoordinator):
                  assignors=(RoundRobinPartitionAssignor,),
                  exclude_internal_topics=True,
                  max_poll_interval_ms=300000,
-                 rebalance_timeout_ms=30000
+                 rebalance_timeout_ms=30000,
+                 group_instance_id=None,
+                 client_rack=None,
+                 commit_min_interval_ms=0,
+                 auto_commit_max_records=None,
+                 auto_commit_max_bytes=None
                  ):
         """Initialize the coordination manager.
 
@@ -237,13 +280,20 @@ class GroupCoordinator(BaseCoordinator):
         self._rebalance_timeout_ms = rebalance_timeout_ms
         self._retry_backoff_ms = retry_backoff_ms
         self._assignors = assignors
+        self._rebalance_protocol = rebalance_protocol(assignors)
         self._enable_auto_commit = enable_auto_commit
         self._auto_commit_interval_ms = auto_commit_interval_ms
 
         self.generation = OffsetCommitRequest.DEFAULT_GENERATION_ID
         self.member_id = JoinGroupRequest[0].UNKNOWN_MEMBER_ID
         self.group_id = group_id
+        self.group_instance_id = group_instance_id
+        self.client_rack = client_rack
         self.coordinator_id = None
+        # Partitions and generation of the last completed rebalance. Sent to
+        # assignors that keep partitions on their previous owners (see
+        # `MemberState`).
+        self._last_assignment = ((), self.generation)
 
         # Coordination flags and futures
         self._performed_join_prepare = False
@@ -270,6 +320,25 @@ class GroupCoordinator(BaseCoordinator):
 
         self._next_autocommit_deadline = \
             loop.time() + auto_commit_interval_ms / 1000
+        # Autocommit is also triggered by the amount of data consumed since
+        # the last one
+        self._auto_commit_max_records = auto_commit_max_records
+        self._auto_commit_max_bytes = auto_commit_max_bytes
+        self._uncommitted_records = 0
+        self._uncommitted_bytes = 0
+        self._autocommit_trigger = create_future(loop=loop)
+        self._autocommit_failed = False
+
+        # Offsets passed to ``commit_offsets()`` are merged into batches, so
+        # only one OffsetCommit request is in flight at a time.
+        self._commit_min_interval = commit_min_interval_ms / 1000
+        self._commit_batches = collections.deque()
+        self._commit_in_flight = None
+        self._commit_task = None
+        self._commit_wakeup = None
+        self._last_commit_time = None
+        # Commits made by revoke listeners are sent right away
+        self._revoking = False
 
         # Will be set on close
         self._closing = create_future(loop=loop)
@@ -342,15 +411,26 @@ class GroupCoordinator(BaseCoordinator):
             await self._coordination_task
         await self._stop_heartbeat_task()
         await self._stop_commit_offsets_refresh_task()
+        await self._stop_commit_task()
 
         await self._maybe_leave_group()
+        # Cluster metadata may be shared with other consumers
+        self._cluster.remove_listener(self._handle_metadata_update)
 
     def maybe_leave_group(self):
         task = ensure_future(self._maybe_leave_group(), loop=self._loop)
         return task
 
     async def _maybe_leave_group(self):
-        if self.generation > 0:
+        if self.generation > 0 and self.group_instance_id is not None:
+            # Static members do not leave the group. The broker keeps their
+            # partitions until `session_timeout_ms` expires, so a restarted
+            # member with the same `group_instance_id` will rejoin without a
+            # rebalance.
+            log.info(
+                "Static member %s does not send LeaveGroup request",
+                self.group_instance_id)
+        elif self.generation > 0:
             # this is a minimal effort attempt to leave the group. we do not
             # attempt any resending if the request fails or times out.
             version = 0 if self._client.api_version < (0, 11, 0) else 1
@@ -369,8 +449,23 @@ class GroupCoordinator(BaseCoordinator):
                 return assignor
         return None
 
+    @property
+    def _cooperative(self):
+        return self._rebalance_protocol is RebalanceProtocol.COOPERATIVE
+
     async def _on_join_prepare(self, previous_assignment):
-        self._subscription.begin_reassignment()
+        # With the cooperative protocol we keep consuming owned partitions
+        # during the rebalance and revoke only the ones that moved after it.
+        # All partitions are revoked if the subscription changed or the
+        # coordinator forgot about this member.
+        incremental = (
+            self._cooperative and
+            previous_assignment is not None and
+            previous_assignment.active and
+            self.member_id != JoinGroupRequest[0].UNKNOWN_MEMBER_ID
+        )
+        if not incremental:
+            self._subscription.begin_reassignment()
         self._group_subscription = None
 
         # commit offsets prior to rebalance if auto-commit enabled
@@ -380,14 +475,20 @@ class GroupCoordinator(BaseCoordinator):
             except Errors.KafkaError as err:
                 # We would retry any retriable commit already
                 log.error("OffsetCommit failed before join, ignoring: %s", err)
-            revoked = previous_assignment.tps
-        else:
-            revoked = set([])
 
+        if not incremental:
+            if previous_assignment is not None:
+                revoked = previous_assignment.tps
+            else:
+                revoked = set([])
+            await self._revoke_partitions(revoked)
+
+    async def _revoke_partitions(self, revoked):
         # execute the user's callback before rebalance
         log.info("Revoking previously assigned partitions %s for group %s",
                  revoked, self.group_id)
         if self._subscription.listener:
+            self._revoking = True
             try:
                 res = self._subscription.listener.on_partitions_revoked(
                     revoked)
@@ -397,6 +498,8 @@ class GroupCoordinator(BaseCoordinator):
                 log.exception("User provided subscription listener %s"
                               " for group %s failed on_partitions_revoked",
                               self._subscription.listener, self.group_id)
+            finally:
+                self._revoking = False
 
     async def _perform_assignment(
         self, leader_id, assignment_strategy, members
@@ -407,7 +510,7 @@ class GroupCoordinator(BaseCoordinator):
         member_metadata = {}
         all_subscribed_topics = set()
         for member_id, metadata_bytes in members:
-            metadata = ConsumerProtocol.METADATA.decode(metadata_bytes)
+            metadata = decode_member_metadata(metadata_bytes)
             member_metadata[member_id] = metadata
             all_subscribed_topics.update(metadata.subscription)
 
@@ -448,11 +551,36 @@ class GroupCoordinator(BaseCoordinator):
 
         assignment = ConsumerProtocol.ASSIGNMENT.decode(
             member_assignment_bytes)
+        subscription = self._subscription.subscription
+        assigned = set(assignment.partitions())
+
+        # With the cooperative protocol only partitions moved to other members
+        # are revoked. Other partitions keep being consumed and don't lose
+        # their fetch state.
+        incremental = (
+            self._cooperative and
+            not self._subscription.reassignment_in_progress and
+            subscription.assignment is not None
+        )
+        revoked = set()
+        if incremental:
+            previous_assignment = subscription.assignment
+            revoked = previous_assignment.tps - assigned
+            if revoked:
+                await self._on_cooperative_revoke(
+                    previous_assignment, revoked)
+                if not subscription.active:
+                    # Subscription changed during the callback, we will
+                    # rejoin the group right away
+                    return
+            added = assigned - previous_assignment.tps
+        else:
+            added = assigned
 
         # update partition assignment
-        self._subscription.assign_from_subscribed(assignment.partitions())
-        # The await bellow can change subscription, remember the ongoing one.
-        subscription = self._subscription.subscription
+        self._subscription.assign_from_subscribed(
+            assigned, incremental=incremental)
+        self._last_assignment = (assigned, generation)
 
         # give the assignor a chance to update internal state
         # based on the received assignment
@@ -464,22 +592,49 @@ class GroupCoordinator(BaseCoordinator):
         await self._stop_commit_offsets_refresh_task()
         self.start_commit_offsets_refresh_task(subscription.assignment)
 
-        assigned = set(self._subscription.assigned_partitions())
         log.info("Setting newly assigned partitions %s for group %s",
-                 assigned, self.group_id)
+                 added, self.group_id)
 
         # execute the user's callback after rebalance
         if self._subscription.listener:
             try:
                 res = self._subscription.listener.on_partitions_assigned(
-                    assigned)
+                    added)
                 if asyncio.iscoroutine(res):
                     await res
             except Exception:
                 log.exception("User provided listener %s for group %s"
                               " failed on partition assignment: %s",
                               self._subscription.listener, self.group_id,
-                              assigned)
+                              added)
+
+        if revoked:
+            # Revoked partitions can only be assigned to their new owners in
+            # the next generation.
+            log.info("Requesting a follow-up rebalance for group %s after "
+                     "revoking partitions", self.group_id)
+            self.request_rejoin()
+
+    async def _on_cooperative_revoke(self, assignment, revoked):
+        # Stop fetching and returning records for revoked partitions
+        for tp in revoked:
+            assignment.state_value(tp).pause()
+
+        if self._enable_auto_commit:
+            offsets = {
+                tp: offset
+                for tp, offset in self._changed_consumed_offsets(
+                    assignment).items()
+                if tp in revoked
+            }
+            try:
+                await self.commit_offsets(assignment, offsets)
+            except Errors.KafkaError as err:
+                log.error(
+                    "OffsetCommit failed before revoking partitions, "
+                    "ignoring: %s", err)
+
+        await self._revoke_partitions(revoked)
 
     def coordinator_dead(self):
         """ Mark the current coordinator as dead.
@@ -499,6 +654,11 @@ class GroupCoordinator(BaseCoordinator):
         """
         self.generation = OffsetCommitRequest.DEFAULT_GENERATION_ID
         self.member_id = JoinGroupRequest[0].UNKNOWN_MEMBER_ID
+        if self._cooperative and \
+                not self._subscription.reassignment_in_progress:
+            # Partitions we kept consuming are lost, revoke them all before
+            # the next join
+            self._performed_join_prepare = False
         self.request_rejoin()
 
     def request_rejoin(self):
@@ -631,6 +791,8 @@ class GroupCoordinator(BaseCoordinator):
             # subscription, which is irrelevant in case of user assignment.
             if auto_assigned:
                 futures.append(self._rejoin_needed_fut)
+            if self._enable_auto_commit:
+                futures.append(self._autocommit_trigger)
 
             # We should always watch for other task raising critical or
             # unexpected errors, so we attach those as futures too. We will
@@ -766,9 +928,14 @@ class GroupCoordinator(BaseCoordinator):
         log.debug("Stopping heartbeat task")
 
     async def _do_heartbeat(self):
-        version = 0 if self._client.api_version < (0, 11, 0) else 1
-        request = HeartbeatRequest[version](
-            self.group_id, self.generation, self.member_id)
+        if self.group_instance_id is not None:
+            request = HeartbeatRequest_v3(
+                self.group_id, self.generation, self.member_id,
+                self.group_instance_id)
+        else:
+            version = 0 if self._client.api_version < (0, 11, 0) else 1
+            request = HeartbeatRequest[version](
+                self.group_id, self.generation, self.member_id)
         log.debug("Heartbeat: %s[%s] %s",
                   self.group_id, self.generation, self.member_id)
 
@@ -814,6 +981,8 @@ class GroupCoordinator(BaseCoordinator):
                 "Heartbeat failed: local member_id was not recognized;"
                 " resetting and re-joining group")
             self.reset_generation()
+        elif error_type is Errors.FencedInstanceId:
+            raise error_type(self.group_instance_id)
         elif error_type is Errors.GroupAuthorizationFailedError:
             raise error_type(self.group_id)
         else:
@@ -903,21 +1072,54 @@ class GroupCoordinator(BaseCoordinator):
             protocol, member_assignment_bytes)
         return True
 
+    def records_consumed(self, count, nbytes):
+        """ Called by Consumer after returning records to the user. Triggers
+        autocommit if ``auto_commit_max_records`` or ``auto_commit_max_bytes``
+        is reached.
+        """
+        self._uncommitted_records += count
+        self._uncommitted_bytes += nbytes
+        max_records = self._auto_commit_max_records
+        max_bytes = self._auto_commit_max_bytes
+        if (max_records is not None and
+                self._uncommitted_records >= max_records) or \
+                (max_bytes is not None and
+                 self._uncommitted_bytes >= max_bytes):
+            if not self._autocommit_trigger.done():
+                self._autocommit_trigger.set_result(None)
+
+    def _changed_consumed_offsets(self, assignment):
+        # Partitions without new records since the last commit are skipped
+        offsets = {}
+        for tp, offset in assignment.all_consumed_offsets().items():
+            if assignment.state_value(tp).last_committed != offset:
+                offsets[tp] = offset
+        return offsets
+
     async def _maybe_do_autocommit(self, assignment):
         if not self._enable_auto_commit:
             return None
         now = self._loop.time()
         interval = self._auto_commit_interval_ms / 1000
         backoff = self._retry_backoff_ms / 1000
-        if now > self._next_autocommit_deadline:
+        triggered = self._autocommit_trigger.done()
+        if triggered:
+            self._autocommit_trigger = create_future(loop=self._loop)
+        # While retrying a failed commit we stick to the backoff
+        if now > self._next_autocommit_deadline or \
+                (triggered and not self._autocommit_failed):
+            self._uncommitted_records = 0
+            self._uncommitted_bytes = 0
             try:
                 async with self._commit_lock:
                     await self._do_commit_offsets(
-                        assignment, assignment.all_consumed_offsets())
+                        assignment,
+                        self._changed_consumed_offsets(assignment))
             except Errors.KafkaError as error:
                 log.warning("Auto offset commit failed: %s", error)
                 if self._is_commit_retriable(error):
                     # Retry after backoff.
+                    self._autocommit_failed = True
                     self._next_autocommit_deadline = \
                         self._loop.time() + backoff
                     return backoff
@@ -925,6 +1127,7 @@ class GroupCoordinator(BaseCoordinator):
                     raise
             # If we had an unrecoverable error we expect the user to handle it
             # from another source (say Fetcher, like authorization errors).
+            self._autocommit_failed = False
             self._next_autocommit_deadline = now + interval
 
         return max(0, self._next_autocommit_deadline - self._loop.time())
@@ -943,16 +1146,112 @@ class GroupCoordinator(BaseCoordinator):
         if not self._enable_auto_commit:
             return
         await self.commit_offsets(
-            assignment, assignment.all_consumed_offsets())
+            assignment, self._changed_consumed_offsets(assignment),
+            urgent=True)
 
-    async def commit_offsets(self, assignment, offsets):
+    async def commit_offsets(self, assignment, offsets, *, urgent=False):
         """Commit specific offsets
 
+        Offsets of concurrent calls are merged, keeping the highest offset
+        per partition, and sent in a single request after the one in flight.
+        Calls with offsets already covered by the request in flight just wait
+        for it. Requests are sent at most once per ``commit_min_interval_ms``,
+        except for urgent ones and those made on revoke or close.
+
         Arguments:
             offsets (dict {TopicPartition: OffsetAndMetadata}): what to commit
+            urgent (bool): don't wait for ``commit_min_interval_ms``
 
         Raises KafkaError on failure
         """
+        in_flight = self._commit_in_flight
+        if in_flight is not None and in_flight.covers(assignment, offsets):
+            batch = in_flight
+        else:
+            batches = self._commit_batches
+            if batches and batches[-1].assignment is assignment:
+                batch = batches[-1]
+            else:
+                batch = _CommitBatch(assignment, loop=self._loop)
+                batches.append(batch)
+            batch.merge(offsets)
+            if urgent or self._revoking or self._closing.done():
+                batch.urgent = True
+                wakeup = self._commit_wakeup
+                if wakeup is not None and not wakeup.done():
+                    wakeup.set_result(None)
+            if self._commit_task is None:
+                self._commit_task = ensure_future(
+                    self._commit_routine(), loop=self._loop)
+        # Shielded, as the batch may be shared with other calls. Retries
+        # stop once no call waits for the result.
+        batch.waiters += 1
+        try:
+            await asyncio.shield(batch.future, loop=self._loop)
+        finally:
+            batch.waiters -= 1
+
+    async def _commit_routine(self):
+        batches = self._commit_batches
+        try:
+            while batches:
+                if self._commit_min_interval and \
+                        self._last_commit_time is not None:
+                    delay = self._last_commit_time + \
+                        self._commit_min_interval - self._loop.time()
+                    if delay > 0 and not any(b.urgent for b in batches):
+                        # Urgent commits wake us up
+                        self._commit_wakeup = create_future(loop=self._loop)
+                        try:
+                            await asyncio.wait(
+                                [self._commit_wakeup], timeout=delay,
+                                loop=self._loop)
+                        finally:
+                            self._commit_wakeup = None
+                batch = self._commit_in_flight = batches.popleft()
+                try:
+                    await self._commit_offsets_with_retry(
+                        batch.assignment, batch.offsets, batch)
+                except asyncio.CancelledError:
+                    batch.future.cancel()
+                    raise
+                except Exception as exc:
+                    batch.future.set_exception(exc)
+                    # Callers may be gone, don't warn about it
+                    batch.future.exception()
+                else:
+                    batch.future.set_result(None)
+                finally:
+                    self._commit_in_flight = None
+                    self._last_commit_time = self._loop.time()
+        except asyncio.CancelledError:
+            while batches:
+                batches.popleft().future.cancel()
+            raise
+        finally:
+            self._commit_task = None
+
+    async def _stop_commit_task(self):
+        task = self._commit_task
+        if task is None:
+            return
+        # Commits not sent yet will not be, as the client is closing
+        batches = list(self._commit_batches)
+        self._commit_batches.clear()
+        if self._commit_in_flight is not None:
+            batches.append(self._commit_in_flight)
+        for batch in batches:
+            if not batch.future.done():
+                batch.future.set_exception(Errors.ConsumerStoppedError())
+                batch.future.exception()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _commit_offsets_with_retry(self, assignment, offsets,
+                                         batch=None):
         while True:
             await self.ensure_coordinator_known()
             try:
@@ -970,6 +1269,9 @@ class GroupCoordinator(BaseCoordinator):
             except Errors.KafkaError as err:
                 if not err.retriable:
                     raise err
+                elif batch is not None and not batch.waiters:
+                    # All callers were cancelled, no one needs the result
+                    raise err
                 else:
                     # wait backoff and try again
                     await asyncio.sleep(
@@ -984,19 +1286,37 @@ class GroupCoordinator(BaseCoordinator):
 
         # create the offset commit request
         offset_data = collections.defaultdict(list)
-        for tp, offset in offsets.items():
-            offset_data[tp.topic].append(
-                (tp.partition,
-                 offset.offset,
-                 offset.metadata))
+        if self.group_instance_id is not None:
+            for tp, offset in offsets.items():
+                offset_data[tp.topic].append(
+                    (tp.partition,
+                     offset.offset,
+                     OffsetCommitRequest_v7.NO_LEADER_EPOCH,
+                     offset.metadata))
+
+            request = OffsetCommitRequest_v7(
+                self.group_id,
+                self.generation,
+                self.member_id,
+                self.group_instance_id,
+                [(topic, tp_offsets)
+                 for topic, tp_offsets in offset_data.items()]
+            )
+        else:
+            for tp, offset in offsets.items():
+                offset_data[tp.topic].append(
+                    (tp.partition,
+                     offset.offset,
+                     offset.metadata))
 
-        request = OffsetCommitRequest(
-            self.group_id,
-            self.generation,
-            self.member_id,
-            OffsetCommitRequest.DEFAULT_RETENTION_TIME,
-            [(topic, tp_offsets) for topic, tp_offsets in offset_data.items()]
-        )
+            request = OffsetCommitRequest(
+                self.group_id,
+                self.generation,
+                self.member_id,
+                OffsetCommitRequest.DEFAULT_RETENTION_TIME,
+                [(topic, tp_offsets)
+                 for topic, tp_offsets in offset_data.items()]
+            )
 
         log.debug("Sending offset-commit request with %s for group %s to %s",
                   offsets, self.group_id, self.coordinator_id)
@@ -1013,6 +1333,9 @@ class GroupCoordinator(BaseCoordinator):
                 if error_type is Errors.NoError:
                     log.debug(
                         "Committed offset %s for partition %s", offset, tp)
+                    tp_state = assignment.state_value(tp)
+                    if tp_state is not None:
+                        tp_state.update_committed(offset)
                 elif error_type is Errors.GroupAuthorizationFailedError:
                     log.error("OffsetCommit failed for group %s - %s",
                               self.group_id, error_type.__name__)
@@ -1061,6 +1384,12 @@ class GroupCoordinator(BaseCoordinator):
                         "OffsetCommit failed for group %s due to group"
                         " error (%s), will rejoin", self.group_id, error)
                     errored[tp] = error
+                elif error_type is Errors.FencedInstanceId:
+                    log.error(
+                        "OffsetCommit failed for group %s: static member %s"
+                        " was fenced by another instance", self.group_id,
+                        self.group_instance_id)
+                    errored[tp] = error_type(self.group_instance_id)
 
                 else:
                     log.error(
@@ -1193,6 +1522,17 @@ class CoordinatorGroupRebalance:
         self._api_version = self._coordinator._client.api_version
         self._rebalance_timeout_ms = self._coordinator._rebalance_timeout_ms
 
+    def _partition_stats(self):
+        # Consumption rate and lag of partitions we consumed so far
+        assignment = self._subscription.assignment
+        if assignment is None:
+            return {}
+        stats = {}
+        for tp in assignment.tps:
+            tp_state = assignment.state_value(tp)
+            stats[tp] = (tp_state.consumption_rate(), tp_state.lag)
+        return stats
+
     async def perform_group_join(self):
         """Join the group and return the assignment for the next generation.
 
@@ -1205,15 +1545,42 @@ class CoordinatorGroupRebalance:
         log.info("(Re-)joining group %s", self.group_id)
 
         topics = self._subscription.topics
+        owned_partitions = None
+        if self._coordinator._cooperative:
+            # Let the leader know which partitions we keep consuming
+            assignment = self._subscription.assignment
+            if assignment is not None and \
+                    not self._subscription._reassignment_in_progress:
+                owned_partitions = assignment.tps
+            else:
+                owned_partitions = ()
+        previous_assignment, generation = self._coordinator._last_assignment
+        member = MemberState(
+            previous_assignment, generation, self._coordinator.client_rack,
+            self._partition_stats())
         metadata_list = []
         for assignor in self._assignors:
-            metadata = assignor.metadata(topics)
-            if not isinstance(metadata, bytes):
+            if hasattr(assignor, "member_metadata"):
+                metadata = assignor.member_metadata(topics, member)
+            else:
+                metadata = assignor.metadata(topics)
+            if owned_partitions is not None:
+                metadata = encode_member_metadata(metadata, owned_partitions)
+            elif not isinstance(metadata, bytes):
                 metadata = metadata.encode()
             group_protocol = (assignor.name, metadata)
             metadata_list.append(group_protocol)
 
-        if self._api_version < (0, 10, 1):
+        if self._coordinator.group_instance_id is not None:
+            request = JoinGroupRequest_v5(
+                self.group_id,
+                self._session_timeout_ms,
+                self._rebalance_timeout_ms,
+                self._coordinator.member_id,
+                self._coordinator.group_instance_id,
+                ConsumerProtocol.PROTOCOL_TYPE,
+                metadata_list)
+        elif self._api_version < (0, 10, 1):
             request = JoinGroupRequest[0](
                 self.group_id,
                 self._session_timeout_ms,
@@ -1283,6 +1650,12 @@ class CoordinatorGroupRebalance:
             log.debug(
                 "Attempt to join group %s failed due to unknown member id",
                 self.group_id)
+        elif error_type is Errors.MemberIdRequired:
+            # Broker assigned us a member id, retry immediately with it
+            self._coordinator.member_id = response.member_id
+            log.debug(
+                "Attempt to join group %s requires a member id, rejoining"
+                " with %s", self.group_id, response.member_id)
         elif error_type in (Errors.GroupCoordinatorNotAvailableError,
                             Errors.NotCoordinatorForGroupError):
             # Coordinator changed we should be able to find it immediately
@@ -1298,6 +1671,12 @@ class CoordinatorGroupRebalance:
             log.error(
                 "Attempt to join group failed due to fatal error: %s", err)
             raise err
+        elif error_type is Errors.FencedInstanceId:
+            log.error(
+                "Attempt to join group %s failed: static member %s was"
+                " fenced by another instance", self.group_id,
+                self._coordinator.group_instance_id)
+            raise error_type(self._coordinator.group_instance_id)
         elif error_type is Errors.GroupAuthorizationFailedError:
             raise error_type(self.group_id)
         else:
@@ -1308,14 +1687,24 @@ class CoordinatorGroupRebalance:
             raise Errors.KafkaError(repr(err))
         return None
 
-    async def _on_join_follower(self):
-        # send follower's sync group with an empty assignment
+    def _sync_group_request(self, group_assignment):
+        if self._coordinator.group_instance_id is not None:
+            return SyncGroupRequest_v3(
+                self.group_id,
+                self._coordinator.generation,
+                self._coordinator.member_id,
+                self._coordinator.group_instance_id,
+                group_assignment)
         version = 0 if self._api_version < (0, 11, 0) else 1
-        request = SyncGroupRequest[version](
+        return SyncGroupRequest[version](
             self.group_id,
             self._coordinator.generation,
             self._coordinator.member_id,
-            [])
+            group_assignment)
+
+    async def _on_join_follower(self):
+        # send follower's sync group with an empty assignment
+        request = self._sync_group_request([])
         log.debug(
             "Sending follower SyncGroup for group %s to coordinator %s: %s",
             self.group_id, self.coordinator_id, request)
@@ -1332,12 +1721,14 @@ class CoordinatorGroupRebalance:
         Returns:
             Future: resolves to member assignment encoded-bytes
         """
+        # Version 5+ responses also include `group_instance_id` of members
+        members = [(member[0], member[-1]) for member in response.members]
         try:
             group_assignment = \
                 await self._coordinator._perform_assignment(
                     response.leader_id,
                     response.group_protocol,
-                    response.members)
+                    members)
         except Exception as e:
             raise Errors.KafkaError(repr(e))
 
@@ -1347,12 +1738,7 @@ class CoordinatorGroupRebalance:
                 assignment = assignment.encode()
             assignment_req.append((member_id, assignment))
 
-        version = 0 if self._api_version < (0, 11, 0) else 1
-        request = SyncGroupRequest[version](
-            self.group_id,
-            self._coordinator.generation,
-            self._coordinator.member_id,
-            assignment_req)
+        request = self._sync_group_request(assignment_req)
 
         log.debug(
             "Sending leader SyncGroup for group %s to coordinator %s: %s",
@@ -1396,6 +1782,12 @@ class CoordinatorGroupRebalance:
             log.debug("SyncGroup for group %s failed due to %s",
                       self.group_id, err)
             self._coordinator.coordinator_dead()
+        elif error_type is Errors.FencedInstanceId:
+            log.error(
+                "SyncGroup for group %s failed: static member %s was fenced"
+                " by another instance", self.group_id,
+                self._coordinator.group_instance_id)
+            raise error_type(self._coordinator.group_instance_id)
         elif error_type is Errors.GroupAuthorizationFailedError:
             raise error_type(self.group_id)
         else:
@@ -0,0 +1,266 @@
+import asyncio
+import collections
+import logging
+import sys
+
+from aiokafka.abc import ConsumerRebalanceListener
+from aiokafka.errors import ConsumerStoppedError, KafkaError
+from aiokafka.structs import TopicPartition
+from aiokafka.util import create_future, ensure_future
+
+log = logging.getLogger(__name__)
+
+
+class ConsumerRunner:
+    """ Feeds records returned by the Consumer to a handler coroutine.
+
+    Records of each partition are processed in order by a separate task, while
+    up to `concurrency` partitions are processed in parallel. With
+    `key_affinity` records are instead routed by key hash to `concurrency`
+    tasks, keeping the order only per key. Records are acknowledged once
+    handled, so commits never include records that were not processed yet
+    (see ``max_unacked_offsets`` option of the Consumer).
+
+    Fetching from a partition is paused while `max_queued_records` records of
+    it wait for processing and resumed once half of them are processed.
+
+    Before partitions are revoked by a group rebalance queued records of those
+    are processed and offsets committed.
+    """
+
+    def __init__(self, consumer, handler, *, concurrency, max_queued_records,
+                 key_affinity=False, loop):
+        self._consumer = consumer
+        self._handler = handler
+        self._concurrency = concurrency
+        self._max_queued_records = max_queued_records
+        self._key_affinity = key_affinity
+        self._loop = loop
+
+        self._semaphore = asyncio.Semaphore(concurrency, loop=loop)
+        # TopicPartition or key slot -> _Worker
+        self._workers = {}
+        # Number of records per partition queued or being processed
+        self._queued = collections.Counter()
+        self._drain_waiters = {}  # TopicPartition -> Future
+        self._revoking = set()
+        self._paused = set()
+        self._failed = create_future(loop=loop)
+
+    async def run(self):
+        consumer = self._consumer
+        subscription = consumer._subscription
+        # Acknowledgements are required to commit only processed records
+        max_unacked_offsets = consumer._max_unacked_offsets
+        if max_unacked_offsets is None:
+            consumer._max_unacked_offsets = sys.maxsize
+        listener = subscription._listener
+        subscription._listener = _RunnerRebalanceListener(self, listener)
+
+        getter = None
+        try:
+            while True:
+                # Timeout only limits how long unassigned partitions keep
+                # their workers
+                getter = ensure_future(
+                    consumer.getmany(timeout_ms=1000), loop=self._loop)
+                await asyncio.wait(
+                    [getter, self._failed], loop=self._loop,
+                    return_when=asyncio.FIRST_COMPLETED)
+                if self._failed.done():
+                    raise self._failed.exception()
+                try:
+                    data = getter.result()
+                except ConsumerStoppedError:
+                    return
+                self._dispatch(data)
+        finally:
+            if getter is not None and not getter.done():
+                getter.cancel()
+            workers = list(self._workers.values())
+            self._workers.clear()
+            for worker in workers:
+                worker.task.cancel()
+            if workers:
+                await asyncio.wait(
+                    [worker.task for worker in workers], loop=self._loop)
+
+            assigned = consumer.assignment()
+            consumer.resume(*(self._paused & assigned))
+            self._paused.clear()
+            self._rewind_unacked()
+            subscription._listener = listener
+            consumer._max_unacked_offsets = max_unacked_offsets
+
+    def _rewind_unacked(self):
+        # Records, that were not processed, will be fetched again. Otherwise
+        # they would block commits after the runner is gone.
+        subscription = self._consumer._subscription.subscription
+        if subscription is None or subscription.assignment is None:
+            return
+        assignment = subscription.assignment
+        for tp in assignment.tps:
+            tp_state = assignment.state_value(tp)
+            if not tp_state.has_valid_position:
+                continue
+            offset = tp_state.committable_offset
+            if offset != tp_state.position:
+                self._consumer._fetcher.seek_to(tp, offset)
+            else:
+                tp_state._reset_acks()
+
+    def _dispatch(self, data):
+        # Stop processing partitions, that were assigned elsewhere without
+        # revoking (like manual assignment changes). Records of those will
+        # not be acknowledged anyway.
+        assigned = self._consumer.assignment()
+        for tp in list(self._queued):
+            if tp not in assigned:
+                worker = self._workers.pop(tp, None)
+                if worker is not None:
+                    worker.task.cancel()
+                self._queued.pop(tp)
+                self._notify_drained(tp)
+        self._paused &= assigned
+
+        workers = self._workers
+        concurrency = self._concurrency
+        for tp, records in data.items():
+            if not records or tp in self._revoking:
+                continue
+            if self._key_affinity:
+                for record in records:
+                    slot = hash(record.key) % concurrency
+                    worker = workers.get(slot)
+                    if worker is None:
+                        worker = workers[slot] = _Worker(self, loop=self._loop)
+                    worker.feed((record,))
+            else:
+                worker = workers.get(tp)
+                if worker is None:
+                    worker = workers[tp] = _Worker(self, loop=self._loop)
+                worker.feed(records)
+            self._queued[tp] += len(records)
+            if self._queued[tp] >= self._max_queued_records:
+                self._consumer.pause(tp)
+                self._paused.add(tp)
+
+    def _processed(self, record):
+        self._consumer.ack(record)
+        tp = TopicPartition(record.topic, record.partition)
+        queued = self._queued.get(tp)
+        if queued is None:
+            return
+        if queued > 1:
+            self._queued[tp] = queued - 1
+        else:
+            del self._queued[tp]
+            self._notify_drained(tp)
+        if tp in self._paused and queued <= self._max_queued_records // 2:
+            self._paused.discard(tp)
+            if self._consumer._subscription.is_assigned(tp):
+                self._consumer.resume(tp)
+
+    def _notify_drained(self, tp):
+        waiter = self._drain_waiters.pop(tp, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def _worker_done(self, task):
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None and not self._failed.done():
+            self._failed.set_exception(exc)
+
+    async def _drain(self, revoked):
+        self._revoking.update(revoked)
+        try:
+            waiters = []
+            for tp in revoked:
+                if tp in self._queued:
+                    waiter = self._drain_waiters.get(tp)
+                    if waiter is None:
+                        waiter = self._drain_waiters[tp] = create_future(
+                            loop=self._loop)
+                    waiters.append(waiter)
+            if waiters:
+                # Processing stops on handler errors
+                await asyncio.wait(
+                    [asyncio.gather(*waiters, loop=self._loop), self._failed],
+                    loop=self._loop, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self._revoking.difference_update(revoked)
+        self._paused.difference_update(revoked)
+        for tp in revoked:
+            worker = self._workers.pop(tp, None)
+            if worker is not None:
+                worker.task.cancel()
+
+        consumer = self._consumer
+        if consumer._group_id is None:
+            return
+        assignment = consumer._subscription.subscription.assignment
+        offsets = {
+            tp: offset
+            for tp, offset in assignment.all_consumed_offsets().items()
+            if tp in revoked
+        }
+        if offsets:
+            try:
+                await consumer.commit(offsets)
+            except KafkaError as err:
+                log.error(
+                    "OffsetCommit failed before revoking partitions, "
+                    "ignoring: %s", err)
+
+
+class _Worker:
+    """ Handles queued records one at a time, in order. """
+
+    def __init__(self, runner, *, loop):
+        self.queue = collections.deque()
+        self._runner = runner
+        self._has_records = asyncio.Event(loop=loop)
+        self.task = ensure_future(self._process(), loop=loop)
+        self.task.add_done_callback(runner._worker_done)
+
+    def feed(self, records):
+        self.queue.extend(records)
+        self._has_records.set()
+
+    async def _process(self):
+        runner = self._runner
+        queue = self.queue
+        while True:
+            if not queue:
+                self._has_records.clear()
+                await self._has_records.wait()
+                continue
+            record = queue.popleft()
+            async with runner._semaphore:
+                await runner._handler(record)
+            runner._processed(record)
+
+
+class _RunnerRebalanceListener(ConsumerRebalanceListener):
+    """ Processes queued records of revoked partitions before the user's
+    listener is called.
+    """
+
+    def __init__(self, runner, listener):
+        self._runner = runner
+        self._listener = listener
+
+    async def on_partitions_revoked(self, revoked):
+        await self._runner._drain(revoked)
+        if self._listener is not None:
+            res = self._listener.on_partitions_revoked(revoked)
+            if asyncio.iscoroutine(res):
+                await res
+
+    async def on_partitions_assigned(self, assigned):
+        if self._listener is not None:
+            res = self._listener.on_partitions_assigned(assigned)
+            if asyncio.iscoroutine(res):
+                await res
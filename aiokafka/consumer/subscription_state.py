@@ -206,8 +206,11 @@ class SubscriptionState:
         assert self._subscription_type == SubscriptionType.AUTO_PATTERN
         self._change_subscription(Subscription(topics, loop=self._loop))
 
-    def assign_from_subscribed(self, assignment: Set[TopicPartition]):
-        """ Set assignment if automatic assignment is used.
+    def assign_from_subscribed(self, assignment: Set[TopicPartition],
+                               incremental: bool = False):
+        """ Set assignment if automatic assignment is used. If `incremental`
+        partitions, that were assigned before, keep their state (position,
+        pause, etc.).
 
         Caller: Coordinator
         Affects: SubscriptionState.subscription.assignment
@@ -215,7 +218,7 @@ class SubscriptionState:
         assert self._subscription_type in [
             SubscriptionType.AUTO_PATTERN, SubscriptionType.AUTO_TOPICS]
 
-        self._subscription._assign(assignment)
+        self._subscription._assign(assignment, incremental)
         self._notify_assignment_waiters()
 
     def begin_reassignment(self):
@@ -335,15 +338,18 @@ class Subscription:
     def assignment(self):
         return self._assignment
 
-    def _assign(self, topic_partitions: Set[TopicPartition]):
+    def _assign(self, topic_partitions: Set[TopicPartition],
+                incremental: bool = False):
         for tp in topic_partitions:
             assert tp.topic in self._topics, \
                 "Received an assignment for unsubscribed topic: %s" % (tp, )
 
-        if self._assignment is not None:
-            self._assignment._unassign()
-
-        self._assignment = Assignment(topic_partitions, loop=self._loop)
+        previous = self._assignment
+        self._assignment = Assignment(
+            topic_partitions, loop=self._loop,
+            previous=previous if incremental else None)
+        if previous is not None:
+            previous._unassign()
         self._reassignment_in_progress = False
 
     def _unsubscribe(self):
@@ -370,7 +376,8 @@ class ManualSubscription(Subscription):
         self.unsubscribe_future = create_future(loop)
 
     def _assign(
-            self, topic_partitions: Set[TopicPartition]):  # pragma: no cover
+            self, topic_partitions: Set[TopicPartition],
+            incremental: bool = False):  # pragma: no cover
         assert False, "Should not be called"
 
     @property
@@ -385,24 +392,36 @@ class Assignment:
     """ Describes current partition assignment. New instance will be created
     on each group rebalance if automatic assignment is used.
 
+    If `previous` assignment is passed (incremental rebalance), partitions
+    present in both take over the state from it.
+
     States:
         * Assigned
         * Unassigned
     """
 
-    def __init__(self, topic_partitions: Set[TopicPartition], *, loop):
+    def __init__(self, topic_partitions: Set[TopicPartition], *, loop,
+                 previous: "Assignment" = None):
         assert isinstance(topic_partitions, (list, set, tuple))
 
         self._topic_partitions = frozenset(topic_partitions)
-
-        self._tp_state = {}  # type: Dict[TopicPartition, TopicPartitionState]
-        for tp in self._topic_partitions:
-            self._tp_state[tp] = TopicPartitionState(self, loop=loop)
-
         self._loop = loop
         self.unassign_future = create_future(loop)
         self.commit_refresh_needed = Event(loop=loop)
 
+        self._tp_state = {}  # type: Dict[TopicPartition, TopicPartitionState]
+        for tp in self._topic_partitions:
+            tp_state = None
+            if previous is not None:
+                tp_state = previous.state_value(tp)
+            if tp_state is not None:
+                tp_state._assignment = self
+                if tp_state._committed_futs:
+                    self.commit_refresh_needed.set()
+            else:
+                tp_state = TopicPartitionState(self, loop=loop)
+            self._tp_state[tp] = tp_state
+
     @property
     def tps(self):
         return self._topic_partitions
@@ -423,7 +442,8 @@ class Assignment:
         for tp in self._topic_partitions:
             state = self.state_value(tp)
             if state.has_valid_position:
-                all_consumed[tp] = OffsetAndMetadata(state.position, '')
+                all_consumed[tp] = OffsetAndMetadata(
+                    state.committable_offset, '')
         return all_consumed
 
     def requesting_committed(self):
@@ -460,12 +480,17 @@ class TopicPartitionState(object):
     def __init__(self, assignment, *, loop):
         # Synchronized values
         self._committed_futs = []
+        # Last committed offset known to the Coordinator, None if unknown
+        self.last_committed = None  # type: OffsetAndMetadata
 
         self.highwater = None  # Last fetched highwater mark
         self.lso = None  # Last fetched stable offset mark
         self.timestamp = None  # timestamp of last poll
         self._position = None  # The current position of the topic
         self._position_fut = create_future(loop=loop)
+        # Position and time it was set by a reset or seek. Used to estimate
+        # the consumption rate.
+        self._rate_start = None
 
         # Will be set by `seek_to_beginning` or `seek_to_end` if called by user
         # or by Fetcher after confirming that current position is no longer
@@ -479,6 +504,19 @@ class TopicPartitionState(object):
         self._paused = False
         self._resume_fut = None
 
+        # Records handed out to the user, that were not acknowledged yet.
+        # Only used if the Consumer tracks acknowledgements.
+        self._acks = None  # type: AckTracker
+        self._acks_fut = None
+
+    @property
+    def assignment(self) -> Assignment:
+        """ Assignment this partition currently belongs to. Will point to a
+        newer assignment if the partition was kept after an incremental
+        rebalance.
+        """
+        return self._assignment
+
     @property
     def paused(self):
         return self._paused
@@ -510,6 +548,7 @@ class TopicPartitionState(object):
         """
         self._reset_strategy = strategy
         self._position = None
+        self._reset_acks()
         if self._position_fut.done():
             self._position_fut = create_future(loop=self._loop)
         self._status = PartitionStatus.AWAITING_RESET
@@ -525,6 +564,7 @@ class TopicPartitionState(object):
     def update_committed(self, offset_meta: OffsetAndMetadata):
         """ Called by Coordinator on successful commit to update commit cache.
         """
+        self.last_committed = offset_meta
         for fut in self._committed_futs:
             if not fut.done():
                 fut.set_result(offset_meta)
@@ -544,6 +584,8 @@ class TopicPartitionState(object):
         """
         assert self._status == PartitionStatus.AWAITING_RESET
         self._position = position
+        self._rate_start = (position, self._loop.time())
+        self._reset_acks()
         self._reset_strategy = None
         self._status = PartitionStatus.CONSUMING
         if not self._position_fut.done():
@@ -553,6 +595,8 @@ class TopicPartitionState(object):
         """ Called by Consumer to force position to a specific offset
         """
         self._position = position
+        self._rate_start = (position, self._loop.time())
+        self._reset_acks()
         self._reset_strategy = None
         self._status = PartitionStatus.CONSUMING
         if not self._position_fut.done():
@@ -561,6 +605,76 @@ class TopicPartitionState(object):
     def wait_for_position(self):
         return shield(self._position_fut, loop=self._loop)
 
+    def consumption_rate(self):
+        """ Average number of offsets consumed per second since the position
+        was last reset or set by the user. None if not known yet.
+        """
+        if self._rate_start is None or self._position is None:
+            return None
+        start_position, start_time = self._rate_start
+        elapsed = self._loop.time() - start_time
+        if elapsed <= 0:
+            return None
+        return max(self._position - start_position, 0) / elapsed
+
+    @property
+    def lag(self):
+        """ Number of offsets between the position and the last fetched
+        highwater mark. None if not known yet.
+        """
+        if self._position is None or self.highwater is None:
+            return None
+        return max(self.highwater - self._position, 0)
+
+    # Acknowledgements
+
+    @property
+    def committable_offset(self) -> int:
+        """ Lowest offset handed out to the user and not acknowledged yet, or
+        the position if all records were acknowledged.
+        """
+        acks = self._acks
+        if acks is not None and acks.outstanding:
+            return acks.lowest_outstanding
+        return self.position
+
+    @property
+    def acks_fut(self):
+        """ Resolved once the window of unacknowledged offsets is no longer
+        full. None if it's not full.
+        """
+        return self._acks_fut
+
+    def delivered(self, offsets, max_unacked_offsets: int):
+        """ Called by Consumer when handing out records, that have to be
+        acknowledged before they can be committed.
+        """
+        acks = self._acks
+        if acks is None:
+            acks = self._acks = AckTracker(max_unacked_offsets)
+        acks.delivered(offsets)
+        if acks.full and self._acks_fut is None:
+            self._acks_fut = create_future(loop=self._loop)
+
+    def ack(self, offset: int) -> bool:
+        """ Called by Consumer when the user acknowledges a record. Returns
+        False if the offset was not outstanding.
+        """
+        acks = self._acks
+        if acks is None or not acks.ack(offset):
+            return False
+        if self._acks_fut is not None and not acks.full:
+            self._acks_fut.set_result(None)
+            self._acks_fut = None
+        return True
+
+    def _reset_acks(self):
+        # Records before a position change will be fetched again
+        self._acks = None
+        if self._acks_fut is not None:
+            self._acks_fut.set_result(None)
+            self._acks_fut = None
+
     # Pause/Unpause
     def pause(self):
         if not self._paused:
@@ -577,3 +691,90 @@ class TopicPartitionState(object):
     def __repr__(self):
         return "TopicPartitionState<Status={} position={}>".format(
             self._status, self._position)
+
+
+class AckTracker:
+    """ Tracks offsets handed out to the user, so they can be acknowledged in
+    any order, while only the lowest outstanding offset is committed.
+
+    Keeps one byte per offset from the lowest outstanding offset up to the
+    last delivered one. Offsets that were never delivered (compacted or
+    control records) don't need an acknowledgement.
+    """
+
+    __slots__ = ("_max_window", "_base", "_pending", "_end", "_outstanding")
+
+    def __init__(self, max_window: int):
+        self._max_window = max_window
+        self._base = 0  # Offset of the first byte in `_pending`
+        self._pending = bytearray()
+        self._end = 0  # Next offset after the last delivered
+        self._outstanding = 0
+
+    @property
+    def outstanding(self) -> int:
+        """ Number of records not acknowledged yet """
+        return self._outstanding
+
+    @property
+    def lowest_outstanding(self) -> int:
+        assert self._outstanding
+        return self._base
+
+    @property
+    def window(self) -> int:
+        """ Number of offsets from the lowest outstanding one up to the last
+        delivered. That many offsets would be consumed again after a restart.
+        """
+        if not self._outstanding:
+            return 0
+        return self._end - self._base
+
+    @property
+    def full(self) -> bool:
+        return self.window >= self._max_window
+
+    def delivered(self, offsets: List[int]):
+        """ Register offsets handed out to the user. Must be sorted and above
+        all offsets delivered before.
+        """
+        if not offsets:
+            return
+        first = offsets[0]
+        last = offsets[-1]
+        assert first >= self._end, (first, self._end)
+        pending = self._pending
+        if not self._outstanding:
+            self._base = first
+            pending.clear()
+        else:
+            pending.extend(bytes(first - self._end))
+        if last - first + 1 == len(offsets):
+            pending.extend(b"\x01" * len(offsets))
+        else:
+            base = self._base
+            pending.extend(bytes(last - first + 1))
+            for offset in offsets:
+                pending[offset - base] = 1
+        self._end = last + 1
+        self._outstanding += len(offsets)
+
+    def ack(self, offset: int) -> bool:
+        """ Acknowledge a delivered offset. Returns False if it was not
+        outstanding.
+        """
+        index = offset - self._base
+        pending = self._pending
+        if index < 0 or index >= len(pending) or not pending[index]:
+            return False
+        pending[index] = 0
+        self._outstanding -= 1
+        if not self._outstanding:
+            pending.clear()
+            self._base = self._end
+        elif index == 0:
+            # Drop the acknowledged prefix
+            index = pending.find(1)
+            del pending[:index]
+            self._base += index
+        return True
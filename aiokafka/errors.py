@@ -413,6 +413,25 @@ class ListenerNotFound(BrokerResponseError):
     )
 
 
+class MemberIdRequired(BrokerResponseError):
+    errno = 79
+    message = 'MEMBER_ID_REQUIRED'
+    description = (
+        'The group member needs to have a valid member id before actually'
+        ' entering a consumer group'
+    )
+
+
+class FencedInstanceId(BrokerResponseError):
+    errno = 82
+    message = 'FENCED_INSTANCE_ID'
+    description = (
+        'The broker rejected this static consumer since another consumer'
+        ' with the same group.instance.id has registered with a different'
+        ' member.id'
+    )
+
+
 def _iter_broker_errors():
     for name, obj in inspect.getmembers(sys.modules[__name__]):
         if inspect.isclass(obj) and issubclass(obj, BrokerResponseError) and \
@@ -1,13 +1,16 @@
 import asyncio
 import collections
 import copy
+import struct
 
 from aiokafka.errors import (KafkaTimeoutError,
                              NotLeaderForPartitionError,
                              LeaderNotAvailableError,
                              ProducerClosed)
 from aiokafka.record.legacy_records import LegacyRecordBatchBuilder
-from aiokafka.record.default_records import DefaultRecordBatchBuilder
+from aiokafka.record.default_records import (
+    DefaultRecordBase, DefaultRecordBatchBuilder)
+from aiokafka.record.util import calc_crc32c
 from aiokafka.structs import RecordMetadata
 from aiokafka.util import create_future
 
@@ -99,6 +102,91 @@ class BatchBuilder:
         return self._relative_offset
 
 
+class RawBatchBuilder(DefaultRecordBase):
+    """Wraps an already encoded v2 record batch to be enqueued in the same way
+    as a BatchBuilder.
+
+    Records data is never decoded or recompressed. Only the header fields
+    depending on the producer (base offset, partition leader epoch,
+    transactional flag and producer id/epoch/sequence) are rewritten on
+    build, after which the CRC is recalculated.
+    """
+
+    PRODUCER_STATE_STRUCT = struct.Struct(">qhi")
+    PRODUCER_ID_OFFSET = struct.calcsize(">qiibIhiqq")
+    PARTITION_LEADER_EPOCH_OFFSET = struct.calcsize(">qi")
+
+    def __init__(self, buffer, *, is_transactional):
+        # Copy, as we patch the header in place
+        buffer = bytearray(buffer)
+        if len(buffer) < self.HEADER_STRUCT.size:
+            raise ValueError("Buffer is too small to contain a record batch")
+        (_, length, _, magic, _, attributes, _, _, _, _, _, _,
+         num_records) = self.HEADER_STRUCT.unpack_from(buffer)
+        if magic != 2:
+            raise ValueError(
+                "Only message format v2 batches are supported, got"
+                " magic={}".format(magic))
+        if length != len(buffer) - self.AFTER_LEN_OFFSET:
+            raise ValueError(
+                "Batch length {} does not match buffer size {}".format(
+                    length, len(buffer) - self.AFTER_LEN_OFFSET))
+        if attributes & self.CONTROL_MASK:
+            raise ValueError("Control batches can not be produced")
+
+        # Produced batches are always in CreateTime and can only be
+        # transactional if the producer is.
+        attributes &= ~(self.TRANSACTIONAL_MASK | self.TIMESTAMP_TYPE_MASK)
+        if is_transactional:
+            attributes |= self.TRANSACTIONAL_MASK
+
+        self._buffer = buffer
+        self._attributes = attributes
+        self._num_records = num_records
+        self._producer_id = -1
+        self._producer_epoch = -1
+        self._base_sequence = 0
+        self._built = False
+
+    def append(self, *, timestamp, key, value, headers=[]):
+        # Raw batches are always closed to further updates
+        return None
+
+    def close(self):
+        pass
+
+    def _set_producer_state(self, producer_id, producer_epoch, base_sequence):
+        assert not self._built
+        self._producer_id = producer_id
+        self._producer_epoch = producer_epoch
+        self._base_sequence = base_sequence
+
+    def _build(self):
+        buffer = self._buffer
+        if not self._built:
+            struct.pack_into(">q", buffer, 0, 0)  # BaseOffset, set by broker
+            struct.pack_into(
+                ">i", buffer, self.PARTITION_LEADER_EPOCH_OFFSET,
+                self.NO_PARTITION_LEADER_EPOCH)
+            struct.pack_into(
+                ">h", buffer, self.ATTRIBUTES_OFFSET, self._attributes)
+            self.PRODUCER_STATE_STRUCT.pack_into(
+                buffer, self.PRODUCER_ID_OFFSET, self._producer_id,
+                self._producer_epoch, self._base_sequence)
+            crc = calc_crc32c(memoryview(buffer)[self.ATTRIBUTES_OFFSET:])
+            struct.pack_into(">I", buffer, self.CRC_OFFSET, crc)
+            self._built = True
+        return buffer
+
+    def size(self):
+        """Get the size of batch in bytes."""
+        return len(self._buffer)
+
+    def record_count(self):
+        """Get the number of records in the batch."""
+        return self._num_records
+
+
 class MessageBatch:
     """This class incapsulate operations with batch of produce messages"""
 
@@ -437,6 +525,13 @@ class MessageAccumulator:
             magic, self._batch_size, self._compression_type,
             is_transactional=is_transactional)
 
+    def create_raw_builder(self, buffer):
+        is_transactional = False
+        if self._txn_manager is not None and \
+                self._txn_manager.transactional_id is not None:
+            is_transactional = True
+        return RawBatchBuilder(buffer, is_transactional=is_transactional)
+
     def _append_batch(self, builder, tp):
         # We must do this before actual add takes place to check for errors.
         if self._txn_manager is not None:
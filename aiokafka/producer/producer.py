@@ -56,6 +56,12 @@ class AIOKafkaProducer(object):
             server-side log entries that correspond to this client.
             Default: 'aiokafka-producer-#' (appended with a unique number
             per instance)
+        client (AIOKafkaClient): a client shared with other producers and
+            consumers, so they use the same connections and metadata. The
+            client is bootstrapped by the first one to start and closed when
+            all of them are stopped. Connection related options of this
+            producer, like ``bootstrap_servers``, are ignored if passed.
+            Default: None
         key_serializer (callable): used to convert user-supplied keys to bytes
             If not None, called as f(key), should return bytes. Default: None.
         value_serializer (callable): used to convert user-supplied message
@@ -121,6 +127,12 @@ class AIOKafkaProducer(object):
             which we force a refresh of metadata even if we haven't seen any
             partition leadership changes to proactively discover any new
             brokers or partitions. Default: 300000
+        metadata_max_idle_ms (int): Stop tracking metadata of topics, that
+            were not sent to for this number of milliseconds. Idle topics
+            are dropped from periodic metadata updates, so those don't grow
+            with every topic the producer ever sent to. Metadata is fetched
+            again on the next send to the topic. If `None` topics are never
+            dropped. Default: None
         request_timeout_ms (int): Produce request timeout in milliseconds.
             As it's sent as part of ProduceRequest (it's a blocking call),
             maximum waiting time can be up to 2 * request_timeout_ms.
@@ -139,6 +151,18 @@ class AIOKafkaProducer(object):
         connections_max_idle_ms (int): Close idle connections after the number
             of milliseconds specified by this config. Specifying `None` will
             disable idle checks. Default: 540000 (9 minutes).
+        reconnect_backoff_ms (int): Milliseconds to wait before reconnecting
+            to a broker after a failed connection attempt. Default: 50.
+        reconnect_backoff_max_ms (int): The reconnect backoff doubles on
+            each consecutive failure up to this number of milliseconds.
+            Default: 1000.
+        warm_up_connections (bool): If ``True``, connections to all brokers
+            of the cluster are opened in parallel during :meth:`start`,
+            instead of on first send. Default: False
+        metadata_cache_path (str): path of a file to cache the broker API
+            version and cluster layout in, so following starts don't wait
+            for version probing and a metadata response. Cached data is
+            verified and refreshed in the background. Default: None
         enable_idempotence (bool): When set to ``True``, the producer will
             ensure that exactly one copy of each message is written in the
             stream. If ``False``, producer retries due to broker failures,
@@ -173,6 +197,7 @@ class AIOKafkaProducer(object):
     def __init__(self, *, loop=None, bootstrap_servers='localhost',
                  client_id=None,
                  metadata_max_age_ms=300000, request_timeout_ms=40000,
+                 metadata_max_idle_ms=None,
                  api_version='auto', acks=_missing,
                  key_serializer=None, value_serializer=None,
                  compression_type=None, max_batch_size=16384,
@@ -180,11 +205,16 @@ class AIOKafkaProducer(object):
                  linger_ms=0, send_backoff_ms=100,
                  retry_backoff_ms=100, security_protocol="PLAINTEXT",
                  ssl_context=None, connections_max_idle_ms=540000,
+                 reconnect_backoff_ms=50,
+                 reconnect_backoff_max_ms=1000,
+                 warm_up_connections=False,
+                 metadata_cache_path=None,
                  enable_idempotence=False, transactional_id=None,
                  transaction_timeout_ms=60000, sasl_mechanism="PLAIN",
                  sasl_plain_password=None, sasl_plain_username=None,
                  sasl_kerberos_service_name='kafka',
-                 sasl_kerberos_domain_name=None):
+                 sasl_kerberos_domain_name=None,
+                 client=None):
         if loop is None:
             loop = get_running_loop()
 
@@ -230,23 +260,35 @@ class AIOKafkaProducer(object):
         self._key_serializer = key_serializer
         self._value_serializer = value_serializer
         self._compression_type = compression_type
+        self._warm_up_connections = warm_up_connections
+        if metadata_max_idle_ms is not None:
+            metadata_max_idle_ms /= 1000
+        self._metadata_max_idle = metadata_max_idle_ms
+        # Topic -> time of last send, see `metadata_max_idle_ms`
+        self._topics_last_used = {}
         self._partitioner = partitioner
         self._max_request_size = max_request_size
         self._request_timeout_ms = request_timeout_ms
 
-        self.client = AIOKafkaClient(
-            loop=loop, bootstrap_servers=bootstrap_servers,
-            client_id=client_id, metadata_max_age_ms=metadata_max_age_ms,
-            request_timeout_ms=request_timeout_ms,
-            retry_backoff_ms=retry_backoff_ms,
-            api_version=api_version, security_protocol=security_protocol,
-            ssl_context=ssl_context,
-            connections_max_idle_ms=connections_max_idle_ms,
-            sasl_mechanism=sasl_mechanism,
-            sasl_plain_username=sasl_plain_username,
-            sasl_plain_password=sasl_plain_password,
-            sasl_kerberos_service_name=sasl_kerberos_service_name,
-            sasl_kerberos_domain_name=sasl_kerberos_domain_name)
+        if client is not None:
+            self.client = client.share()
+        else:
+            self.client = AIOKafkaClient(
+                loop=loop, bootstrap_servers=bootstrap_servers,
+                client_id=client_id, metadata_max_age_ms=metadata_max_age_ms,
+                request_timeout_ms=request_timeout_ms,
+                retry_backoff_ms=retry_backoff_ms,
+                api_version=api_version, security_protocol=security_protocol,
+                ssl_context=ssl_context,
+                connections_max_idle_ms=connections_max_idle_ms,
+                reconnect_backoff_ms=reconnect_backoff_ms,
+                reconnect_backoff_max_ms=reconnect_backoff_max_ms,
+                sasl_mechanism=sasl_mechanism,
+                sasl_plain_username=sasl_plain_username,
+                sasl_plain_password=sasl_plain_password,
+                sasl_kerberos_service_name=sasl_kerberos_service_name,
+                sasl_kerberos_domain_name=sasl_kerberos_domain_name,
+                metadata_cache_path=metadata_cache_path)
         self._metadata = self.client.cluster
         self._message_accumulator = MessageAccumulator(
             self._metadata, max_batch_size, compression_attrs,
@@ -258,6 +300,8 @@ class AIOKafkaProducer(object):
             message_accumulator=self._message_accumulator,
             request_timeout_ms=request_timeout_ms,
             loop=loop)
+        if self._metadata_max_idle is not None:
+            self._metadata.add_listener(self._expire_idle_topics)
 
         self._loop = loop
         if loop.get_debug():
@@ -285,6 +329,8 @@ class AIOKafkaProducer(object):
         """Connect to Kafka cluster and check server version"""
         log.debug("Starting the Kafka producer")  # trace
         await self.client.bootstrap()
+        if self._warm_up_connections:
+            await self.client.warm_up()
 
         if self._compression_type == 'lz4':
             assert self.client.api_version >= (0, 8, 2), \
@@ -320,13 +366,43 @@ class AIOKafkaProducer(object):
 
             await self._sender.close()
 
+        if self._metadata_max_idle is not None:
+            self._metadata.remove_listener(self._expire_idle_topics)
         await self.client.close()
         log.debug("The Kafka producer has closed.")
 
+    def _expire_idle_topics(self, cluster):
+        # Called on each metadata update. Partitions of dropped topics are
+        # removed from cluster metadata by the next update.
+        now = self._loop.time()
+        idle = [
+            topic for topic, last_used in self._topics_last_used.items()
+            if now - last_used > self._metadata_max_idle]
+        # No topics would mean metadata of all topics, so keep the last ones
+        if not idle or len(idle) == len(self._topics_last_used):
+            return
+        for topic in idle:
+            del self._topics_last_used[topic]
+        log.debug("Topics %s were not used for %s seconds, dropping them "
+                  "from metadata", idle, self._metadata_max_idle)
+        # Only idle topics are removed, as topics may be added while this
+        # update was in flight
+        self.client.remove_topics(idle)
+
     async def partitions_for(self, topic):
         """Returns set of all known partitions for the topic."""
         return (await self.client._wait_on_metadata(topic))
 
+    def throttle_stats(self):
+        """ Returns quota throttling reported by brokers in produce
+        responses, as dict of node id to
+        :class:`~aiokafka.structs.ThrottleStats`.
+
+        Batches are not sent to a broker while it's muted by throttling,
+        so a growing `throttle_time_ms` means send rate should be reduced.
+        """
+        return self.client.throttle_stats()
+
     def _serialize(self, topic, key, value):
         if self._key_serializer:
             serialized_key = self._key_serializer(key)
@@ -411,6 +487,10 @@ class AIOKafkaProducer(object):
         assert not (value is None and key is None), \
             'Need at least one: key or value'
 
+        # Recorded before waiting, so metadata updates for the topic don't
+        # expire it
+        if self._metadata_max_idle is not None:
+            self._topics_last_used[topic] = self._loop.time()
         # first make sure the metadata for the topic is available
         await self.client._wait_on_metadata(topic)
 
@@ -473,6 +553,8 @@ class AIOKafkaProducer(object):
             asyncio.Future: object that will be set when the batch is
                 delivered.
         """
+        if self._metadata_max_idle is not None:
+            self._topics_last_used[topic] = self._loop.time()
         # first make sure the metadata for the topic is available
         await self.client._wait_on_metadata(topic)
         # We only validate we have the partition in the metadata here
@@ -492,6 +574,41 @@ class AIOKafkaProducer(object):
             batch, tp, self._request_timeout_ms / 1000)
         return future
 
+    async def send_raw_batch(self, topic, partition, buffer):
+        """Submit an already encoded record batch for publication.
+
+        The batch is sent as is, without decompressing or re-encoding the
+        records, which makes it a cheap way to republish data read with
+        :meth:`.AIOKafkaConsumer.getbatches` or stored on disk. Only the base
+        offset, producer id, epoch and sequence fields of the header are
+        patched (if idempotence is enabled) and the CRC is recalculated.
+
+        Arguments:
+            topic (str): topic where the batch will be published.
+            partition (int): partition where this batch will be published.
+            buffer (bytes): record batch in message format v2 (Kafka 0.11+).
+
+        Returns:
+            asyncio.Future: object that will be set when the batch is
+                delivered.
+
+        Raises:
+            ValueError: if ``buffer`` is not a valid v2 record batch or is a
+                control batch.
+            MessageSizeTooLargeError: if the batch is larger than
+                ``max_request_size``.
+        """
+        if self.client.api_version < (0, 11):
+            raise UnsupportedVersionError(
+                "Raw record batches require Kafka 0.11 and above")
+        builder = self._message_accumulator.create_raw_builder(buffer)
+        if builder.size() > self._max_request_size:
+            raise MessageSizeTooLargeError(
+                "The batch is %d bytes which is larger than the maximum"
+                " request size you have configured with the"
+                " max_request_size configuration" % builder.size())
+        return (await self.send_batch(builder, topic, partition=partition))
+
     def _ensure_transactional(self):
         if self._txn_manager is None or \
                 self._txn_manager.transactional_id is None:
@@ -114,9 +114,11 @@ class Sender:
                     muted_partitions = (
                         muted_partitions | txn_manager.partitions_to_add()
                     )
+                # Don't send to brokers we failed to connect to recently
+                nodes_in_backoff = self.client.nodes_in_backoff()
                 batches, unknown_leaders_exist = \
                     self._message_accumulator.drain_by_nodes(
-                        ignore_nodes=self._in_flight,
+                        ignore_nodes=self._in_flight.union(nodes_in_backoff),
                         muted_partitions=muted_partitions)
 
                 # create produce task for every batch
@@ -142,8 +144,13 @@ class Sender:
                 # * At least one of produce task is finished
                 # * Data for new partition arrived
                 # * Metadata update if partition leader unknown
+                # * Reconnect backoff of a broker passed
+                timeout = None
+                if nodes_in_backoff:
+                    timeout = min(nodes_in_backoff.values())
                 done, _ = await asyncio.wait(
                     waiters,
+                    timeout=timeout,
                     return_when=asyncio.FIRST_COMPLETED,
                     loop=self._loop)
 
@@ -673,6 +680,8 @@ class SendProduceReqHandler(BaseHandler):
         self._batches = batches
         self._client = sender.client
         self._to_reenqueue = []
+        # Update of topics, that moved to another leader
+        self._metadata_update = None
 
     def create_request(self):
         topics = collections.defaultdict(list)
@@ -707,13 +716,15 @@ class SendProduceReqHandler(BaseHandler):
 
     async def do(self, node_id):
         request = self.create_request()
+        sent_at = self._loop.time()
         try:
             response = await self._client.send(node_id, request)
         except KafkaError as err:
             log.warning(
                 "Got error produce response: %s", err)
             if getattr(err, "invalid_metadata", False):
-                self._client.force_metadata_update()
+                self._metadata_update = self._client.force_metadata_update(
+                    {tp.topic for tp in self._batches})
 
             for batch in self._batches.values():
                 if not self._can_retry(err, batch):
@@ -726,11 +737,20 @@ class SendProduceReqHandler(BaseHandler):
                 for batch in self._batches.values():
                     batch.done_noack()
             else:
+                if response.API_VERSION >= 1:
+                    self._client.throttle(
+                        node_id, response.throttle_time_ms, sent_at)
                 self.handle_response(response)
 
         if self._to_reenqueue:
-            # Wait backoff before reequeue
-            await asyncio.sleep(self._default_backoff, loop=self._loop)
+            # If partitions moved to another broker, retry right away once
+            # metadata of those topics points to the new leader. Otherwise
+            # wait the rest of the backoff before reequeue.
+            started = self._loop.time()
+            if not await self._leaders_moved(node_id):
+                elapsed = self._loop.time() - started
+                delay = max(0, self._default_backoff - elapsed)
+                await asyncio.sleep(delay, loop=self._loop)
 
             for batch in self._to_reenqueue:
                 self._sender._message_accumulator.reenqueue(batch)
@@ -780,9 +800,23 @@ class SendProduceReqHandler(BaseHandler):
                         " %s, retrying. Error: %s", tp, error)
                     # Ok, we can retry this batch
                     if getattr(error, "invalid_metadata", False):
-                        self._client.force_metadata_update()
+                        self._metadata_update = \
+                            self._client.force_metadata_update([tp.topic])
                     self._to_reenqueue.append(batch)
 
+    async def _leaders_moved(self, node_id):
+        if self._metadata_update is None:
+            return False
+        # Only a few topics are requested, so this is about 1 round trip
+        if not await self._metadata_update:
+            return False
+        cluster = self._client.cluster
+        for batch in self._to_reenqueue:
+            leader = cluster.leader_for_partition(batch.tp)
+            if leader is None or leader == -1 or leader == node_id:
+                return False
+        return True
+
     def _can_retry(self, error, batch):
         # If indempotence is enabled we never expire batches, but retry until
         # we succeed. We can be sure, that no duplicates will be introduced
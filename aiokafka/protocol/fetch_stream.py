@@ -0,0 +1,179 @@
+import asyncio
+import collections
+import struct
+
+import aiokafka.errors as Errors
+from aiokafka.util import create_future
+
+
+_INT16 = struct.Struct(">h")
+_INT32 = struct.Struct(">i")
+_ABORTED_TXN = struct.Struct(">qq")
+
+# partition, error_code, highwater_offset[, last_stable_offset
+# [, log_start_offset]]
+_PARTITION_HEADER_V0 = struct.Struct(">ihq")
+_PARTITION_HEADER_V4 = struct.Struct(">ihqq")
+_PARTITION_HEADER_V5 = struct.Struct(">ihqqq")
+
+
+class FetchResponseStream:
+    """ FetchResponse decoded incrementally, as bytes arrive from the broker.
+
+    Connection resolves the request future with this object as soon as the
+    response header is read. Partitions are then read one by one and can be
+    consumed using ``async for topic, partition_data, buffer in stream``,
+    where `partition_data` has the same layout as the partition entries of
+    the corresponding FetchResponse struct. Connection yields to the event
+    loop between partitions, so the whole response is never decoded in one
+    go.
+
+    If `buffer_pool` is given, large record sets are read into pooled
+    buffers. In that case the record set is a memoryview and `buffer` is the
+    `PooledBuffer` holding it, which the consumer must `release()`. Otherwise
+    `buffer` is None.
+    """
+
+    def __init__(self, response_type, *, loop, buffer_pool=None):
+        assert response_type.API_KEY == 1, response_type
+        self.API_KEY = response_type.API_KEY
+        self.API_VERSION = response_type.API_VERSION
+        self.throttle_time_ms = 0
+        # Loop time by which the whole response must be read, set by the
+        # connection
+        self.deadline = None
+
+        self._loop = loop
+        self._buffer_pool = buffer_pool
+        self._partitions = collections.deque()
+        self._waiter = None
+        self._done = False
+        self._closed = False
+        self._exception = None
+
+        self._reader = None
+        self._remaining = 0
+
+        if self.API_VERSION >= 5:
+            self._partition_header = _PARTITION_HEADER_V5
+        elif self.API_VERSION == 4:
+            self._partition_header = _PARTITION_HEADER_V4
+        else:
+            self._partition_header = _PARTITION_HEADER_V0
+
+    def __repr__(self):
+        return "<FetchResponseStream v{} done={}>".format(
+            self.API_VERSION, self._done)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._partitions:
+            if self._exception is not None:
+                raise self._exception
+            if self._done:
+                raise StopAsyncIteration
+            self._waiter = create_future(loop=self._loop)
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._partitions.popleft()
+
+    def close(self):
+        """ Stop buffering partitions. The rest of the response will be read
+        from the connection and dropped.
+        """
+        self._closed = True
+        while self._partitions:
+            _, _, buffer = self._partitions.popleft()
+            if buffer is not None:
+                buffer.release()
+
+    def set_exception(self, exc):
+        if not self._done and self._exception is None:
+            self._exception = exc
+            self._wakeup()
+
+    def _wakeup(self):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    # Called by AIOKafkaConnection read routine
+
+    async def read_header(self, reader, size):
+        self._reader = reader
+        self._remaining = size
+        if self.API_VERSION >= 1:
+            self.throttle_time_ms, = _INT32.unpack(
+                await self._read_exactly(4))
+
+    async def read_partitions(self):
+        topics_count = await self._read_int32()
+        for _ in range(topics_count):
+            topic = await self._read_string()
+            partitions_count = await self._read_int32()
+            for _ in range(partitions_count):
+                partition_data, buffer = await self._read_partition()
+                if not self._closed:
+                    self._partitions.append((topic, partition_data, buffer))
+                    self._wakeup()
+                elif buffer is not None:
+                    buffer.release()
+                # Let the consumer process this partition before reading
+                # the next one.
+                await asyncio.sleep(0, loop=self._loop)
+
+        if self._remaining:
+            # Fields not known to this version
+            await self._read_exactly(self._remaining)
+        self._reader = None
+        self._done = True
+        self._wakeup()
+
+    async def _read_partition(self):
+        header = self._partition_header
+        partition_data = header.unpack(await self._read_exactly(header.size))
+        if self.API_VERSION >= 4:
+            txn_count = await self._read_int32()
+            if txn_count >= 0:
+                data = await self._read_exactly(txn_count * _ABORTED_TXN.size)
+                aborted_transactions = list(_ABORTED_TXN.iter_unpack(data))
+            else:
+                aborted_transactions = None
+            partition_data += (aborted_transactions, )
+        records_size = await self._read_int32()
+        buffer = None
+        pool = self._buffer_pool
+        if pool is not None and records_size > pool.min_size:
+            self._consume(records_size)
+            buffer = await pool.readexactly(self._reader, records_size)
+            message_set = buffer.view
+        elif records_size >= 0:
+            message_set = await self._read_exactly(records_size)
+        else:
+            message_set = None
+        return partition_data + (message_set, ), buffer
+
+    def _consume(self, size):
+        if size > self._remaining:
+            raise Errors.KafkaProtocolError(
+                "FetchResponse data exceeds the size of the response frame")
+        self._remaining -= size
+
+    async def _read_exactly(self, size):
+        self._consume(size)
+        return await self._reader.readexactly(size)
+
+    async def _read_int32(self):
+        value, = _INT32.unpack(await self._read_exactly(4))
+        return value
+
+    async def _read_string(self):
+        size, = _INT16.unpack(await self._read_exactly(2))
+        if size < 0:
+            return None
+        data = await self._read_exactly(size)
+        return data.decode("utf-8")
@@ -21,3 +21,7 @@ from .default_records import (  # noqa
     DefaultRecordBatchBuilder,
     DefaultRecordMetadata
 )
+# consumer
+from .consumer_record import (  # noqa
+    ConsumerRecord,
+)
@@ -21,4 +21,8 @@ DEF _LEGACY_RECORD_FREELIST_SIZE = 100
 
 DEF _DEFAULT_RECORD_METADATA_FREELIST_SIZE = 20
 DEF _DEFAULT_RECORD_BATCH_FREELIST_SIZE = 100
-DEF _DEFAULT_RECORD_FREELIST_SIZE = 100
\ No newline at end of file
+DEF _DEFAULT_RECORD_FREELIST_SIZE = 100
+
+# Unlike the structs above, consumer records are returned to the user, so
+# there can be a whole fetch worth of them alive at once.
+DEF _CONSUMER_RECORD_FREELIST_SIZE = 500
@@ -0,0 +1,231 @@
+#cython: language_level=3
+
+from cpython cimport PyObject_RichCompare, PyBytes_GET_SIZE
+from libc.stdint cimport int32_t, int64_t, INT32_MIN
+cimport cython
+
+from .default_records cimport DefaultRecord
+from .legacy_records cimport LegacyRecord
+
+include "consts.pxi"
+
+
+@cython.final
+@cython.freelist(_CONSUMER_RECORD_FREELIST_SIZE)
+cdef class ConsumerRecord:
+    """ C implementation of `aiokafka.structs.ConsumerRecord`.
+
+        Numeric fields are stored as C values and only converted to Python
+        objects on access. Record headers are converted to a tuple on first
+        access. Supports the same attribute and index access as the
+        namedtuple version, but is not a subclass of `tuple`.
+    """
+
+    # -1 is used as None for timestamp, timestamp_type and checksum, as those
+    # can't be negative. Serialized sizes are -1 for a None key or value, so
+    # INT32_MIN is used as None for those.
+    cdef:
+        readonly object topic
+        int32_t _partition
+        int64_t _offset
+        int64_t _timestamp
+        char _timestamp_type
+        readonly object key
+        readonly object value
+        int64_t _checksum
+        int32_t _serialized_key_size
+        int32_t _serialized_value_size
+        object _headers
+        bint _headers_is_list
+
+    _fields = (
+        "topic", "partition", "offset", "timestamp", "timestamp_type", "key",
+        "value", "checksum", "serialized_key_size", "serialized_value_size",
+        "headers")
+
+    def __init__(self, topic, partition, offset, timestamp, timestamp_type,
+                 key, value, checksum, serialized_key_size,
+                 serialized_value_size, headers):
+        self.topic = topic
+        self._partition = partition
+        self._offset = offset
+        self._timestamp = -1 if timestamp is None else timestamp
+        self._timestamp_type = \
+            -1 if timestamp_type is None else timestamp_type
+        self.key = key
+        self.value = value
+        self._checksum = -1 if checksum is None else checksum
+        self._serialized_key_size = INT32_MIN \
+            if serialized_key_size is None else serialized_key_size
+        self._serialized_value_size = INT32_MIN \
+            if serialized_value_size is None else serialized_value_size
+        # Kept as given, like the namedtuple version does
+        self._headers = headers
+        self._headers_is_list = 0
+
+    @staticmethod
+    def from_record(object topic, int32_t partition, object record,
+                    object key, object value):
+        """ Create from a parsed `DefaultRecord` or `LegacyRecord`. `key` and
+            `value` are the deserialized versions of the record's key and
+            value.
+        """
+        cdef:
+            ConsumerRecord self
+            DefaultRecord default_record
+            LegacyRecord legacy_record
+            object raw_key
+            object raw_value
+
+        self = ConsumerRecord.__new__(ConsumerRecord)
+        self.topic = topic
+        self._partition = partition
+        self.key = key
+        self.value = value
+
+        if type(record) is DefaultRecord:
+            default_record = <DefaultRecord> record
+            self._offset = default_record.offset
+            self._timestamp = default_record.timestamp
+            if default_record.timestamp != -1:
+                self._timestamp_type = default_record.timestamp_type
+            else:
+                self._timestamp_type = -1
+            self._checksum = -1
+            self._headers = default_record.headers
+            self._headers_is_list = 1
+            raw_key = default_record.key
+            raw_value = default_record.value
+        elif type(record) is LegacyRecord:
+            legacy_record = <LegacyRecord> record
+            self._offset = legacy_record.offset
+            self._timestamp = legacy_record.timestamp
+            if legacy_record.timestamp == -1:
+                self._timestamp_type = -1
+            elif legacy_record.attributes & _TIMESTAMP_TYPE_MASK:
+                self._timestamp_type = 1
+            else:
+                self._timestamp_type = 0
+            self._checksum = legacy_record.crc
+            self._headers = ()
+            self._headers_is_list = 0
+            raw_key = legacy_record.key
+            raw_value = legacy_record.value
+        else:
+            self._offset = record.offset
+            self._timestamp = -1 if record.timestamp is None \
+                else record.timestamp
+            self._timestamp_type = -1 if record.timestamp_type is None \
+                else record.timestamp_type
+            self._checksum = -1 if record.checksum is None \
+                else record.checksum
+            self._headers = tuple(record.headers)
+            self._headers_is_list = 0
+            raw_key = record.key
+            raw_value = record.value
+
+        if raw_key is None:
+            self._serialized_key_size = -1
+        elif type(raw_key) is bytes:
+            self._serialized_key_size = <int32_t> PyBytes_GET_SIZE(raw_key)
+        else:
+            self._serialized_key_size = <int32_t> len(raw_key)
+        if raw_value is None:
+            self._serialized_value_size = -1
+        elif type(raw_value) is bytes:
+            self._serialized_value_size = \
+                <int32_t> PyBytes_GET_SIZE(raw_value)
+        else:
+            self._serialized_value_size = <int32_t> len(raw_value)
+        return self
+
+    @property
+    def partition(self):
+        return self._partition
+
+    @property
+    def offset(self):
+        return self._offset
+
+    @property
+    def timestamp(self):
+        if self._timestamp != -1:
+            return self._timestamp
+        return None
+
+    @property
+    def timestamp_type(self):
+        if self._timestamp_type != -1:
+            return self._timestamp_type
+        return None
+
+    @property
+    def checksum(self):
+        if self._checksum != -1:
+            return self._checksum
+        return None
+
+    @property
+    def serialized_key_size(self):
+        if self._serialized_key_size != INT32_MIN:
+            return self._serialized_key_size
+        return None
+
+    @property
+    def serialized_value_size(self):
+        if self._serialized_value_size != INT32_MIN:
+            return self._serialized_value_size
+        return None
+
+    @property
+    def headers(self):
+        if self._headers_is_list:
+            self._headers = tuple(self._headers)
+            self._headers_is_list = 0
+        return self._headers
+
+    cdef tuple _astuple(self):
+        return (
+            self.topic, self.partition, self.offset, self.timestamp,
+            self.timestamp_type, self.key, self.value, self.checksum,
+            self.serialized_key_size, self.serialized_value_size,
+            self.headers)
+
+    def _asdict(self):
+        return dict(zip(self._fields, self._astuple()))
+
+    def _replace(self, **kwargs):
+        values = self._asdict()
+        for name in kwargs:
+            if name not in values:
+                raise ValueError(
+                    "Got unexpected field names: {!r}".format(list(kwargs)))
+        values.update(kwargs)
+        return ConsumerRecord(**values)
+
+    def __len__(self):
+        return 11
+
+    def __getitem__(self, index):
+        return self._astuple()[index]
+
+    def __iter__(self):
+        return iter(self._astuple())
+
+    def __hash__(self):
+        return hash(self._astuple())
+
+    def __richcmp__(self, other, int op):
+        if isinstance(other, ConsumerRecord):
+            other = (<ConsumerRecord> other)._astuple()
+        elif not isinstance(other, tuple):
+            return NotImplemented
+        return PyObject_RichCompare(self._astuple(), other, op)
+
+    def __reduce__(self):
+        return (ConsumerRecord, self._astuple())
+
+    def __repr__(self):
+        return "ConsumerRecord({})".format(", ".join(
+            "{}={!r}".format(name, value)
+            for name, value in zip(self._fields, self._astuple())))
@@ -6,6 +6,8 @@ cdef class DefaultRecordBatch:
 
     cdef:
         Py_buffer _buffer
+        Py_buffer _raw_source
+        int _has_raw_source
         int _decompressed
         Py_ssize_t _pos
         int32_t _next_record_index
@@ -29,7 +31,7 @@ cdef class DefaultRecordBatch:
 
     @staticmethod
     cdef inline DefaultRecordBatch new(
-        bytes buffer, Py_ssize_t pos, Py_ssize_t slice_end, char magic)
+        object buffer, Py_ssize_t pos, Py_ssize_t slice_end, char magic)
 
     cdef DefaultRecord _read_msg(self)
 
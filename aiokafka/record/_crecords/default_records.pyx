@@ -56,6 +56,7 @@
 # * Compression Type (0-2)
 
 from aiokafka.errors import CorruptRecordException
+from aiokafka.structs import RecordColumns
 from kafka.codec import (
     gzip_encode, snappy_encode, lz4_encode,
     gzip_decode, snappy_decode, lz4_decode
@@ -66,6 +67,8 @@ from cpython cimport PyObject_GetBuffer, PyBuffer_Release, PyBUF_WRITABLE, \
                      PyBytes_FromStringAndSize
 from libc.stdint cimport int32_t, int64_t, uint32_t, int16_t
 from libc.string cimport memcpy
+from cpython cimport array
+import array
 cimport cython
 cdef extern from "Python.h":
     ssize_t PyByteArray_GET_SIZE(object)
@@ -103,6 +106,9 @@ DEF MAX_RECORD_OVERHEAD = 21
 
 DEF NO_PARTITION_LEADER_EPOCH = -1
 
+cdef array.array _INT64_ARRAY_TEMPLATE = array.array("q")
+cdef array.array _INT32_ARRAY_TEMPLATE = array.array("i")
+
 
 # Initialize CRC32 on import
 cutil.crc32c_global_init()
@@ -127,7 +133,7 @@ cdef class DefaultRecordBatch:
 
     @staticmethod
     cdef inline DefaultRecordBatch new(
-            bytes buffer, Py_ssize_t pos, Py_ssize_t slice_end, char magic):
+            object buffer, Py_ssize_t pos, Py_ssize_t slice_end, char magic):
         """ Fast constructor to initialize from C.
             NOTE: We take ownership of the Py_buffer object, so caller does not
                   need to call PyBuffer_Release.
@@ -151,6 +157,8 @@ cdef class DefaultRecordBatch:
 
     def __dealloc__(self):
         PyBuffer_Release(&self._buffer)
+        if self._has_raw_source:
+            PyBuffer_Release(&self._raw_source)
 
     @property
     def compression_type(self):
@@ -222,8 +230,11 @@ cdef class DefaultRecordBatch:
                     uncompressed = snappy_decode(data.tobytes())
                 if compression_type == _ATTR_CODEC_LZ4:
                     uncompressed = lz4_decode(data.tobytes())
-        
-                PyBuffer_Release(&self._buffer)
+
+                # Hold on to the original data for `raw_bytes()`. It's only
+                # copied if asked for.
+                self._raw_source = self._buffer
+                self._has_raw_source = 1
                 PyObject_GetBuffer(uncompressed, &self._buffer, PyBUF_SIMPLE)
                 self._pos = 0
         self._decompressed = 1
@@ -373,6 +384,162 @@ cdef class DefaultRecordBatch:
     #    could happen.
     # ```
 
+    def to_columns(self, columns=None, int64_t min_offset=0):
+        """ Decode all records of the batch in columnar form, see
+            `aiokafka.structs.RecordColumns`. Headers are not decoded.
+
+            Arguments:
+                columns (RecordColumns): optional columns to append to, so
+                    several batches can be decoded into the same buffers.
+                min_offset (int): skip records with lower offsets.
+
+            Returns:
+                RecordColumns: decoded records
+        """
+        cdef:
+            Py_ssize_t pos
+            Py_ssize_t end_pos
+            char* buf
+            char* data_buf
+            Py_ssize_t data_pos
+            Py_ssize_t index
+            Py_ssize_t count
+            int32_t i
+
+            int64_t length
+            int64_t attrs
+            int64_t ts_delta
+            int64_t offset_delta
+            int64_t key_len
+            int64_t value_len
+            int64_t offset
+
+            array.array offsets
+            array.array timestamps
+            array.array key_offsets
+            array.array key_lengths
+            array.array value_offsets
+            array.array value_lengths
+            bytearray data
+
+        if columns is None:
+            columns = RecordColumns(
+                array.clone(_INT64_ARRAY_TEMPLATE, 0, zero=False),
+                array.clone(_INT64_ARRAY_TEMPLATE, 0, zero=False),
+                array.clone(_INT64_ARRAY_TEMPLATE, 0, zero=False),
+                array.clone(_INT32_ARRAY_TEMPLATE, 0, zero=False),
+                array.clone(_INT64_ARRAY_TEMPLATE, 0, zero=False),
+                array.clone(_INT32_ARRAY_TEMPLATE, 0, zero=False),
+                bytearray())
+        (offsets, timestamps, key_offsets, key_lengths, value_offsets,
+         value_lengths, data) = columns
+        if self.num_records < 0:
+            raise CorruptRecordException(
+                "Found invalid number of records {}".format(self.num_records))
+
+        self._maybe_uncompress()
+        if self.attributes & _ATTR_CODEC_MASK != _ATTR_CODEC_NONE:
+            pos = 0
+        else:
+            pos = FIRST_RECORD_OFFSET
+        buf = <char*> self._buffer.buf
+
+        # Reserve space for the worst case and shrink after decoding
+        index = len(offsets)
+        count = index + self.num_records
+        array.resize_smart(offsets, count)
+        array.resize_smart(timestamps, count)
+        array.resize_smart(key_offsets, count)
+        array.resize_smart(key_lengths, count)
+        array.resize_smart(value_offsets, count)
+        array.resize_smart(value_lengths, count)
+        data_pos = PyByteArray_GET_SIZE(data)
+        PyByteArray_Resize(data, data_pos + self._buffer.len - pos)
+        data_buf = PyByteArray_AS_STRING(data)
+
+        try:
+            for i in range(self.num_records):
+                self._check_bounds(pos, 1)
+                cutil.decode_varint64(buf, &pos, &length)
+                end_pos = pos + <Py_ssize_t> length
+                self._check_bounds(pos, <Py_ssize_t> length)
+                cutil.decode_varint64(buf, &pos, &attrs)
+                cutil.decode_varint64(buf, &pos, &ts_delta)
+                cutil.decode_varint64(buf, &pos, &offset_delta)
+                offset = self.base_offset + offset_delta
+                if offset < min_offset:
+                    pos = end_pos
+                    continue
+
+                offsets.data.as_longlongs[index] = offset
+                if self.attributes & _TIMESTAMP_TYPE_MASK:  # LOG_APPEND_TIME
+                    timestamps.data.as_longlongs[index] = self.max_timestamp
+                else:
+                    timestamps.data.as_longlongs[index] = \
+                        self.first_timestamp + ts_delta
+
+                cutil.decode_varint64(buf, &pos, &key_len)
+                key_offsets.data.as_longlongs[index] = data_pos
+                key_lengths.data.as_ints[index] = <int32_t> key_len
+                if key_len < -1:
+                    raise CorruptRecordException(
+                        "Invalid key size {}".format(key_len))
+                if key_len > 0:
+                    if pos + <Py_ssize_t> key_len > end_pos:
+                        raise CorruptRecordException(
+                            "Invalid key size {}".format(key_len))
+                    memcpy(&data_buf[data_pos], &buf[pos], <size_t> key_len)
+                    data_pos += <Py_ssize_t> key_len
+                    pos += <Py_ssize_t> key_len
+
+                cutil.decode_varint64(buf, &pos, &value_len)
+                value_offsets.data.as_longlongs[index] = data_pos
+                value_lengths.data.as_ints[index] = <int32_t> value_len
+                if value_len < -1:
+                    raise CorruptRecordException(
+                        "Invalid value size {}".format(value_len))
+                if value_len > 0:
+                    if pos + <Py_ssize_t> value_len > end_pos:
+                        raise CorruptRecordException(
+                            "Invalid value size {}".format(value_len))
+                    memcpy(
+                        &data_buf[data_pos], &buf[pos], <size_t> value_len)
+                    data_pos += <Py_ssize_t> value_len
+                    pos += <Py_ssize_t> value_len
+
+                # Headers are not part of the columns
+                if pos > end_pos:
+                    raise CorruptRecordException(
+                        "Invalid record size: expected to read {} bytes in "
+                        "record payload, but instead read more".format(length))
+                pos = end_pos
+                index += 1
+        finally:
+            # Drop the unused reserved space
+            array.resize_smart(offsets, index)
+            array.resize_smart(timestamps, index)
+            array.resize_smart(key_offsets, index)
+            array.resize_smart(key_lengths, index)
+            array.resize_smart(value_offsets, index)
+            array.resize_smart(value_lengths, index)
+            PyByteArray_Resize(data, data_pos)
+
+        if pos != self._buffer.len:
+            raise CorruptRecordException(
+                "{} unconsumed bytes after all records consumed".format(
+                    self._buffer.len - pos))
+        return columns
+
+    def raw_bytes(self):
+        """ Return the batch data as it was read from the log, without
+            decompression
+        """
+        if self._has_raw_source:
+            return PyBytes_FromStringAndSize(
+                <char*> self._raw_source.buf, self._raw_source.len)
+        return PyBytes_FromStringAndSize(
+            <char*> self._buffer.buf, self._buffer.len)
+
     def validate_crc(self):
         assert self._decompressed == 0, \
             "Validate should be called before iteration"
@@ -6,13 +6,15 @@ cdef class LegacyRecordBatch:
 
     cdef:
         Py_buffer _buffer
+        Py_buffer _raw_source
+        int _has_raw_source
         char _magic
         int _decompressed
         LegacyRecord _main_record
 
     @staticmethod
     cdef inline LegacyRecordBatch new(
-        bytes buffer, Py_ssize_t pos, Py_ssize_t slice_end, char magic)
+        object buffer, Py_ssize_t pos, Py_ssize_t slice_end, char magic)
 
     cdef int _decompress(self, char compression_type) except -1
     cdef int64_t _read_last_offset(self) except -1
@@ -67,7 +67,7 @@ cdef class LegacyRecordBatch:
 
     @staticmethod
     cdef inline LegacyRecordBatch new(
-            bytes buffer, Py_ssize_t pos, Py_ssize_t slice_end, char magic):
+            object buffer, Py_ssize_t pos, Py_ssize_t slice_end, char magic):
         """ Fast constructor to initialize from C.
             NOTE: We take ownership of the Py_buffer object, so caller does not
                   need to call PyBuffer_Release.
@@ -89,11 +89,23 @@ cdef class LegacyRecordBatch:
 
     def __dealloc__(self):
         PyBuffer_Release(&self._buffer)
+        if self._has_raw_source:
+            PyBuffer_Release(&self._raw_source)
 
     @property
     def next_offset(self):
         return self._main_record.offset + 1
 
+    def raw_bytes(self):
+        """ Return the batch data as it was read from the log, without
+            decompression
+        """
+        if self._has_raw_source:
+            return PyBytes_FromStringAndSize(
+                <char*> self._raw_source.buf, self._raw_source.len)
+        return PyBytes_FromStringAndSize(
+            <char*> self._buffer.buf, self._buffer.len)
+
     def validate_crc(self):
         cdef:
             unsigned long crc = 0
@@ -127,7 +139,10 @@ cdef class LegacyRecordBatch:
             else:
                 uncompressed = lz4_decode(value)
 
-        PyBuffer_Release(&self._buffer)
+        # Hold on to the original data for `raw_bytes()`. It's only copied if
+        # asked for.
+        self._raw_source = self._buffer
+        self._has_raw_source = 1
         PyObject_GetBuffer(uncompressed, &self._buffer, PyBUF_SIMPLE)
         return 0
 
@@ -194,6 +209,9 @@ cdef class LegacyRecordBatch:
         # Read key
         read_size = <Py_ssize_t> hton.unpack_int32(&buf[pos])
         pos += KEY_LENGTH
+        if read_size < -1:
+            raise CorruptRecordException(
+                "Invalid key size {}".format(read_size))
         if read_size != -1:
             self._check_bounds(pos, read_size)
             key = PyBytes_FromStringAndSize(&buf[pos], read_size)
@@ -203,6 +221,9 @@ cdef class LegacyRecordBatch:
         # Read value
         read_size = <Py_ssize_t> hton.unpack_int32(&buf[pos])
         pos += VALUE_LENGTH
+        if read_size < -1:
+            raise CorruptRecordException(
+                "Invalid value size {}".format(read_size))
         if read_size != -1:
             self._check_bounds(pos, read_size)
             value = PyBytes_FromStringAndSize(&buf[pos], read_size)
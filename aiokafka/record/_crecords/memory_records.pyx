@@ -25,8 +25,8 @@ from aiokafka.errors import CorruptRecordException
 from .default_records cimport DefaultRecordBatch
 from .legacy_records cimport LegacyRecordBatch
 from . cimport hton
-from cpython cimport PyBytes_GET_SIZE, PyBytes_AS_STRING, Py_buffer,\
-    PyObject_GetBuffer, PyBuffer_Release, PyBUF_SIMPLE
+from cpython cimport Py_buffer, PyObject_GetBuffer, PyBuffer_Release, \
+    PyBUF_SIMPLE
 
 cdef extern from "Python.h":
     object PyMemoryView_FromObject(object obj)
@@ -42,15 +42,23 @@ DEF RECORD_OVERHEAD_V0 = 14
 cdef class MemoryRecords:
 
     cdef:
-        bytes _buffer
+        # Any object supporting the buffer protocol, like `bytes` or a
+        # `memoryview` of a pooled receive buffer.
+        object _buffer
+        Py_buffer _view
         Py_ssize_t _pos
 
-    def __init__(self, bytes bytes_data):
+    def __init__(self, object bytes_data):
+        PyObject_GetBuffer(bytes_data, &self._view, PyBUF_SIMPLE)
         self._buffer = bytes_data
         self._pos = 0
 
+    def __dealloc__(self):
+        if self._buffer is not None:
+            PyBuffer_Release(&self._view)
+
     def size_in_bytes(self):
-        return PyBytes_GET_SIZE(self._buffer)
+        return self._view.len
 
     cdef object _get_next(self):
         cdef:
@@ -61,8 +69,8 @@ cdef class MemoryRecords:
             Py_ssize_t slice_end
             char magic
 
-        buffer_len = PyBytes_GET_SIZE(self._buffer)
-        buf = PyBytes_AS_STRING(self._buffer)
+        buffer_len = self._view.len
+        buf = <char*> self._view.buf
 
         remaining = buffer_len - pos
         if remaining < LOG_OVERHEAD:
@@ -93,11 +101,11 @@ cdef class MemoryRecords:
             Py_ssize_t buffer_len
             Py_ssize_t length
 
-        buffer_len = PyBytes_GET_SIZE(self._buffer)
+        buffer_len = self._view.len
         if buffer_len - self._pos < LOG_OVERHEAD:
             return False
 
-        buf = PyBytes_AS_STRING(self._buffer)
+        buf = <char*> self._view.buf
         length = <Py_ssize_t> hton.unpack_int32(
             &buf[self._pos + LENGTH_OFFSET])
         if buffer_len - self._pos < LOG_OVERHEAD + length:
@@ -107,3 +115,9 @@ cdef class MemoryRecords:
 
     def next_batch(self):
         return self._get_next()
+
+    def tail(self):
+        """ Return a memoryview of the data not yet returned by
+            `next_batch()`, including any incomplete batch at the end.
+        """
+        return PyMemoryView_FromObject(self._buffer)[self._pos:]
@@ -54,11 +54,13 @@
 # * Timestamp Type (3)
 # * Compression Type (0-2)
 
+import array
 import struct
 import time
 from .util import decode_varint, encode_varint, calc_crc32c, size_of_varint
 
 from aiokafka.errors import CorruptRecordException
+from aiokafka.structs import RecordColumns
 from aiokafka.util import NO_EXTENSIONS
 from kafka.codec import (
     gzip_encode, snappy_encode, lz4_encode,
@@ -107,6 +109,8 @@ class _DefaultRecordBatchPy(DefaultRecordBase):
 
     def __init__(self, buffer):
         self._buffer = bytearray(buffer)
+        # Original data, as `self._buffer` is replaced on decompression
+        self._raw_buffer = self._buffer
         self._header_data = self.HEADER_STRUCT.unpack_from(self._buffer)
         self._pos = self.HEADER_STRUCT.size
         self._num_records = self._header_data[12]
@@ -288,6 +292,100 @@ class _DefaultRecordBatchPy(DefaultRecordBase):
 
     next = __next__
 
+    def to_columns(self, columns=None, min_offset=0):
+        """ Decode all records of the batch in columnar form, see
+            `aiokafka.structs.RecordColumns`. Headers are not decoded.
+
+            Arguments:
+                columns (RecordColumns): optional columns to append to, so
+                    several batches can be decoded into the same buffers.
+                min_offset (int): skip records with lower offsets.
+
+            Returns:
+                RecordColumns: decoded records
+        """
+        if columns is None:
+            columns = RecordColumns(
+                array.array("q"), array.array("q"), array.array("q"),
+                array.array("i"), array.array("q"), array.array("i"),
+                bytearray())
+        try:
+            self._read_columns(columns, min_offset)
+        except (ValueError, IndexError) as err:
+            raise CorruptRecordException(
+                "Found invalid record structure: {!r}".format(err))
+        return columns
+
+    def _read_columns(self, columns, min_offset, decode_varint=decode_varint):
+        self._maybe_uncompress()
+        buffer = self._buffer
+        if self.compression_type != self.CODEC_NONE:
+            pos = 0
+        else:
+            pos = self.HEADER_STRUCT.size
+
+        (offsets, timestamps, key_offsets, key_lengths, value_offsets,
+         value_lengths, data) = columns
+        base_offset = self.base_offset
+        first_timestamp = self.first_timestamp
+        log_append_time = self.timestamp_type == self.LOG_APPEND_TIME
+        max_timestamp = self.max_timestamp
+
+        for _ in range(self._num_records):
+            length, pos = decode_varint(buffer, pos)
+            end_pos = pos + length
+            _, pos = decode_varint(buffer, pos)  # attrs can be skipped for now
+            ts_delta, pos = decode_varint(buffer, pos)
+            offset_delta, pos = decode_varint(buffer, pos)
+            offset = base_offset + offset_delta
+            if offset < min_offset:
+                pos = end_pos
+                continue
+
+            offsets.append(offset)
+            if log_append_time:
+                timestamps.append(max_timestamp)
+            else:
+                timestamps.append(first_timestamp + ts_delta)
+
+            key_len, pos = decode_varint(buffer, pos)
+            key_offsets.append(len(data))
+            key_lengths.append(key_len)
+            if key_len < -1:
+                raise CorruptRecordException(
+                    "Invalid key size {}".format(key_len))
+            if key_len > 0:
+                data += buffer[pos: pos + key_len]
+                pos += key_len
+
+            value_len, pos = decode_varint(buffer, pos)
+            value_offsets.append(len(data))
+            value_lengths.append(value_len)
+            if value_len < -1:
+                raise CorruptRecordException(
+                    "Invalid value size {}".format(value_len))
+            if value_len > 0:
+                data += buffer[pos: pos + value_len]
+                pos += value_len
+
+            # Headers are not part of the columns
+            if pos > end_pos:
+                raise CorruptRecordException(
+                    "Invalid record size: expected to read {} bytes in record "
+                    "payload, but instead read more".format(length))
+            pos = end_pos
+
+        if pos != len(buffer):
+            raise CorruptRecordException(
+                "{} unconsumed bytes after all records consumed".format(
+                    len(buffer) - pos))
+
+    def raw_bytes(self):
+        """ Return the batch data as it was read from the log, without
+            decompression
+        """
+        return bytes(self._raw_buffer)
+
     def validate_crc(self):
         assert self._decompressed is False, \
             "Validate should be called before iteration"
@@ -82,6 +82,8 @@ class _LegacyRecordBatchPy(LegacyRecordBase):
 
     def __init__(self, buffer, magic):
         self._buffer = memoryview(buffer)
+        # Original data, as `self._buffer` is replaced on decompression
+        self._raw_buffer = self._buffer
         self._magic = magic
 
         offset, length, crc, magic_, attrs, timestamp = self._read_header(0)
@@ -116,6 +118,12 @@ class _LegacyRecordBatchPy(LegacyRecordBase):
     def next_offset(self):
         return self._offset + 1
 
+    def raw_bytes(self):
+        """ Return the batch data as it was read from the log, without
+            decompression
+        """
+        return self._raw_buffer.tobytes()
+
     def validate_crc(self):
         crc = crc32(self._buffer[self.MAGIC_OFFSET:])
         return self._crc == crc
@@ -171,6 +179,9 @@ class _LegacyRecordBatchPy(LegacyRecordBase):
         pos += self.KEY_LENGTH
         if key_size == -1:
             key = None
+        elif key_size < -1:
+            raise CorruptRecordException(
+                "Invalid key size {}".format(key_size))
         else:
             key = self._buffer[pos:pos + key_size].tobytes()
             pos += key_size
@@ -179,6 +190,9 @@ class _LegacyRecordBatchPy(LegacyRecordBase):
         pos += self.VALUE_LENGTH
         if value_size == -1:
             value = None
+        elif value_size < -1:
+            raise CorruptRecordException(
+                "Invalid value size {}".format(value_size))
         else:
             value = self._buffer[pos:pos + value_size].tobytes()
         return key, value
@@ -76,6 +76,15 @@ class _MemoryRecordsPy:
     def has_next(self):
         return self._next_slice is not None
 
+    def tail(self):
+        """ Return a memoryview of the data not yet returned by
+            `next_batch()`, including any incomplete batch at the end.
+        """
+        pos = self._pos
+        if self._next_slice is not None:
+            pos -= len(self._next_slice)
+        return memoryview(self._buffer)[pos:]
+
     # NOTE: same cache for LOAD_FAST as above
     def next_batch(self, _min_slice=MIN_SLICE,
                    _magic_offset=MAGIC_OFFSET):
@@ -5,7 +5,7 @@ from kafka.structs import (
 
 __all__ = [
     "OffsetAndMetadata", "TopicPartition", "RecordMetadata", "ConsumerRecord",
-    "BrokerMetadata", "PartitionMetadata"
+    "BrokerMetadata", "PartitionMetadata", "RecordColumns", "ThrottleStats"
 ]
 
 RecordMetadata = collections.namedtuple(
@@ -20,3 +20,28 @@ ConsumerRecord = collections.namedtuple(
 
 OffsetAndTimestamp = collections.namedtuple(
     "OffsetAndTimestamp", ["offset", "timestamp"])
+
+# Quota throttling of a broker: number of throttled responses, sum of their
+# `throttle_time_ms` and milliseconds left until the broker is unmuted.
+ThrottleStats = collections.namedtuple(
+    "ThrottleStats", ["throttled_responses", "throttle_time_ms", "muted_ms"])
+
+# Records decoded in columnar form. `offsets` and `timestamps` are int64
+# arrays, `key_offsets` and `value_offsets` are int64 positions in `data`
+# (a bytearray with all keys and values) and `key_lengths`/`value_lengths`
+# are int32 arrays with -1 for None. All fields support the buffer protocol.
+RecordColumns = collections.namedtuple(
+    "RecordColumns", ["offsets", "timestamps", "key_offsets", "key_lengths",
+                      "value_offsets", "value_lengths", "data"])
+
+
+# Prefer the C implementation of ConsumerRecord, which is created directly
+# from parsed records. Imported last, as the record modules import this one.
+from aiokafka.util import NO_EXTENSIONS  # noqa: E402
+if not NO_EXTENSIONS:
+    try:
+        from aiokafka.record._crecords import (  # noqa: F811
+            ConsumerRecord
+        )
+    except ImportError:  # pragma: no cover
+        pass
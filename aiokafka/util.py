@@ -3,7 +3,7 @@ import os
 import sys
 from distutils.version import StrictVersion
 
-from .structs import TopicPartition, OffsetAndMetadata
+from kafka.structs import TopicPartition, OffsetAndMetadata
 
 __all__ = ["ensure_future", "create_future", "PY_35"]
 
@@ -62,6 +62,13 @@ extensions = [
         extra_compile_args=CFLAGS,
         extra_link_args=LDFLAGS
     ),
+    Extension(
+        'aiokafka.record._crecords.consumer_record',
+        ['aiokafka/record/_crecords/consumer_record' + ext],
+        libraries=LIBRARIES,
+        extra_compile_args=CFLAGS,
+        extra_link_args=LDFLAGS
+    ),
 ]
 
 
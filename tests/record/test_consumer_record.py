@@ -0,0 +1,115 @@
+import collections
+import pickle
+
+import pytest
+from aiokafka.record.default_records import (
+    DefaultRecordBatch, DefaultRecordBatchBuilder
+)
+from aiokafka.record.legacy_records import (
+    LegacyRecordBatch, LegacyRecordBatchBuilder
+)
+from aiokafka.structs import ConsumerRecord
+
+
+FIELDS = (
+    "topic", "partition", "offset", "timestamp", "timestamp_type", "key",
+    "value", "checksum", "serialized_key_size", "serialized_value_size",
+    "headers")
+TupleRecord = collections.namedtuple("ConsumerRecord", FIELDS)
+
+needs_c_record = pytest.mark.skipif(
+    not hasattr(ConsumerRecord, "from_record"),
+    reason="C extensions are not available")
+
+
+def test_consumer_record_namedtuple_compat():
+    values = (
+        "topic", 1, 10, 9999999, 0, b"key", b"value", None, 3, 5,
+        (("h", b"v"),))
+    rec = ConsumerRecord(*values)
+    expected = TupleRecord(*values)
+
+    for name in FIELDS:
+        assert getattr(rec, name) == getattr(expected, name)
+    assert rec._fields == FIELDS
+    assert len(rec) == 11
+    assert list(rec) == list(values)
+    assert rec[2] == 10
+    assert rec[-1] == (("h", b"v"),)
+    assert rec[1:3] == (1, 10)
+    topic, partition, *_ = rec
+    assert (topic, partition) == ("topic", 1)
+
+    assert rec == expected
+    assert rec == ConsumerRecord(*values)
+    assert rec != ConsumerRecord(*values[:2], 11, *values[3:])
+    assert hash(rec) == hash(expected)
+    assert repr(rec) == repr(expected)
+    assert rec._asdict() == dict(expected._asdict())
+    assert rec._replace(offset=11, key=None) == \
+        expected._replace(offset=11, key=None)
+    with pytest.raises(ValueError):
+        rec._replace(unknown=1)
+    assert pickle.loads(pickle.dumps(rec)) == rec
+
+    # None is preserved for optional fields
+    rec = ConsumerRecord("topic", 0, 0, None, None, None, None, None,
+                         -1, -1, ())
+    assert rec.timestamp is None
+    assert rec.timestamp_type is None
+    assert rec.checksum is None
+
+
+def test_consumer_record_none_sizes():
+    headers = [("h", b"v")]
+    rec = ConsumerRecord("topic", 0, 0, None, None, None, None, None,
+                         None, None, headers)
+    expected = TupleRecord("topic", 0, 0, None, None, None, None, None,
+                           None, None, headers)
+    assert rec.serialized_key_size is None
+    assert rec.serialized_value_size is None
+    assert rec == expected
+    assert rec._replace(serialized_key_size=3).serialized_key_size == 3
+    # Headers are kept as given in both implementations
+    assert rec.headers is headers
+
+
+@needs_c_record
+def test_consumer_record_from_default_record():
+    builder = DefaultRecordBatchBuilder(
+        magic=2, compression_type=0, is_transactional=0,
+        producer_id=-1, producer_epoch=-1, base_sequence=-1,
+        batch_size=999999)
+    builder.append(
+        0, timestamp=9999999, key=b"test", value=b"Super",
+        headers=[("header1", b"aaa")])
+    builder.append(1, timestamp=None, key=None, value=None, headers=[])
+    batch = DefaultRecordBatch(bytes(builder.build()))
+    msgs = list(batch)
+
+    rec = ConsumerRecord.from_record("topic", 3, msgs[0], "test", "Super")
+    assert rec == (
+        "topic", 3, 0, 9999999, 0, "test", "Super", None, 4, 5,
+        (("header1", b"aaa"),))
+    assert rec.headers is rec.headers
+
+    rec = ConsumerRecord.from_record("topic", 3, msgs[1], None, None)
+    assert rec == ("topic", 3, 1, rec.timestamp, 0, None, None, None,
+                   -1, -1, ())
+
+
+@needs_c_record
+@pytest.mark.parametrize("magic", [0, 1])
+def test_consumer_record_from_legacy_record(magic):
+    builder = LegacyRecordBatchBuilder(
+        magic=magic, compression_type=0, batch_size=1024 * 1024)
+    builder.append(0, timestamp=9999999, key=b"test", value=b"Super")
+    batch = LegacyRecordBatch(builder.build(), magic)
+    msg, = list(batch)
+
+    rec = ConsumerRecord.from_record("topic", 0, msg, b"test", b"Super")
+    assert rec == (
+        "topic", 0, 0, msg.timestamp, msg.timestamp_type, b"test", b"Super",
+        msg.checksum, 4, 5, ())
+    assert rec.timestamp == (9999999 if magic else None)
+    assert rec.timestamp_type == (0 if magic else None)
@@ -1,4 +1,5 @@
 import pytest
+from aiokafka.errors import CorruptRecordException
 from aiokafka.record.default_records import (
     DefaultRecordBatch, DefaultRecordBatchBuilder
 )
@@ -24,6 +25,8 @@ def test_read_write_serde_v2(compression_type, crc):
     reader = DefaultRecordBatch(bytes(buffer))
     assert reader.validate_crc()
     msgs = list(reader)
+    # Raw data is preserved after decompression
+    assert reader.raw_bytes() == bytes(buffer)
 
     assert reader.is_transactional is True
     assert reader.is_control_batch is False
@@ -203,3 +206,76 @@ def test_set_producer_state():
     assert reader.producer_id == 700
     assert reader.producer_epoch == 5
     assert reader.base_sequence == 17
+
+
+@pytest.mark.parametrize("compression_type", [
+    DefaultRecordBatch.CODEC_NONE,
+    DefaultRecordBatch.CODEC_GZIP,
+])
+def test_to_columns(compression_type):
+    builder = DefaultRecordBatchBuilder(
+        magic=2, compression_type=compression_type, is_transactional=0,
+        producer_id=-1, producer_epoch=-1, base_sequence=-1,
+        batch_size=999999)
+    builder.append(0, timestamp=100, key=b"k0", value=b"value0", headers=[])
+    builder.append(
+        1, timestamp=101, key=None, value=b"value1",
+        headers=[("header", b"ignored")])
+    builder.append(2, timestamp=102, key=b"", value=None, headers=[])
+    buffer = bytes(builder.build())
+
+    columns = DefaultRecordBatch(buffer).to_columns()
+    assert list(columns.offsets) == [0, 1, 2]
+    assert list(columns.timestamps) == [100, 101, 102]
+    assert list(columns.key_lengths) == [2, -1, 0]
+    assert list(columns.value_lengths) == [6, 6, -1]
+    data = bytes(columns.data)
+    assert data == b"k0value0value1"
+    assert [
+        data[pos:pos + size] for pos, size in
+        zip(columns.key_offsets, columns.key_lengths) if size >= 0
+    ] == [b"k0", b""]
+    assert [
+        data[pos:pos + size] for pos, size in
+        zip(columns.value_offsets, columns.value_lengths) if size >= 0
+    ] == [b"value0", b"value1"]
+    # Buffers can be shared without copies
+    assert memoryview(columns.offsets).itemsize == 8
+    assert memoryview(columns.key_lengths).itemsize == 4
+
+    # Append to existing columns skipping records below min_offset
+    columns = DefaultRecordBatch(buffer).to_columns(columns, min_offset=2)
+    assert list(columns.offsets) == [0, 1, 2, 2]
+    assert list(columns.key_offsets)[-1] == len(data)
+    assert bytes(columns.data) == data
+
+
+def test_to_columns_corrupt():
+    builder = DefaultRecordBatchBuilder(
+        magic=2, compression_type=0, is_transactional=0,
+        producer_id=-1, producer_epoch=-1, base_sequence=-1,
+        batch_size=999999)
+    builder.append(0, timestamp=None, key=None, value=b"value", headers=[])
+    buffer = builder.build()
+    # Increase record count, so the batch is shorter than expected
+    buffer[57:61] = (2).to_bytes(4, "big")
+
+    with pytest.raises(CorruptRecordException):
+        DefaultRecordBatch(bytes(buffer)).to_columns()
+
+
+@pytest.mark.parametrize("size_pos", [-3, -2])
+def test_to_columns_invalid_size(size_pos):
+    builder = DefaultRecordBatchBuilder(
+        magic=2, compression_type=0, is_transactional=0,
+        producer_id=-1, producer_epoch=-1, base_sequence=-1,
+        batch_size=999999)
+    builder.append(0, timestamp=None, key=None, value=None, headers=[])
+    buffer = builder.build()
+    # Key and value sizes are the last varints before the header count.
+    # Zig-zag encoded 3 is -2, which is not a valid size
+    assert buffer[size_pos] == 1
+    buffer[size_pos] = 3
+
+    with pytest.raises(CorruptRecordException):
+        DefaultRecordBatch(bytes(buffer)).to_columns()
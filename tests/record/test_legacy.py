@@ -68,6 +68,8 @@ def test_read_write_serde_v0_v1_with_compression(compression_type, magic):
     assert batch.next_offset == 10
 
     msgs = list(batch)
+    # Raw data is preserved after decompression
+    assert batch.raw_bytes() == bytes(buffer)
 
     for offset, msg in enumerate(msgs):
         assert msg.offset == offset
@@ -261,6 +263,22 @@ def test_reader_corrupt_record_v0_v1(magic):
         list(batch)
 
 
+@pytest.mark.parametrize("magic", [0, 1])
+@pytest.mark.parametrize("size_offset", [0, 4])
+def test_reader_invalid_size_v0_v1(magic, size_offset):
+    builder = LegacyRecordBatchBuilder(
+        magic=magic, compression_type=0, batch_size=9999999)
+    builder.append(0, timestamp=9999999, key=None, value=None)
+    buffer = builder.build()
+    # Size -2 for the key or the value is not valid
+    key_offset = 26 if magic else 18
+    struct.pack_into(">i", buffer, key_offset + size_offset, -2)
+
+    with pytest.raises(CorruptRecordException, match="Invalid"):
+        batch = LegacyRecordBatch(bytes(buffer), magic)
+        list(batch)
+
+
 def test_record_overhead():
     known = {
         0: 14,
@@ -132,6 +132,37 @@ def test_memory_records_v0():
     assert records.next_batch() is None
 
 
+@pytest.mark.parametrize("data", [
+    record_batch_data_v2, record_batch_data_v1, record_batch_data_v0])
+def test_memory_records_from_buffer(data):
+    # Records can be parsed from any buffer, e.g. a pooled receive buffer
+    data_bytes = b"".join(data)
+    buf = bytearray(data_bytes + b"\x00" * 10)
+    view = memoryview(buf)[:len(data_bytes)]
+    records = MemoryRecords(view)
+    assert records.size_in_bytes() == len(data_bytes)
+
+    values = []
+    while records.has_next():
+        values.extend(type(rec.value) for rec in records.next_batch())
+    assert values and set(values) == {bytes}
+
+    del records
+    view.release()
+
+
+def test_memory_records_tail():
+    data_bytes = b"".join(record_batch_data_v2) + b"\x00" * 4
+    records = MemoryRecords(data_bytes)
+    assert records.tail() == data_bytes
+
+    records.next_batch()
+    assert records.tail() == data_bytes[len(record_batch_data_v2[0]):]
+    records.next_batch()
+    records.next_batch()
+    assert records.tail() == b"\x00" * 4
+
+
 def test_memory_records_corrupt():
     records = MemoryRecords(b"")
     assert records.size_in_bytes() == 0
@@ -0,0 +1,334 @@
+from unittest import mock
+
+from kafka.coordinator.protocol import ConsumerProtocolMemberMetadata
+from kafka.protocol.metadata import MetadataResponse_v1 as MetadataResponse
+
+from aiokafka.cluster import ClusterMetadata
+
+from aiokafka.consumer.assignors import (
+    CooperativeStickyAssignor, LagAwarePartitionAssignor, MemberState,
+    RackAwarePartitionAssignor, RebalanceProtocol, StickyAssignorUserData_v0,
+    StickyPartitionAssignor, decode_member_metadata, encode_member_metadata,
+    rebalance_protocol)
+from aiokafka.structs import TopicPartition
+
+
+def _cluster(partitions_per_topic):
+    cluster = mock.Mock()
+    cluster.partitions_for_topic.side_effect = \
+        lambda topic: set(range(partitions_per_topic[topic]))
+    return cluster
+
+
+def _member(topics, owned=()):
+    metadata = CooperativeStickyAssignor.metadata(topics)
+    return decode_member_metadata(encode_member_metadata(metadata, owned))
+
+
+def _assigned(assignment):
+    return {
+        member_id: {
+            TopicPartition(topic, p)
+            for topic, partitions in member_assignment.assignment
+            for p in partitions}
+        for member_id, member_assignment in assignment.items()}
+
+
+def test_member_metadata_versions():
+    tp0 = TopicPartition("t1", 0)
+    tp1 = TopicPartition("t1", 1)
+    v0 = ConsumerProtocolMemberMetadata(0, ["t1", "t2"], b"data")
+
+    metadata = decode_member_metadata(v0.encode())
+    assert metadata.version == 0
+    assert metadata.subscription == ["t1", "t2"]
+    assert metadata.user_data == b"data"
+    assert metadata.owned_topic_partitions() == []
+
+    data = encode_member_metadata(v0.encode(), [tp1, tp0])
+    metadata = decode_member_metadata(data)
+    assert metadata.version == 1
+    assert metadata.user_data == b"data"
+    assert metadata.owned_topic_partitions() == [tp0, tp1]
+
+    # Old members can still parse the new format
+    metadata = ConsumerProtocolMemberMetadata.decode(data)
+    assert metadata.subscription == ["t1", "t2"]
+    assert metadata.user_data == b"data"
+
+
+def test_rebalance_protocol():
+    from kafka.coordinator.assignors.roundrobin import \
+        RoundRobinPartitionAssignor
+
+    assert rebalance_protocol([CooperativeStickyAssignor]) == \
+        RebalanceProtocol.COOPERATIVE
+    assert rebalance_protocol(
+        [CooperativeStickyAssignor, RoundRobinPartitionAssignor]) == \
+        RebalanceProtocol.EAGER
+
+
+def test_cooperative_sticky_assign_balanced():
+    cluster = _cluster({"t1": 4, "t2": 3})
+    members = {
+        "m1": _member(["t1", "t2"]),
+        "m2": _member(["t1", "t2"]),
+        "m3": _member(["t1"]),
+    }
+    assigned = _assigned(CooperativeStickyAssignor.assign(cluster, members))
+    all_tps = set().union(*assigned.values())
+    assert len(all_tps) == 7
+    assert sum(len(tps) for tps in assigned.values()) == 7
+    assert {len(tps) for tps in assigned.values()} <= {2, 3}
+    assert all(tp.topic == "t1" for tp in assigned["m3"])
+
+
+def test_cooperative_sticky_new_member():
+    cluster = _cluster({"t1": 4})
+    tps = [TopicPartition("t1", p) for p in range(4)]
+    members = {
+        "m1": _member(["t1"], owned=tps),
+        "m2": _member(["t1"]),
+    }
+    # Moved partitions are withheld until the owner revokes them
+    assigned = _assigned(CooperativeStickyAssignor.assign(cluster, members))
+    assert len(assigned["m1"]) == 2
+    assert assigned["m1"] < set(tps)
+    assert assigned["m2"] == set()
+
+    # Follow-up rebalance after the revocation
+    members = {
+        "m1": _member(["t1"], owned=assigned["m1"]),
+        "m2": _member(["t1"]),
+    }
+    follow_up = _assigned(CooperativeStickyAssignor.assign(cluster, members))
+    assert follow_up["m1"] == assigned["m1"]
+    assert follow_up["m2"] == set(tps) - assigned["m1"]
+
+
+def test_cooperative_sticky_conflicting_owners():
+    cluster = _cluster({"t1": 2})
+    tp0 = TopicPartition("t1", 0)
+    tp1 = TopicPartition("t1", 1)
+    members = {
+        "m1": _member(["t1"], owned=[tp0]),
+        "m2": _member(["t1"], owned=[tp0, tp1]),
+    }
+    assigned = _assigned(CooperativeStickyAssignor.assign(cluster, members))
+    assert assigned == {"m1": {tp0}, "m2": {tp1}}
+
+
+def _sticky_member(topics, previous=(), generation=-1):
+    metadata = StickyPartitionAssignor.member_metadata(
+        topics, MemberState(previous, generation, None, {}))
+    return decode_member_metadata(metadata.encode())
+
+
+def test_sticky_user_data():
+    tp0 = TopicPartition("t1", 0)
+    tp1 = TopicPartition("t1", 1)
+    metadata = _sticky_member(["t1"], [tp1, tp0], 5)
+    assert StickyPartitionAssignor.parse_user_data(metadata.user_data) == \
+        ([tp0, tp1], 5)
+
+    # Version 0 has no generation
+    user_data = StickyAssignorUserData_v0([("t1", [1])])
+    assert StickyPartitionAssignor.parse_user_data(user_data.encode()) == \
+        ([tp1], -1)
+
+    assert StickyPartitionAssignor.parse_user_data(b"") == ([], -1)
+    metadata = StickyPartitionAssignor.metadata(["t1"])
+    metadata = decode_member_metadata(metadata.encode())
+    assert StickyPartitionAssignor.parse_user_data(metadata.user_data) == \
+        ([], -1)
+
+
+def test_sticky_assign_minimal_movement():
+    cluster = _cluster({"t1": 6, "t2": 6})
+    members = {
+        "m1": _sticky_member(["t1", "t2"]),
+        "m2": _sticky_member(["t1", "t2"]),
+        "m3": _sticky_member(["t1", "t2"]),
+    }
+    first = _assigned(StickyPartitionAssignor.assign(cluster, members))
+    assert [len(first[m]) for m in sorted(first)] == [4, 4, 4]
+
+    # A member leaves: only its partitions move
+    members = {
+        "m1": _sticky_member(["t1", "t2"], first["m1"], 1),
+        "m2": _sticky_member(["t1", "t2"], first["m2"], 1),
+    }
+    second = _assigned(StickyPartitionAssignor.assign(cluster, members))
+    assert second["m1"] >= first["m1"]
+    assert second["m2"] >= first["m2"]
+    assert len(second["m1"]) == len(second["m2"]) == 6
+
+    # A member joins: it only takes partitions needed for balance
+    members = {
+        "m1": _sticky_member(["t1", "t2"], second["m1"], 2),
+        "m2": _sticky_member(["t1", "t2"], second["m2"], 2),
+        "m3": _sticky_member(["t1", "t2"]),
+    }
+    third = _assigned(StickyPartitionAssignor.assign(cluster, members))
+    assert [len(third[m]) for m in sorted(third)] == [4, 4, 4]
+    assert third["m1"] <= second["m1"]
+    assert third["m2"] <= second["m2"]
+
+
+def test_sticky_assign_generation_conflict():
+    cluster = _cluster({"t1": 2})
+    tp0 = TopicPartition("t1", 0)
+    tp1 = TopicPartition("t1", 1)
+    members = {
+        "m1": _sticky_member(["t1"], [tp0, tp1], 1),
+        "m2": _sticky_member(["t1"], [tp1], 2),
+    }
+    assigned = _assigned(StickyPartitionAssignor.assign(cluster, members))
+    assert assigned == {"m1": {tp0}, "m2": {tp1}}
+
+
+def test_sticky_assign_unequal_subscriptions():
+    cluster = _cluster({"t1": 2, "t2": 4})
+    members = {
+        "m1": _sticky_member(["t1"]),
+        "m2": _sticky_member(["t1", "t2"]),
+        "m3": _sticky_member(["t2"]),
+    }
+    assigned = _assigned(StickyPartitionAssignor.assign(cluster, members))
+    assert {len(tps) for tps in assigned.values()} == {2}
+    assert all(tp.topic == "t1" for tp in assigned["m1"])
+    assert all(tp.topic == "t2" for tp in assigned["m3"])
+
+
+def test_sticky_assign_large_group():
+    cluster = _cluster({"t{}".format(i): 100 for i in range(50)})
+    topics = ["t{}".format(i) for i in range(50)]
+    member_ids = ["m{:03}".format(i) for i in range(300)]
+    members = {m: _sticky_member(topics) for m in member_ids}
+    first = _assigned(StickyPartitionAssignor.assign(cluster, members))
+    assert {len(tps) for tps in first.values()} == {16, 17}
+
+    # Half of the members restart with a new member id
+    members = {
+        m: _sticky_member(topics, first[m], 1) for m in member_ids[::2]}
+    members.update({
+        m + "-new": _sticky_member(topics) for m in member_ids[1::2]})
+    second = _assigned(StickyPartitionAssignor.assign(cluster, members))
+    assert {len(tps) for tps in second.values()} == {16, 17}
+    for m in member_ids[::2]:
+        assert second[m] == first[m]
+
+
+def _rack_cluster(partitions):
+    # Brokers 0, 1 and 2 are in racks "a", "b" and "c"
+    brokers = [(node_id, "localhost", 9092 + node_id, rack)
+               for node_id, rack in enumerate("abc")]
+    topics = [
+        (0, "t1", False, [
+            (0, partition, replicas[0], replicas, replicas)
+            for partition, replicas in enumerate(partitions)])]
+    cluster = ClusterMetadata()
+    cluster.update_metadata(MetadataResponse(brokers, 0, topics))
+    return cluster
+
+
+def _rack_member(topics, rack):
+    metadata = RackAwarePartitionAssignor.member_metadata(
+        topics, MemberState((), -1, rack, {}))
+    return decode_member_metadata(metadata.encode())
+
+
+def test_cluster_racks_for_partition():
+    cluster = _rack_cluster([[0, 1], [2, 0, 5]])
+    assert cluster.racks_for_partition(TopicPartition("t1", 0)) == \
+        ("a", {"a", "b"})
+    # Unknown brokers are skipped
+    assert cluster.racks_for_partition(TopicPartition("t1", 1)) == \
+        ("c", {"a", "c"})
+    assert cluster.racks_for_partition(TopicPartition("t1", 2)) is None
+    assert cluster.racks_for_partition(TopicPartition("t2", 0)) is None
+
+
+def test_rack_aware_assign():
+    # Leaders: 3 partitions in rack "a", 2 in "b" and 1 in "c"
+    cluster = _rack_cluster(
+        [[0, 1], [0, 1], [0, 2], [1, 2], [1, 0], [2, 0]])
+    members = {
+        "m1": _rack_member(["t1"], "a"),
+        "m2": _rack_member(["t1"], "b"),
+        "m3": _rack_member(["t1"], "c"),
+    }
+    assert RackAwarePartitionAssignor.parse_user_data(
+        members["m1"].user_data) == "a"
+    assigned = _assigned(RackAwarePartitionAssignor.assign(cluster, members))
+    assert {len(tps) for tps in assigned.values()} == {2}
+
+    def leader_rack(tp):
+        return cluster.racks_for_partition(tp)[0]
+
+    # All of "b" and "c" leaders are local, one of "a" partitions has to go
+    # to "c", which has a replica of it.
+    assert {leader_rack(tp) for tp in assigned["m1"]} == {"a"}
+    assert {leader_rack(tp) for tp in assigned["m2"]} == {"b"}
+    assert {leader_rack(tp) for tp in assigned["m3"]} == {"a", "c"}
+    for tp in assigned["m3"]:
+        assert "c" in cluster.racks_for_partition(tp)[1]
+
+
+def test_rack_aware_assign_no_racks():
+    cluster = _rack_cluster([[0], [0], [0], [0]])
+    members = {
+        "m1": _rack_member(["t1"], None),
+        "m2": _rack_member(["t1"], "d"),
+        "m3": _rack_member(["t1"], "a"),
+    }
+    assigned = _assigned(RackAwarePartitionAssignor.assign(cluster, members))
+    assert sorted(len(tps) for tps in assigned.values()) == [1, 1, 2]
+    assert len(assigned["m3"]) == 2
+
+
+def _lag_member(topics, stats):
+    metadata = LagAwarePartitionAssignor.member_metadata(
+        topics, MemberState((), -1, None, stats))
+    return decode_member_metadata(metadata.encode())
+
+
+def test_lag_aware_user_data():
+    tp0 = TopicPartition("t1", 0)
+    tp1 = TopicPartition("t1", 1)
+    metadata = _lag_member(["t1"], {tp0: (2.5, 10), tp1: (None, None)})
+    assert LagAwarePartitionAssignor.parse_user_data(metadata.user_data) == \
+        {tp0: (3, 10), tp1: (None, None)}
+    assert LagAwarePartitionAssignor.parse_user_data(b"") == {}
+
+
+def test_lag_aware_assign_by_weight():
+    cluster = _cluster({"t1": 6})
+    tps = [TopicPartition("t1", p) for p in range(6)]
+    # 1 hot partition, 1 lagging one and 4 cold ones
+    members = {
+        "m1": _lag_member(["t1"], {
+            tps[0]: (1000, 0), tps[1]: (10, 0), tps[2]: (10, 0)}),
+        "m2": _lag_member(["t1"], {
+            tps[3]: (10, 60000), tps[4]: (10, 0), tps[5]: (10, 0)}),
+        "m3": _lag_member(["t1"], {}),
+    }
+    assigned = _assigned(LagAwarePartitionAssignor.assign(cluster, members))
+    hot = [m for m in assigned if tps[0] in assigned[m]][0]
+    lagging = [m for m in assigned if tps[3] in assigned[m]][0]
+    assert assigned[hot] == {tps[0]}
+    assert assigned[lagging] == {tps[3]}
+    assert len({hot, lagging}) == 2
+    assert sum(len(p) for p in assigned.values()) == 6
+
+
+def test_lag_aware_assign_unknown_weights():
+    # Without any reports partitions are spread evenly
+    cluster = _cluster({"t1": 4, "t2": 5})
+    members = {
+        "m1": _lag_member(["t1", "t2"], {}),
+        "m2": _lag_member(["t1", "t2"], {}),
+        "m3": _lag_member(["t1", "t2"], {}),
+    }
+    assigned = _assigned(LagAwarePartitionAssignor.assign(cluster, members))
+    assert [len(assigned[m]) for m in sorted(assigned)] == [3, 3, 3]
@@ -1,7 +1,9 @@
 import asyncio
+import os
 import pytest
 import unittest
 import socket
+import tempfile
 import types
 from unittest import mock
 
@@ -11,11 +13,14 @@ from kafka.errors import (
 )
 from kafka.protocol.metadata import (
     MetadataRequest_v0 as MetadataRequest,
-    MetadataResponse_v0 as MetadataResponse)
+    MetadataResponse_v0 as MetadataResponse,
+    MetadataResponse_v1)
 from kafka.protocol.fetch import FetchRequest_v0
 
 from aiokafka.client import AIOKafkaClient, ConnectionGroup, CoordinationType
+from aiokafka.cluster import ClusterMetadata, MetadataCache
 from aiokafka.conn import AIOKafkaConnection, CloseReason
+from aiokafka.structs import TopicPartition
 from aiokafka.util import ensure_future
 from ._testutil import KafkaIntegrationTestCase, run_until_complete
 
@@ -240,6 +245,411 @@ class TestAIOKafkaClient(unittest.TestCase):
         self.assertNotEqual(client.cluster.brokers(), set([]))
         self.assertEqual(client.cluster.brokers(), brokers_before)
 
+    @run_until_complete
+    async def test_client_shares(self):
+        client = AIOKafkaClient(
+            loop=self.loop, bootstrap_servers=['broker_1:4567'])
+        client.bootstrap = mock.Mock(side_effect=asyncio.coroutine(
+            lambda: None))
+        client.close = mock.Mock(side_effect=asyncio.coroutine(
+            lambda: None))
+        share1 = client.share()
+        share2 = client.share()
+        self.assertIs(share1.cluster, client.cluster)
+
+        # Bootstrapped once, by the first share started
+        share1.set_topics(["topic1"])
+        await share1.bootstrap()
+        await share2.bootstrap()
+        self.assertEqual(client.bootstrap.call_count, 1)
+        self.assertEqual(client._topics, {"topic1"})
+
+        # Metadata is fetched for topics of all shares
+        share2.add_topic("topic2")
+        self.assertEqual(client._topics, {"topic1", "topic2"})
+        share1.set_topics(["topic3"])
+        self.assertEqual(client._topics, {"topic2", "topic3"})
+        share1.set_topics([])
+        self.assertEqual(client._topics, set())
+
+        # Closed once all shares are closed
+        await share1.close()
+        self.assertEqual(client._topics, {"topic2"})
+        self.assertEqual(client.close.call_count, 0)
+        await share1.close()
+        await share2.close()
+        self.assertEqual(client.close.call_count, 1)
+
+    @run_until_complete
+    async def test_bootstrap_staggered(self):
+        brokers = [(0, 'broker_1', 4567), (1, 'broker_2', 5678)]
+        topics = [
+            (NO_ERROR, 'topic_1', [
+                (NO_ERROR, 0, 0, [0], [0]),
+                (NO_ERROR, 1, 1, [1], [1]),
+                (NO_ERROR, 2, 0, [0], [0]),
+            ]),
+            (NO_ERROR, 'topic_2', [(NO_ERROR, 0, 1, [1], [1])]),
+        ]
+        attempts = []
+        conns = {}
+        never = asyncio.Event(loop=self.loop)
+
+        async def create_conn(host, port, **kw):
+            attempts.append(host)
+            conn = conns[host] = mock.Mock()
+            if host == "hanging":
+                await never.wait()
+            elif host == "failing":
+                raise OSError("refused")
+
+            async def send(request):
+                await asyncio.sleep(0.01, loop=self.loop)
+                return MetadataResponse(brokers, topics)
+            conn.send.side_effect = send
+            return conn
+
+        client = AIOKafkaClient(
+            loop=self.loop, api_version="0.9", bootstrap_stagger_ms=50)
+        hosts = [(host, 1, socket.AF_INET)
+                 for host in ["hanging", "failing", "ok", "late"]]
+        with mock.patch("aiokafka.client.create_conn", create_conn), \
+                mock.patch("aiokafka.client.collect_hosts",
+                           return_value=hosts):
+            start = self.loop.time()
+            await client.bootstrap()
+        # Next server is tried after stagger delay or right after failure
+        self.assertLess(self.loop.time() - start, 0.2)
+        self.assertEqual(attempts, ["hanging", "failing", "ok"])
+        self.assertEqual(
+            {broker.nodeId for broker in client.cluster.brokers()}, {0, 1})
+        conns["ok"].close.assert_called_with()
+        self.assertFalse(conns["hanging"].send.called)
+        await client.close()
+
+        # All servers failed
+        client = AIOKafkaClient(
+            loop=self.loop, api_version="0.9",
+            bootstrap_servers=["failing:1", "failing:2"])
+        with mock.patch("aiokafka.client.create_conn", create_conn):
+            with self.assertRaises(KafkaConnectionError):
+                await client.bootstrap()
+
+    def test_metadata_cache(self):
+        brokers = [(0, 'broker_1', 4567, None), (1, 'broker_2', 5678, 'r1')]
+        topics = [
+            (NO_ERROR, 'topic_1', False, [
+                (NO_ERROR, 0, 0, [0, 1], [0, 1]),
+                (NO_LEADER, 1, -1, [1], []),
+            ]),
+            (NO_ERROR, '__consumer_offsets', True, [
+                (NO_ERROR, 0, 1, [1], [1])]),
+        ]
+        cluster = ClusterMetadata()
+        cluster.update_metadata(MetadataResponse_v1(brokers, 1, topics))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "cache.json")
+            cache = MetadataCache(path)
+            self.assertIsNone(cache.load("PLAINTEXT://a:1"))
+
+            cache.store("PLAINTEXT://a:1", (2, 3, 0), cluster)
+            cache.store("PLAINTEXT://b:1", (1, 0, 0), cluster)
+            api_version, metadata = cache.load("PLAINTEXT://a:1")
+            self.assertEqual(api_version, (2, 3, 0))
+            restored = ClusterMetadata()
+            restored.update_metadata(metadata)
+            self.assertEqual(restored.brokers(), cluster.brokers())
+            self.assertEqual(restored.controller, cluster.controller)
+            self.assertEqual(restored.internal_topics, {'__consumer_offsets'})
+            for tp in [TopicPartition('topic_1', 0),
+                       TopicPartition('topic_1', 1),
+                       TopicPartition('__consumer_offsets', 0)]:
+                self.assertEqual(
+                    restored.leader_for_partition(tp),
+                    cluster.leader_for_partition(tp))
+            self.assertEqual(
+                restored._partitions['topic_1'][0].replicas, [0, 1])
+
+            cache.invalidate("PLAINTEXT://a:1")
+            self.assertIsNone(cache.load("PLAINTEXT://a:1"))
+            self.assertEqual(cache.load("PLAINTEXT://b:1")[0], (1, 0, 0))
+
+            # Broken cache file is ignored
+            with open(path, "w") as f:
+                f.write("{broken")
+            self.assertIsNone(cache.load("PLAINTEXT://b:1"))
+            cache.store("PLAINTEXT://a:1", (2, 3, 0), cluster)
+            self.assertEqual(cache.load("PLAINTEXT://a:1")[0], (2, 3, 0))
+
+    @run_until_complete
+    async def test_bootstrap_from_metadata_cache(self):
+        brokers = [(0, 'broker_1', 4567, None)]
+        topics = [(NO_ERROR, 'topic_1', False, [
+            (NO_ERROR, 0, 0, [0], [0])])]
+        cluster = ClusterMetadata()
+        cluster.update_metadata(MetadataResponse_v1(brokers, 0, topics))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "cache.json")
+            MetadataCache(path).store(
+                "PLAINTEXT://broker_1:4567", (1, 0, 0), cluster)
+            client = AIOKafkaClient(
+                loop=self.loop, bootstrap_servers='broker_1:4567',
+                metadata_cache_path=path)
+            updated = asyncio.Event(loop=self.loop)
+
+            async def metadata_update(cluster_metadata, topics):
+                updated.set()
+                return True
+            client._metadata_update = mock.Mock(side_effect=metadata_update)
+            client._probe_api_version = mock.Mock(
+                side_effect=asyncio.coroutine(lambda: (2, 3, 0)))
+            client._bootstrap_any = mock.Mock()
+
+            # Cached version and layout are used without any requests
+            await client.bootstrap()
+            self.assertFalse(client._bootstrap_any.called)
+            self.assertEqual(client.api_version, (1, 0, 0))
+            self.assertEqual(
+                client.cluster.leader_for_partition(
+                    TopicPartition('topic_1', 0)), 0)
+
+            # Metadata is refreshed and version checked in background
+            await client._cache_check_task
+            self.assertTrue(updated.is_set())
+            await client._cache_write_task
+            cached_version, _ = MetadataCache(path).load(
+                "PLAINTEXT://broker_1:4567")
+            self.assertEqual(cached_version, (2, 3, 0))
+
+            # Cache is only written if metadata changed, off the loop
+            store_entry = mock.Mock(wraps=client._metadata_cache.store_entry)
+            client._metadata_cache.store_entry = store_entry
+            client._api_version = (2, 3, 0)
+            client._store_metadata_cache()
+            self.assertFalse(store_entry.called)
+            client.cluster.update_metadata(MetadataResponse_v1(
+                brokers, 0, [(NO_ERROR, 'topic_1', False, [
+                    (NO_ERROR, 0, 1, [0, 1], [0, 1])])]))
+            with mock.patch.object(
+                    self.loop, "run_in_executor",
+                    wraps=self.loop.run_in_executor) as run_in_executor:
+                client._store_metadata_cache()
+                await client._cache_write_task
+            run_in_executor.assert_called_once_with(
+                None, store_entry, "PLAINTEXT://broker_1:4567", mock.ANY)
+            _, metadata = MetadataCache(path).load(
+                "PLAINTEXT://broker_1:4567")
+            self.assertEqual(metadata.topics[0][3][0][2], 1)
+            await client.close()
+
+            # Cached brokers are gone
+            client = AIOKafkaClient(
+                loop=self.loop, bootstrap_servers='broker_1:4567',
+                metadata_cache_path=path)
+            client._metadata_update = mock.Mock(
+                side_effect=asyncio.coroutine(lambda *args: False))
+            client._probe_api_version = mock.Mock(
+                side_effect=asyncio.coroutine(lambda: (2, 3, 0)))
+            invalidate = mock.Mock(wraps=client._metadata_cache.invalidate)
+            client._metadata_cache.invalidate = invalidate
+
+            async def bootstrap_metadata():
+                client.cluster.update_metadata(MetadataResponse_v1(
+                    [(2, 'broker_2', 4567, None)], 2, []))
+            client._bootstrap_metadata = mock.Mock(
+                side_effect=bootstrap_metadata)
+            await client.bootstrap()
+            await client._cache_check_task
+            await client._cache_write_task
+            # Cache is invalidated and layout from bootstrap servers is used
+            invalidate.assert_called_with("PLAINTEXT://broker_1:4567")
+            _, metadata = MetadataCache(path).load(
+                "PLAINTEXT://broker_1:4567")
+            self.assertEqual(metadata.brokers, [(2, 'broker_2', 4567, None)])
+            await client.close()
+
+    def test_cluster_partial_update(self):
+        brokers = [(0, 'broker_1', 4567), (1, 'broker_2', 5678)]
+        cluster = ClusterMetadata()
+        changes = []
+        cluster.add_diff_listener(
+            lambda cluster, changed: changes.append(changed))
+        # Plain listeners are called with the cluster only
+        updated = []
+        cluster.add_listener(lambda cluster: updated.append(cluster))
+        cluster.update_metadata(MetadataResponse(brokers, [
+            (NO_ERROR, 'topic_1', [
+                (NO_ERROR, 0, 0, [0, 1], [0, 1]),
+                (NO_ERROR, 1, 1, [1, 0], [1, 0]),
+            ]),
+            (NO_ERROR, 'topic_2', [(NO_ERROR, 0, 1, [1], [1])]),
+        ]))
+        tp1_0 = TopicPartition('topic_1', 0)
+        tp1_1 = TopicPartition('topic_1', 1)
+        tp2_0 = TopicPartition('topic_2', 0)
+        self.assertEqual(changes.pop(), {tp1_0, tp1_1, tp2_0})
+
+        # Only topics in response are replaced
+        cluster.update_metadata(MetadataResponse(brokers, [
+            (NO_ERROR, 'topic_1', [
+                (NO_ERROR, 0, 1, [0, 1], [1]),
+                (NO_ERROR, 1, 1, [1, 0], [1, 0]),
+            ]),
+        ]), partial=True)
+        self.assertEqual(changes.pop(), {tp1_0})
+        self.assertEqual(cluster.leader_for_partition(tp1_0), 1)
+        self.assertEqual(cluster.leader_for_partition(tp2_0), 1)
+        self.assertEqual(
+            cluster.partitions_for_broker(1), {tp1_0, tp1_1, tp2_0})
+        self.assertIsNone(cluster.partitions_for_broker(0))
+
+        cluster.update_metadata(MetadataResponse(brokers, [
+            (UNKNOWN_TOPIC_OR_PARTITION, 'topic_2', []),
+        ]), partial=True)
+        self.assertEqual(changes.pop(), {tp2_0})
+        self.assertEqual(cluster.topics(), {'topic_1'})
+        self.assertEqual(cluster.partitions_for_broker(1), {tp1_0, tp1_1})
+
+        # Nothing changed
+        cluster.update_metadata(MetadataResponse(brokers, [
+            (NO_ERROR, 'topic_1', [
+                (NO_ERROR, 0, 1, [0, 1], [1]),
+                (NO_ERROR, 1, 1, [1, 0], [1, 0]),
+            ]),
+        ]))
+        self.assertEqual(changes.pop(), set())
+        self.assertEqual(updated, [cluster] * 4)
+
+    @run_until_complete
+    async def test_force_metadata_update_topics(self):
+        client = AIOKafkaClient(
+            loop=self.loop, bootstrap_servers=['broker_1:4567'])
+        client.set_topics(['topic_1', 'topic_2', 'topic_3'])
+        calls = []
+
+        async def metadata_update(cluster_metadata, topics, partial=False):
+            calls.append((set(topics), partial))
+            return True
+        client._metadata_update = mock.Mock(side_effect=metadata_update)
+        task = ensure_future(client._md_synchronizer(), loop=self.loop)
+        try:
+            await client.force_metadata_update()
+            calls.clear()
+
+            # Requested topics are merged into a single update
+            client.force_metadata_update(['topic_1'])
+            await client.force_metadata_update(['topic_2'])
+            self.assertEqual(calls, [({'topic_1', 'topic_2'}, True)])
+
+            # Full update overrides partial one
+            calls.clear()
+            client.force_metadata_update(['topic_1'])
+            await client.force_metadata_update()
+            self.assertEqual(
+                calls, [({'topic_1', 'topic_2', 'topic_3'}, False)])
+        finally:
+            task.cancel()
+            await asyncio.wait([task], loop=self.loop)
+
+    @run_until_complete
+    async def test_warm_up(self):
+        brokers = [(0, 'broker_1', 4567), (1, 'broker_2', 5678)]
+        topics = [
+            (NO_ERROR, 'topic_1', [
+                (NO_ERROR, 0, 0, [0], [0]),
+                (NO_LEADER, 1, -1, [], []),
+            ]),
+            (NO_ERROR, 'topic_2', [(NO_ERROR, 0, 1, [1], [1])]),
+        ]
+        client = AIOKafkaClient(
+            loop=self.loop, bootstrap_servers=['broker_1:4567'])
+        client.cluster.update_metadata(MetadataResponse(brokers, topics))
+        client._get_conn = mock.Mock(side_effect=asyncio.coroutine(
+            lambda node_id: None))
+
+        await client.warm_up(["topic_1", "unknown"])
+        client._get_conn.assert_called_once_with(0)
+
+        client._get_conn.reset_mock()
+        await client.warm_up()
+        self.assertEqual(
+            sorted(c[0][0] for c in client._get_conn.call_args_list), [0, 1])
+
+    @run_until_complete
+    async def test_reconnect_backoff(self):
+        brokers = [(0, 'broker_1', 4567)]
+        client = AIOKafkaClient(
+            loop=self.loop, bootstrap_servers=['broker_1:4567'],
+            reconnect_backoff_ms=100, reconnect_backoff_max_ms=300)
+        client.cluster.update_metadata(MetadataResponse(brokers, []))
+        client.force_metadata_update = mock.Mock()
+        conn = mock.Mock()
+        conn.connected.return_value = True
+
+        async def create_conn(host, port, **kw):
+            if fail:
+                raise OSError("Connection refused")
+            return conn
+
+        fail = True
+        with mock.patch("aiokafka.client.create_conn",
+                        side_effect=create_conn) as mocked:
+            self.assertIsNone(await client._get_conn(0))
+            self.assertEqual(mocked.call_count, 1)
+            client.force_metadata_update.assert_called_once_with()
+            delay = client.nodes_in_backoff()[0]
+            self.assertTrue(0.07 < delay <= 0.12)
+
+            # No connection attempts during backoff
+            self.assertIsNone(await client._get_conn(0))
+            self.assertEqual(mocked.call_count, 1)
+            with self.assertRaises(NodeNotReadyError):
+                await client.send(0, None)
+
+            # Backoff doubles on consecutive failures up to the max
+            retry_at = client._conn_backoff[(0, ConnectionGroup.DEFAULT)][1]
+            await asyncio.sleep(retry_at - self.loop.time(), loop=self.loop)
+            self.assertEqual(client.nodes_in_backoff(), {})
+            self.assertIsNone(await client._get_conn(0))
+            self.assertEqual(mocked.call_count, 2)
+            self.assertTrue(0.15 < client.nodes_in_backoff()[0] <= 0.24)
+            client._conn_backoff[(0, ConnectionGroup.DEFAULT)] = (5, 0)
+            self.assertIsNone(await client._get_conn(0))
+            self.assertTrue(client.nodes_in_backoff()[0] <= 0.36)
+            # Metadata is only refreshed on the first failure
+            self.assertEqual(client.force_metadata_update.call_count, 1)
+
+            # Successful connection resets the backoff
+            fail = False
+            client._conn_backoff[(0, ConnectionGroup.DEFAULT)] = (6, 0)
+            self.assertIs(await client._get_conn(0), conn)
+            self.assertEqual(client._conn_backoff, {})
+
+    def test_throttle(self):
+        client = AIOKafkaClient(
+            loop=self.loop, bootstrap_servers=['broker_1:4567'])
+        now = self.loop.time()
+        client.throttle(0, 0, now)
+        self.assertEqual(client.throttle_stats(), {})
+
+        # Broker delayed the response by the whole throttle time already
+        client.throttle(0, 500, now - 0.5)
+        self.assertEqual(client.nodes_in_backoff(), {})
+        self.assertEqual(client.throttle_stats(), {0: (1, 500, 0)})
+
+        client.throttle(0, 1000, now)
+        self.assertTrue(0.9 < client.nodes_in_backoff()[0] <= 1)
+        stats = client.throttle_stats()[0]
+        self.assertEqual(stats.throttled_responses, 2)
+        self.assertEqual(stats.throttle_time_ms, 1500)
+        self.assertTrue(900 < stats.muted_ms <= 1000)
+
+        # Shorter throttle does not unmute the node earlier
+        client.throttle(0, 100, now)
+        self.assertTrue(0.9 < client.nodes_in_backoff()[0] <= 1)
+
 
 class TestKafkaClientIntegration(KafkaIntegrationTestCase):
 
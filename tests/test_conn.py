@@ -15,13 +15,18 @@ from kafka.protocol.admin import (
     SaslAuthenticateResponse
 )
 
-from aiokafka.conn import AIOKafkaConnection, create_conn, VersionInfo
+from aiokafka.conn import (
+    AIOKafkaConnection, create_conn, VersionInfo, ReceiveBufferPool,
+    FrameReader)
+from aiokafka.protocol.fetch import (
+    FetchRequest_v4 as FetchRequest, FetchResponse_v4 as FetchResponse)
 from aiokafka.errors import (
     KafkaConnectionError, CorrelationIdError, KafkaError, NoError,
     UnknownError, UnsupportedSaslMechanismError, IllegalSaslStateError
 )
 from aiokafka.record.legacy_records import LegacyRecordBatchBuilder
 from ._testutil import KafkaIntegrationTestCase, run_until_complete
+from aiokafka.util import ensure_future
 from aiokafka.protocol.produce import ProduceRequest_v0 as ProduceRequest
 
 
@@ -36,6 +41,163 @@ class ConnTest(unittest.TestCase):
         self.assertIsNone(conn._reader)
         self.assertIsNone(conn._writer)
 
+    @run_until_complete
+    async def test_send_stream_fetch_response(self):
+        int32 = struct.Struct('>i')
+        conn = AIOKafkaConnection('localhost', 1234, loop=self.loop)
+        conn._reader = reader = asyncio.StreamReader(loop=self.loop)
+        conn._writer = mock.MagicMock()
+        conn._read_task = conn._create_reader_task()
+        self.addCleanup(conn.close)
+
+        request = FetchRequest(
+            -1, 100, 100, 1000, 0, [("topic", [(0, 0, 1000), (1, 0, 1000)])])
+        response = FetchResponse(10, [
+            ("topic", [
+                (0, 0, 10, 10, [(1, 2), (3, 4)], b"records"),
+                (1, 0, 10, 10, None, None),
+            ]),
+            ("other", []),
+        ])
+        body = int32.pack(1) + response.encode()
+
+        fut = ensure_future(conn.send(request, stream=True), loop=self.loop)
+        await asyncio.sleep(0, loop=self.loop)
+        reader.feed_data(int32.pack(len(body)) + body[:20])
+        stream = await fut
+        self.assertEqual(stream.throttle_time_ms, 10)
+        reader.feed_data(body[20:])
+        partitions = []
+        async for topic, partition_data, buffer in stream:
+            partitions.append((topic, partition_data, buffer))
+        self.assertEqual(partitions, [
+            ("topic", (0, 0, 10, 10, [(1, 2), (3, 4)], b"records"), None),
+            ("topic", (1, 0, 10, 10, None, None), None),
+        ])
+
+        # Next frames are read as usual
+        meta_fut = ensure_future(
+            conn.send(MetadataRequest([])), loop=self.loop)
+        await asyncio.sleep(0, loop=self.loop)
+        meta = MetadataResponse(brokers=[], topics=[])
+        body = int32.pack(2) + meta.encode()
+        reader.feed_data(int32.pack(len(body)) + body)
+        meta = await meta_fut
+        self.assertEqual(meta.topics, [])
+
+        # Connection errors are propagated to the partially read stream
+        fut = ensure_future(conn.send(request, stream=True), loop=self.loop)
+        await asyncio.sleep(0, loop=self.loop)
+        body = int32.pack(3) + response.encode()
+        reader.feed_data(int32.pack(len(body)) + body[:30])
+        stream = await fut
+        conn.close()
+        with self.assertRaises(KafkaConnectionError):
+            async for _ in stream:
+                pass
+
+    @run_until_complete
+    async def test_send_stream_fetch_response_timeout(self):
+        int32 = struct.Struct('>i')
+        conn = AIOKafkaConnection(
+            'localhost', 1234, loop=self.loop, request_timeout_ms=100)
+        conn._reader = reader = asyncio.StreamReader(loop=self.loop)
+        conn._writer = mock.MagicMock()
+        conn._read_task = conn._create_reader_task()
+        self.addCleanup(conn.close)
+
+        request = FetchRequest(
+            -1, 100, 100, 1000, 0, [("topic", [(0, 0, 1000), (1, 0, 1000)])])
+        response = FetchResponse(10, [
+            ("topic", [
+                (0, 0, 10, 10, None, b"records"),
+                (1, 0, 10, 10, None, None),
+            ]),
+        ])
+        body = int32.pack(1) + response.encode()
+
+        # Broker stalls after the first partition
+        fut = ensure_future(conn.send(request, stream=True), loop=self.loop)
+        await asyncio.sleep(0, loop=self.loop)
+        reader.feed_data(int32.pack(len(body)) + body[:-20])
+        stream = await fut
+        partitions = []
+        start = self.loop.time()
+        with self.assertRaises(KafkaConnectionError):
+            async for topic, partition_data, _ in stream:
+                partitions.append(partition_data[0])
+        self.assertEqual(partitions, [0])
+        self.assertLess(self.loop.time() - start, 0.5)
+        self.assertFalse(conn.connected())
+
+    @run_until_complete
+    async def test_receive_buffer_pool(self):
+        pool = ReceiveBufferPool(min_size=16, max_size=128)
+        reader = asyncio.StreamReader(loop=self.loop)
+        fut = ensure_future(pool.readexactly(reader, 20), loop=self.loop)
+        reader.feed_data(b"x" * 15)
+        await asyncio.sleep(0, loop=self.loop)
+        reader.feed_data(b"y" * 10)
+        buffer = await fut
+        self.assertEqual(bytes(buffer.view), b"x" * 15 + b"y" * 5)
+        self.assertEqual(await reader.read(5), b"y" * 5)
+
+        # Released buffers are reused
+        data = buffer._data
+        self.assertEqual(len(data), 32)
+        buffer.acquire()
+        buffer.release()
+        self.assertEqual(pool._pooled_bytes, 0)
+        buffer.release()
+        self.assertEqual(pool._pooled_bytes, 32)
+        self.assertIs(pool.allocate(30)._data, data)
+        self.assertEqual(pool._pooled_bytes, 0)
+
+        # Buffers still referenced by someone are not reused
+        buffer = pool.allocate(20)
+        data_view = buffer.view[:10]
+        buffer.release()
+        self.assertEqual(pool._pooled_bytes, 0)
+        del data_view
+
+        # Too large buffers are not pooled
+        buffer = pool.allocate(200)
+        self.assertEqual(len(buffer.view), 200)
+        buffer.release()
+        self.assertEqual(pool._pooled_bytes, 0)
+
+        reader.feed_data(b"z" * 10)
+        reader.feed_eof()
+        with self.assertRaises(asyncio.IncompleteReadError):
+            await pool.readexactly(reader, 20)
+
+    @run_until_complete
+    async def test_decode_pooled_frame(self):
+        int32 = struct.Struct('>i')
+        pool = ReceiveBufferPool(min_size=16, max_size=1024)
+        conn = AIOKafkaConnection(
+            'localhost', 1234, loop=self.loop, buffer_pool=pool)
+        conn._reader = reader = asyncio.StreamReader(loop=self.loop)
+        conn._writer = mock.MagicMock()
+        conn._read_task = conn._create_reader_task()
+        self.addCleanup(conn.close)
+
+        fut = ensure_future(conn.send(MetadataRequest([])), loop=self.loop)
+        await asyncio.sleep(0, loop=self.loop)
+        meta = MetadataResponse(
+            brokers=[(0, "broker_" * 10, 9092)], topics=[])
+        body = int32.pack(1) + meta.encode()
+        reader.feed_data(int32.pack(len(body)) + body)
+        meta = await fut
+        self.assertEqual(meta.brokers, [(0, "broker_" * 10, 9092)])
+        # Decoded values don't keep the buffer, so it's reused
+        self.assertEqual(pool._pooled_bytes, 128)
+
+        reader = FrameReader(bytearray(b"abcdef"), 2)
+        self.assertEqual(reader.read(2), b"cd")
+        self.assertIsInstance(reader.read(), bytes)
+        self.assertEqual(reader.read(1), b"")
+
 
 @pytest.mark.usefixtures('setup_test_class')
 class ConnIntegrationTest(KafkaIntegrationTestCase):
@@ -635,6 +635,42 @@ class TestConsumerIntegration(KafkaIntegrationTestCase):
         pos = await consumer.position(tp)
         self.assertEqual(pos, start_position + 7)
 
+    @run_until_complete
+    async def test_consumer_ack_out_of_order(self):
+        await self.send_messages(0, range(0, 10))
+        tp = TopicPartition(self.topic, 0)
+        consumer = AIOKafkaConsumer(
+            loop=self.loop, group_id="group-ack",
+            bootstrap_servers=self.hosts, enable_auto_commit=False,
+            max_unacked_offsets=100)
+        await consumer.start()
+        self.add_cleanup(consumer.stop)
+        consumer.assign([tp])
+        await consumer.seek_to_beginning(tp)
+
+        records = []
+        while len(records) < 10:
+            data = await consumer.getmany(tp, timeout_ms=1000)
+            records.extend(data.get(tp, []))
+
+        # Only offsets up to the first unacknowledged record are committed
+        consumer.ack(*records[3:])
+        consumer.ack(records[1])
+        await consumer.commit()
+        self.assertEqual(await consumer.committed(tp), 0)
+        consumer.ack(records[0])
+        await consumer.commit()
+        self.assertEqual(await consumer.committed(tp), 2)
+        consumer.ack(records[2])
+        await consumer.commit()
+        self.assertEqual(await consumer.committed(tp), 10)
+
+        consumer = await self.consumer_factory()
+        with self.assertRaises(IllegalOperation):
+            consumer.ack(records[0])
+        with self.assertRaises(ValueError):
+            AIOKafkaConsumer(loop=self.loop, max_unacked_offsets=0)
+
     @run_until_complete
     async def test_consumer_seek_on_unassigned(self):
         tp0 = TopicPartition(self.topic, 0)
@@ -18,6 +18,7 @@ from ._testutil import KafkaIntegrationTestCase, run_until_complete
 
 from aiokafka import ConsumerRebalanceListener
 from aiokafka.client import AIOKafkaClient
+from aiokafka.errors import ConsumerStoppedError, FencedInstanceId
 from aiokafka.structs import OffsetAndMetadata, TopicPartition
 from aiokafka.consumer.group_coordinator import (
     GroupCoordinator, CoordinatorGroupRebalance, NoGroupCoordinator)
@@ -994,6 +995,225 @@ class TestKafkaCoordinatorIntegration(KafkaIntegrationTestCase):
         success = await coordinator._do_heartbeat()
         self.assertTrue(success)
 
+    @run_until_complete
+    async def test_coordinator_static_membership(self):
+        client = AIOKafkaClient(loop=self.loop, bootstrap_servers=self.hosts)
+        subscription = SubscriptionState(loop=self.loop)
+        subscription.subscribe(topics=set(['topic1']))
+        coordinator = GroupCoordinator(
+            client, subscription, loop=self.loop,
+            heartbeat_interval_ms=20000, group_instance_id="instance-1")
+        coordinator._coordination_task.cancel()  # disable for test
+        try:
+            await coordinator._coordination_task
+        except asyncio.CancelledError:
+            pass
+        coordinator._coordination_task = self.loop.create_task(
+            asyncio.sleep(0.1, loop=self.loop)
+        )
+        self.add_cleanup(coordinator.close)
+
+        coordinator._send_req = mocked = mock.Mock()
+        error = Errors.NoError()
+        sent = []
+
+        async def mock_send_req(request):
+            sent.append(request)
+            if request.API_KEY == OffsetCommitRequest[0].API_KEY:
+                return request.RESPONSE_TYPE(
+                    0, [("topic1", [(0, error.errno)])])
+            return request.RESPONSE_TYPE(0, error.errno)
+        mocked.side_effect = mock_send_req
+
+        coordinator.coordinator_id = 15
+        coordinator.generation = 1
+        coordinator.member_id = "some_member"
+
+        # Heartbeat and OffsetCommit carry the `group_instance_id`
+        success = await coordinator._do_heartbeat()
+        self.assertTrue(success)
+        self.assertEqual(sent[-1].API_VERSION, 3)
+        self.assertEqual(sent[-1].group_instance_id, "instance-1")
+
+        tp = TopicPartition("topic1", 0)
+        assignment = mock.Mock()
+        await coordinator._do_commit_offsets(
+            assignment, {tp: OffsetAndMetadata(10, "")})
+        self.assertEqual(sent[-1].API_VERSION, 7)
+        self.assertEqual(sent[-1].group_instance_id, "instance-1")
+        self.assertEqual(sent[-1].topics, [("topic1", [(0, 10, -1, "")])])
+
+        # Another instance with the same id fenced us
+        error = FencedInstanceId()
+        with self.assertRaises(FencedInstanceId) as cm:
+            await coordinator._do_heartbeat()
+        self.assertEqual(cm.exception.args[0], "instance-1")
+        with self.assertRaises(FencedInstanceId):
+            await coordinator._do_commit_offsets(
+                assignment, {tp: OffsetAndMetadata(10, "")})
+
+        # Static members don't leave the group
+        sent.clear()
+        await coordinator._maybe_leave_group()
+        self.assertEqual(sent, [])
+        self.assertEqual(coordinator.member_id, UNKNOWN_MEMBER_ID)
+
+    @run_until_complete
+    async def test_coordinator_commit_offsets_coalesce(self):
+        client = AIOKafkaClient(loop=self.loop, bootstrap_servers=self.hosts)
+        subscription = SubscriptionState(loop=self.loop)
+        subscription.subscribe(topics=set(['topic1']))
+        coordinator = GroupCoordinator(
+            client, subscription, loop=self.loop,
+            commit_min_interval_ms=200)
+        coordinator._coordination_task.cancel()  # disable for test
+        try:
+            await coordinator._coordination_task
+        except asyncio.CancelledError:
+            pass
+        coordinator._coordination_task = self.loop.create_task(
+            asyncio.sleep(0.1, loop=self.loop)
+        )
+        self.add_cleanup(coordinator.close)
+
+        sent = []
+        release = asyncio.Event(loop=self.loop)
+        error = None
+
+        async def mock_do_commit_offsets(assignment, offsets):
+            sent.append((self.loop.time(), dict(offsets)))
+            await release.wait()
+            release.clear()
+            if error is not None:
+                raise error
+        coordinator._do_commit_offsets = mock_do_commit_offsets
+        coordinator.coordinator_id = 15
+
+        tp0 = TopicPartition("topic1", 0)
+        tp1 = TopicPartition("topic1", 1)
+        assignment = mock.Mock()
+
+        def commit(**offsets):
+            offsets = {
+                TopicPartition("topic1", int(p[1:])): OffsetAndMetadata(o, "")
+                for p, o in offsets.items()}
+            return self.loop.create_task(
+                coordinator.commit_offsets(assignment, offsets))
+
+        # Concurrent calls are merged, keeping the highest offset
+        c1 = commit(p0=10, p1=5)
+        c2 = commit(p0=12)
+        c3 = commit(p0=11)
+        await asyncio.sleep(0.01, loop=self.loop)
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(sent[0][1], {
+            tp0: OffsetAndMetadata(12, ""), tp1: OffsetAndMetadata(5, "")})
+
+        # Calls made while a request is in flight wait for the next one,
+        # unless the request in flight already covers their offsets
+        c4 = commit(p0=12)
+        c5 = commit(p1=7)
+        c6 = commit(p1=8)
+        await asyncio.sleep(0.01, loop=self.loop)
+        release.set()
+        await asyncio.wait([c1, c2, c3, c4], loop=self.loop)
+        self.assertFalse(c5.done())
+        self.assertFalse(c6.done())
+
+        # Next request is delayed by `commit_min_interval_ms`
+        error = Errors.CommitFailedError()
+        await asyncio.sleep(0.3, loop=self.loop)
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(sent[1][1], {tp1: OffsetAndMetadata(8, "")})
+        self.assertGreaterEqual(sent[1][0] - sent[0][0], 0.2)
+
+        # Errors are propagated to all merged calls
+        release.set()
+        with self.assertRaises(Errors.CommitFailedError):
+            await c5
+        with self.assertRaises(Errors.CommitFailedError):
+            await c6
+        self.assertIsNone(coordinator._commit_task)
+
+        # Offsets of different assignments are never merged
+        error = None
+        c7 = commit(p0=20)
+        assignment = mock.Mock()
+        c8 = commit(p0=21)
+        await asyncio.sleep(0.3, loop=self.loop)
+        self.assertEqual(len(sent), 3)
+        release.set()
+        await asyncio.sleep(0.3, loop=self.loop)
+        release.set()
+        await asyncio.wait([c7, c8], loop=self.loop)
+        self.assertEqual(len(sent), 4)
+        self.assertEqual(sent[2][1], {tp0: OffsetAndMetadata(20, "")})
+        self.assertEqual(sent[3][1], {tp0: OffsetAndMetadata(21, "")})
+
+    @run_until_complete
+    async def test_coordinator_commit_offsets_urgent_and_close(self):
+        client = AIOKafkaClient(loop=self.loop, bootstrap_servers=self.hosts)
+        subscription = SubscriptionState(loop=self.loop)
+        subscription.subscribe(topics=set(['topic1']))
+        coordinator = GroupCoordinator(
+            client, subscription, loop=self.loop, retry_backoff_ms=10,
+            commit_min_interval_ms=10000)
+        coordinator._coordination_task.cancel()  # disable for test
+        try:
+            await coordinator._coordination_task
+        except asyncio.CancelledError:
+            pass
+        coordinator._coordination_task = self.loop.create_task(
+            asyncio.sleep(0.1, loop=self.loop)
+        )
+        self.add_cleanup(client.close)
+
+        sent = []
+        error = None
+
+        async def mock_do_commit_offsets(assignment, offsets):
+            sent.append(dict(offsets))
+            if error is not None:
+                raise error
+        coordinator._do_commit_offsets = mock_do_commit_offsets
+        coordinator.coordinator_id = 15
+        tp = TopicPartition("topic1", 0)
+        assignment = mock.Mock()
+        offsets = {tp: OffsetAndMetadata(10, "")}
+
+        await coordinator.commit_offsets(assignment, offsets)
+        # Next commit waits for `commit_min_interval_ms`, unless urgent
+        delayed = self.loop.create_task(
+            coordinator.commit_offsets(assignment, offsets))
+        await asyncio.sleep(0.05, loop=self.loop)
+        self.assertEqual(len(sent), 1)
+        await asyncio.wait_for(coordinator.commit_offsets(
+            assignment, offsets, urgent=True), 1, loop=self.loop)
+        await delayed
+        self.assertEqual(len(sent), 2)
+
+        # Retries stop once all callers are cancelled
+        error = Errors.RequestTimedOutError()
+        coordinator._last_commit_time = None
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(coordinator.commit_offsets(
+                assignment, offsets), 0.05, loop=self.loop)
+        await asyncio.sleep(0.05, loop=self.loop)
+        self.assertIsNone(coordinator._commit_task)
+        count = len(sent)
+        await asyncio.sleep(0.05, loop=self.loop)
+        self.assertEqual(len(sent), count)
+
+        # Close stops the commit routine and fails pending commits
+        pending = self.loop.create_task(
+            coordinator.commit_offsets(assignment, offsets))
+        await asyncio.sleep(0.05, loop=self.loop)
+        self.assertIsNotNone(coordinator._commit_task)
+        await coordinator.close()
+        self.assertIsNone(coordinator._commit_task)
+        with self.assertRaises(ConsumerStoppedError):
+            await pending
+
     @run_until_complete
     async def test_coordinator__heartbeat_routine(self):
         client = AIOKafkaClient(loop=self.loop, bootstrap_servers=self.hosts)
@@ -1201,6 +1421,69 @@ class TestKafkaCoordinatorIntegration(KafkaIntegrationTestCase):
         with self.assertRaises(Errors.KafkaError):
             await coordinator._maybe_do_autocommit(assignment)
 
+    @run_until_complete
+    async def test_coordinator_autocommit_changed_and_triggers(self):
+        client = AIOKafkaClient(loop=self.loop, bootstrap_servers=self.hosts)
+        subscription = SubscriptionState(loop=self.loop)
+        tp1 = TopicPartition("topic1", 0)
+        tp2 = TopicPartition("topic1", 1)
+        coordinator = GroupCoordinator(
+            client, subscription, loop=self.loop,
+            heartbeat_interval_ms=20000, auto_commit_interval_ms=60000,
+            auto_commit_max_records=10, auto_commit_max_bytes=1000)
+        coordinator._coordination_task.cancel()  # disable for test
+        try:
+            await coordinator._coordination_task
+        except asyncio.CancelledError:
+            pass
+        coordinator._coordination_task = self.loop.create_task(
+            asyncio.sleep(0.1, loop=self.loop)
+        )
+        self.add_cleanup(coordinator.close)
+
+        committed = []
+
+        async def do_commit(assignment, offsets):
+            if not offsets:
+                return
+            committed.append(offsets)
+            for tp, offset in offsets.items():
+                assignment.state_value(tp).update_committed(offset)
+        coordinator._do_commit_offsets = do_commit
+
+        subscription.assign_from_user({tp1, tp2})
+        assignment = subscription.subscription.assignment
+        assignment.state_value(tp1).seek(5)
+        assignment.state_value(tp2).seek(7)
+        assignment.state_value(tp2).update_committed(
+            OffsetAndMetadata(7, ""))
+
+        # Partitions without changes since the last commit are skipped
+        coordinator._next_autocommit_deadline = 0
+        await coordinator._maybe_do_autocommit(assignment)
+        self.assertEqual(committed, [{tp1: OffsetAndMetadata(5, "")}])
+        coordinator._next_autocommit_deadline = 0
+        await coordinator._maybe_do_autocommit(assignment)
+        self.assertEqual(len(committed), 1)
+
+        # Consumed records and bytes trigger a commit before the deadline
+        assignment.state_value(tp2).consumed_to(17)
+        coordinator.records_consumed(9, 100)
+        self.assertFalse(coordinator._autocommit_trigger.done())
+        await coordinator._maybe_do_autocommit(assignment)
+        self.assertEqual(len(committed), 1)
+        coordinator.records_consumed(1, 100)
+        self.assertTrue(coordinator._autocommit_trigger.done())
+        await coordinator._maybe_do_autocommit(assignment)
+        self.assertEqual(committed[-1], {tp2: OffsetAndMetadata(17, "")})
+        self.assertFalse(coordinator._autocommit_trigger.done())
+
+        assignment.state_value(tp1).consumed_to(6)
+        coordinator.records_consumed(1, 1000)
+        self.assertTrue(coordinator._autocommit_trigger.done())
+        await coordinator._maybe_do_autocommit(assignment)
+        self.assertEqual(committed[-1], {tp1: OffsetAndMetadata(6, "")})
+
     @run_until_complete
     async def test_coordinator__coordination_routine(self):
         client = AIOKafkaClient(loop=self.loop, bootstrap_servers=self.hosts)
@@ -5,9 +5,12 @@ from unittest import mock
 
 from kafka.protocol.offset import OffsetResponse
 from aiokafka.record.legacy_records import LegacyRecordBatchBuilder
+from aiokafka.record.default_records import DefaultRecordBatchBuilder
+from aiokafka.record.memory_records import MemoryRecords
 
 from aiokafka.protocol.fetch import (
-    FetchRequest_v0 as FetchRequest, FetchResponse_v0 as FetchResponse)
+    FetchRequest_v0 as FetchRequest, FetchResponse_v0 as FetchResponse,
+    FetchRequest_v1, FetchResponse_v1)
 from aiokafka.errors import (
     TopicAuthorizationFailedError, UnknownError, UnknownTopicOrPartitionError,
     OffsetOutOfRangeError, KafkaTimeoutError, NotLeaderForPartitionError
@@ -18,10 +21,12 @@ from aiokafka.structs import (
 from aiokafka.client import AIOKafkaClient
 from aiokafka.consumer.fetcher import (
     Fetcher, FetchResult, FetchError, ConsumerRecord, OffsetResetStrategy,
-    PartitionRecords, READ_UNCOMMITTED
+    PartitionRecords, READ_UNCOMMITTED, READ_COMMITTED
 )
 from aiokafka.consumer.subscription_state import SubscriptionState
-from aiokafka.util import ensure_future
+from aiokafka.conn import ReceiveBufferPool
+from aiokafka.protocol.fetch_stream import FetchResponseStream
+from aiokafka.util import create_future, ensure_future
 from ._testutil import run_until_complete
 
 
@@ -57,6 +62,96 @@ def test_fetch_result_and_error(loop):
     ]
 
 
+def _build_v2_batch(base_offset, count, producer_id=-1):
+    builder = DefaultRecordBatchBuilder(
+        magic=2, compression_type=0, is_transactional=producer_id != -1,
+        producer_id=producer_id, producer_epoch=0, base_sequence=0,
+        batch_size=999999)
+    for i in range(count):
+        builder.append(
+            i, timestamp=None, key=None, value=b"value", headers=[])
+    buffer = builder.build()
+    buffer[:8] = base_offset.to_bytes(8, "big")
+    return bytes(buffer)
+
+
+def test_partition_records_batches():
+    tp = TopicPartition("test", 0)
+    data = (
+        _build_v2_batch(0, 3) +
+        _build_v2_batch(3, 2, producer_id=10) +  # aborted
+        _build_v2_batch(5, 2)
+    )
+
+    records = PartitionRecords(
+        tp, MemoryRecords(data), [(10, 3)], 1, None, None, True,
+        READ_COMMITTED)
+    # Batches are returned whole, even if fetch offset is inside the batch
+    batch = records.next_batch()
+    assert batch.base_offset == 0
+    assert batch.raw_bytes() == data[:len(batch.raw_bytes())]
+    assert records.next_fetch_offset == 3
+    # Aborted batch is skipped
+    batch = records.next_batch()
+    assert batch.base_offset == 5
+    assert records.next_fetch_offset == 7
+    assert records.next_batch() is None
+    assert records.next_fetch_offset == 7
+
+    # Partially consumed batch is returned again, records continue after it
+    records = PartitionRecords(
+        tp, MemoryRecords(data), [], 0, None, None, True, READ_UNCOMMITTED)
+    assert next(records).offset == 0
+    assert records.next_fetch_offset == 1
+    batch = records.next_batch()
+    assert batch.base_offset == 0
+    assert records.next_fetch_offset == 3
+    assert [r.offset for r in records] == [3, 4, 5, 6]
+    assert records.next_fetch_offset == 7
+
+
+def test_partition_records_compact():
+    tp = TopicPartition("test", 0)
+    data = (
+        _build_v2_batch(0, 3) +
+        _build_v2_batch(3, 2) +
+        _build_v2_batch(5, 2)
+    )
+    last_batch_size = len(_build_v2_batch(5, 2))
+    pool = ReceiveBufferPool(min_size=16)
+    buffer = pool.allocate(len(data))
+    buffer.view[:] = data
+
+    records = PartitionRecords(
+        tp, MemoryRecords(buffer.view), [], 0, None, None, True,
+        READ_UNCOMMITTED, buffer)
+    buffer.release()
+    # Nothing consumed yet, so too much data is left
+    assert records.compact() is False
+    # Stop in the middle of the second batch
+    assert [next(records).offset for _ in range(4)] == [0, 1, 2, 3]
+    assert records.compact() is True
+    # Pooled buffer is given back
+    assert pool._pooled_bytes == 512
+    assert records._records.size_in_bytes() == \
+        len(data) - len(_build_v2_batch(0, 3))
+    # Nothing consumed since last time
+    assert records.compact(max_fill=1) is False
+    assert [r.offset for r in records] == [4, 5, 6]
+    assert records.next_fetch_offset == 7
+    assert records.compact() is False
+
+    # Batches that were not started are copied as is
+    records = PartitionRecords(
+        tp, MemoryRecords(data), [], 0, None, None, True, READ_UNCOMMITTED)
+    assert records.next_batch().base_offset == 0
+    assert records.next_batch().base_offset == 3
+    assert records.compact() is True
+    assert records._records.size_in_bytes() == last_batch_size
+    assert records.next_batch().base_offset == 5
+    assert records.next_batch() is None
+
+
 @pytest.mark.usefixtures('setup_test_class_serverless')
 class TestFetcher(unittest.TestCase):
 
@@ -228,7 +323,7 @@ class TestFetcher(unittest.TestCase):
         client.ready.side_effect = asyncio.coroutine(lambda a: True)
         client.force_metadata_update = mock.MagicMock()
         client.force_metadata_update.side_effect = asyncio.coroutine(
-            lambda: False)
+            lambda topics=None: False)
         client.send = mock.MagicMock()
 
         builder = LegacyRecordBatchBuilder(
@@ -333,6 +428,74 @@ class TestFetcher(unittest.TestCase):
 
         await fetcher.close()
 
+    @run_until_complete
+    async def test_proc_fetch_request_stream(self):
+        client = AIOKafkaClient(
+            loop=self.loop,
+            bootstrap_servers=[])
+        subscriptions = SubscriptionState(loop=self.loop)
+        fetcher = Fetcher(
+            client, subscriptions, auto_offset_reset="latest", loop=self.loop,
+            stream_responses=True)
+        self.add_cleanup(fetcher.close)
+
+        tp1 = TopicPartition('test', 0)
+        tp2 = TopicPartition('test', 1)
+        req = FetchRequest(
+            -1,  # replica_id
+            100, 100, [('test', [(0, 4, 100000), (1, 4, 100000)])])
+
+        builder = LegacyRecordBatchBuilder(
+            magic=1, compression_type=0, batch_size=99999999)
+        builder.append(offset=4, value=b"test msg", key=None, timestamp=None)
+        raw_batch = bytes(builder.build())
+        response = FetchResponse(
+            [('test', [(0, 0, 9, raw_batch), (1, 0, 9, raw_batch)])])
+
+        reader = asyncio.StreamReader(loop=self.loop)
+        data = response.encode()
+        # Read record sets into pooled buffers
+        buffer_pool = ReceiveBufferPool(min_size=16)
+
+        async def send(node_id, request, stream=False):
+            self.assertTrue(stream)
+            stream = FetchResponseStream(
+                FetchResponse, loop=self.loop, buffer_pool=buffer_pool)
+            await stream.read_header(reader, len(data))
+            ensure_future(stream.read_partitions(), loop=self.loop)
+            return stream
+
+        client.send = mock.Mock(side_effect=send)
+        subscriptions.assign_from_user({tp1, tp2})
+        assignment = subscriptions.subscription.assignment
+        subscriptions.seek(tp1, 4)
+        subscriptions.seek(tp2, 4)
+
+        waiter = fetcher._create_fetch_waiter()
+        task = ensure_future(
+            fetcher._proc_fetch_request(assignment, 0, req), loop=self.loop)
+        # Only data of the first partition arrived yet
+        first_partition_size = (
+            4 + 2 + len("test") + 4 +  # topics array, topic, partitions array
+            4 + 2 + 8 + 4 + len(raw_batch))
+        reader.feed_data(data[:first_partition_size])
+        await asyncio.wait_for(waiter, 1, loop=self.loop)
+        self.assertFalse(task.done())
+        self.assertEqual(list(fetcher._records), [tp1])
+
+        reader.feed_data(data[first_partition_size:])
+        needs_wake_up = await task
+        self.assertEqual(needs_wake_up, True)
+        self.assertEqual(set(fetcher._records), {tp1, tp2})
+        self.assertEqual(fetcher._records[tp2].getone().value, b"test msg")
+
+        # Buffers are returned to the pool once records are consumed
+        self.assertEqual(buffer_pool._pooled_bytes, 0)
+        self.assertIsNone(fetcher._records[tp2].getone())
+        self.assertEqual(buffer_pool._pooled_bytes, 64)
+        fetcher._records.pop(tp1).getall()
+        self.assertEqual(buffer_pool._pooled_bytes, 128)
+
     def _setup_error_after_data(self):
         subscriptions = SubscriptionState(loop=self.loop)
         client = AIOKafkaClient(
@@ -379,6 +542,307 @@ class TestFetcher(unittest.TestCase):
         msg = await fetcher.fetched_records([])
         self.assertEqual(msg, {})
 
+    @run_until_complete
+    async def test_fetched_batches(self):
+        client = AIOKafkaClient(
+            loop=self.loop,
+            bootstrap_servers=[])
+        subscriptions = SubscriptionState(loop=self.loop)
+        fetcher = Fetcher(client, subscriptions, loop=self.loop)
+        tp = TopicPartition('some_topic', 0)
+        subscriptions.assign_from_user({tp})
+        assignment = subscriptions.subscription.assignment
+        tp_state = assignment.state_value(tp)
+        tp_state.seek(0)
+
+        data = _build_v2_batch(0, 3) + _build_v2_batch(3, 2)
+        partition_records = PartitionRecords(
+            tp, MemoryRecords(data), [], 0,
+            None, None, False, READ_UNCOMMITTED)
+        fetcher._records[tp] = FetchResult(
+            tp, assignment=assignment, loop=self.loop,
+            partition_records=partition_records, backoff=0)
+
+        batches = await fetcher.fetched_batches([], max_batches=1)
+        self.assertEqual(
+            [b.base_offset for b in batches[tp]], [0])
+        self.assertEqual(tp_state.position, 3)
+
+        batches = await fetcher.fetched_batches([])
+        self.assertEqual(
+            [b.base_offset for b in batches[tp]], [3])
+        self.assertEqual(tp_state.position, 5)
+        self.assertNotIn(tp, fetcher._records)
+
+        batches = await fetcher.fetched_batches([])
+        self.assertEqual(batches, {})
+        await fetcher.close()
+
+    @run_until_complete
+    async def test_compact_long_lived_records(self):
+        client = AIOKafkaClient(
+            loop=self.loop,
+            bootstrap_servers=[])
+        subscriptions = SubscriptionState(loop=self.loop)
+        fetcher = Fetcher(client, subscriptions, loop=self.loop)
+        tp1 = TopicPartition('some_topic', 0)
+        tp2 = TopicPartition('some_topic', 1)
+        subscriptions.assign_from_user({tp1, tp2})
+        assignment = subscriptions.subscription.assignment
+        assignment.state_value(tp1).seek(0)
+        assignment.state_value(tp2).seek(0)
+
+        data = _build_v2_batch(0, 3) + _build_v2_batch(3, 2)
+        all_records = {}
+        for tp, backoff in [(tp1, 0), (tp2, 10)]:
+            all_records[tp] = PartitionRecords(
+                tp, MemoryRecords(data), [], 0,
+                None, None, False, READ_UNCOMMITTED)
+            fetcher._records[tp] = FetchResult(
+                tp, assignment=assignment, loop=self.loop,
+                partition_records=all_records[tp], backoff=backoff)
+        for tp in [tp1, tp2]:
+            records = await fetcher.fetched_records([tp], max_records=4)
+            self.assertEqual(len(records[tp]), 4)
+
+        # Only records past the prefetch backoff are compacted
+        fetcher._get_actions_per_node(assignment)
+        self.assertLess(all_records[tp1]._records.size_in_bytes(), len(data))
+        self.assertEqual(
+            all_records[tp2]._records.size_in_bytes(), len(data))
+
+        # Paused partitions are compacted right away
+        subscriptions.pause(tp2)
+        fetcher._get_actions_per_node(assignment)
+        self.assertLess(all_records[tp2]._records.size_in_bytes(), len(data))
+        await fetcher.close()
+
+    @run_until_complete
+    async def test_pause_on_unacked_records(self):
+        client = AIOKafkaClient(
+            loop=self.loop,
+            bootstrap_servers=[])
+        subscriptions = SubscriptionState(loop=self.loop)
+        fetcher = Fetcher(client, subscriptions, loop=self.loop)
+        tp = TopicPartition('some_topic', 0)
+        subscriptions.assign_from_user({tp})
+        assignment = subscriptions.subscription.assignment
+        tp_state = assignment.state_value(tp)
+        tp_state.seek(0)
+        client.cluster.leader_for_partition = mock.Mock(return_value=0)
+
+        tp_state.delivered([0, 1, 2], max_unacked_offsets=3)
+        tp_state.consumed_to(3)
+        fetch_requests, _, _, _, resume_futures = \
+            fetcher._get_actions_per_node(assignment)
+        self.assertEqual(fetch_requests, [])
+        self.assertEqual(resume_futures, [tp_state.acks_fut])
+
+        # Fetching continues once the window is no longer full
+        tp_state.ack(0)
+        self.assertTrue(resume_futures[0].done())
+        fetch_requests, _, _, _, resume_futures = \
+            fetcher._get_actions_per_node(assignment)
+        self.assertEqual(len(fetch_requests), 1)
+        self.assertEqual(resume_futures, [])
+        await fetcher.close()
+
+    @run_until_complete
+    async def test_wait_new_leader_on_not_leader_error(self):
+        client = AIOKafkaClient(
+            loop=self.loop,
+            bootstrap_servers=[])
+        subscriptions = SubscriptionState(loop=self.loop)
+        fetcher = Fetcher(client, subscriptions, loop=self.loop)
+        tp = TopicPartition('some_topic', 0)
+        subscriptions.assign_from_user({tp})
+        assignment = subscriptions.subscription.assignment
+        tp_state = assignment.state_value(tp)
+        tp_state.seek(0)
+        client.cluster.leader_for_partition = mock.Mock(return_value=0)
+        metadata_fut = create_future(loop=self.loop)
+        client.force_metadata_update = mock.Mock(return_value=metadata_fut)
+
+        fetcher._proc_fetch_partition(
+            assignment, None, {tp: 0}, 0, 'some_topic',
+            (0, NotLeaderForPartitionError.errno, -1, b""))
+        client.force_metadata_update.assert_called_with(['some_topic'])
+
+        # Old leader is not asked again while metadata is updated
+        fetch_requests, _, _, _, resume_futures = \
+            fetcher._get_actions_per_node(assignment)
+        self.assertEqual(fetch_requests, [])
+        self.assertEqual(resume_futures, [metadata_fut])
+
+        # New leader is fetched from right away
+        client.cluster.leader_for_partition.return_value = 1
+        fetch_requests, _, _, _, resume_futures = \
+            fetcher._get_actions_per_node(assignment)
+        self.assertEqual([node_id for node_id, _ in fetch_requests], [1])
+        self.assertEqual(resume_futures, [])
+        self.assertEqual(fetcher._stale_leaders, {})
+
+        # Same leader after update
+        fetcher._proc_fetch_partition(
+            assignment, None, {tp: 0}, 0, 'some_topic',
+            (0, NotLeaderForPartitionError.errno, -1, b""))
+        metadata_fut.set_result(True)
+        fetch_requests, _, _, _, resume_futures = \
+            fetcher._get_actions_per_node(assignment)
+        self.assertEqual([node_id for node_id, _ in fetch_requests], [1])
+        await fetcher.close()
+
+    @run_until_complete
+    async def test_skip_nodes_in_reconnect_backoff(self):
+        client = AIOKafkaClient(
+            loop=self.loop,
+            bootstrap_servers=[])
+        subscriptions = SubscriptionState(loop=self.loop)
+        fetcher = Fetcher(client, subscriptions, loop=self.loop)
+        tp = TopicPartition('some_topic', 0)
+        subscriptions.assign_from_user({tp})
+        assignment = subscriptions.subscription.assignment
+        assignment.state_value(tp).seek(0)
+        client.cluster.leader_for_partition = mock.Mock(return_value=0)
+        client.nodes_in_backoff = mock.Mock(return_value={0: 0.3})
+
+        fetch_requests, _, backoff, _, _ = \
+            fetcher._get_actions_per_node(assignment)
+        self.assertEqual(fetch_requests, [])
+        self.assertEqual(backoff, 0.3)
+
+        client.nodes_in_backoff.return_value = {}
+        fetch_requests, _, _, _, _ = \
+            fetcher._get_actions_per_node(assignment)
+        self.assertEqual([node_id for node_id, _ in fetch_requests], [0])
+        await fetcher.close()
+
+    @run_until_complete
+    async def test_mute_node_on_throttle(self):
+        client = AIOKafkaClient(
+            loop=self.loop,
+            bootstrap_servers=[])
+        subscriptions = SubscriptionState(loop=self.loop)
+        fetcher = Fetcher(client, subscriptions, loop=self.loop)
+        tp = TopicPartition('test', 0)
+        subscriptions.assign_from_user({tp})
+        assignment = subscriptions.subscription.assignment
+        assignment.state_value(tp).seek(0)
+        client.cluster.leader_for_partition = mock.Mock(return_value=0)
+
+        req = FetchRequest_v1(-1, 100, 100, [('test', [(0, 0, 100000)])])
+        client.send = mock.Mock(side_effect=asyncio.coroutine(
+            lambda n, r: FetchResponse_v1(300, [('test', [(0, 0, 9, b"")])])))
+        await fetcher._proc_fetch_request(assignment, 0, req)
+
+        stats = client.throttle_stats()
+        self.assertEqual(stats[0].throttled_responses, 1)
+        self.assertEqual(stats[0].throttle_time_ms, 300)
+        self.assertTrue(250 < stats[0].muted_ms <= 300)
+        # Node is not fetched from until the throttle time passes
+        fetch_requests, _, backoff, _, _ = \
+            fetcher._get_actions_per_node(assignment)
+        self.assertEqual(fetch_requests, [])
+        self.assertTrue(0.25 < backoff <= 0.3)
+        await fetcher.close()
+
+    @run_until_complete
+    async def test_retain_records_on_incremental_assign(self):
+        client = AIOKafkaClient(
+            loop=self.loop,
+            bootstrap_servers=[])
+        subscriptions = SubscriptionState(loop=self.loop)
+        fetcher = Fetcher(client, subscriptions, loop=self.loop)
+        tp1 = TopicPartition('some_topic', 0)
+        tp2 = TopicPartition('some_topic', 1)
+        subscriptions.subscribe(topics={'some_topic'})
+        subscriptions.assign_from_subscribed({tp1, tp2})
+        assignment = subscriptions.subscription.assignment
+        for tp in [tp1, tp2]:
+            assignment.state_value(tp).seek(0)
+            fetcher._records[tp] = FetchResult(
+                tp, assignment=assignment, loop=self.loop,
+                partition_records=PartitionRecords(
+                    tp, MemoryRecords(_build_v2_batch(0, 2)), [], 0,
+                    None, None, False, READ_UNCOMMITTED),
+                backoff=0)
+
+        # tp2 moved to another member, tp1 is kept
+        subscriptions.assign_from_subscribed({tp1}, incremental=True)
+        fetcher._retain_records()
+        self.assertEqual(set(fetcher._records), {tp1})
+        new_assignment = subscriptions.subscription.assignment
+        self.assertIs(fetcher._records[tp1].assignment, new_assignment)
+        records = await fetcher.fetched_records([tp1])
+        self.assertEqual(len(records[tp1]), 2)
+        self.assertEqual(new_assignment.state_value(tp1).position, 2)
+
+        # Non-incremental assignment drops everything
+        subscriptions.assign_from_subscribed({tp1})
+        fetcher._retain_records()
+        self.assertEqual(fetcher._records, {})
+        await fetcher.close()
+
+    @run_until_complete
+    async def test_fetched_columns(self):
+        client = AIOKafkaClient(
+            loop=self.loop,
+            bootstrap_servers=[])
+        subscriptions = SubscriptionState(loop=self.loop)
+        fetcher = Fetcher(client, subscriptions, loop=self.loop)
+        tp1 = TopicPartition('some_topic', 0)
+        tp2 = TopicPartition('some_topic', 1)
+        subscriptions.assign_from_user({tp1, tp2})
+        assignment = subscriptions.subscription.assignment
+
+        # v2 batches, starting before the fetch position
+        data = _build_v2_batch(0, 3) + _build_v2_batch(3, 2)
+        assignment.state_value(tp1).seek(1)
+        fetcher._records[tp1] = FetchResult(
+            tp1, assignment=assignment, loop=self.loop,
+            partition_records=PartitionRecords(
+                tp1, MemoryRecords(data), [], 1,
+                None, None, False, READ_UNCOMMITTED),
+            backoff=0)
+        # legacy batch
+        builder = LegacyRecordBatchBuilder(
+            magic=1, compression_type=0, batch_size=99999999)
+        builder.append(10, value=b"12345", key=None, timestamp=100)
+        builder.append(11, value=None, key=b"2", timestamp=101)
+        assignment.state_value(tp2).seek(10)
+        fetcher._records[tp2] = FetchResult(
+            tp2, assignment=assignment, loop=self.loop,
+            partition_records=PartitionRecords(
+                tp2, MemoryRecords(bytes(builder.build())), [], 10,
+                None, None, False, READ_UNCOMMITTED),
+            backoff=0)
+
+        columns = await fetcher.fetched_columns([])
+        self.assertEqual(list(columns[tp1].offsets), [1, 2, 3, 4])
+        self.assertEqual(bytes(columns[tp1].data), b"value" * 4)
+        self.assertEqual(assignment.state_value(tp1).position, 5)
+
+        self.assertEqual(list(columns[tp2].offsets), [10, 11])
+        self.assertEqual(list(columns[tp2].timestamps), [100, 101])
+        self.assertEqual(list(columns[tp2].key_lengths), [-1, 1])
+        self.assertEqual(list(columns[tp2].value_lengths), [5, -1])
+        self.assertEqual(bytes(columns[tp2].data), b"123452")
+        self.assertEqual(assignment.state_value(tp2).position, 12)
+
+        self.assertEqual(await fetcher.fetched_columns([]), {})
+
+        # Partitions without rows after the position are skipped
+        assignment.state_value(tp1).seek(3)
+        fetcher._records[tp1] = FetchResult(
+            tp1, assignment=assignment, loop=self.loop,
+            partition_records=PartitionRecords(
+                tp1, MemoryRecords(_build_v2_batch(0, 3)), [], 3,
+                None, None, False, READ_UNCOMMITTED),
+            backoff=0)
+        self.assertEqual(await fetcher.fetched_columns([]), {})
+        self.assertNotIn(tp1, fetcher._records)
+        await fetcher.close()
+
     @run_until_complete
     async def test_next_record_error_after_data(self):
         # Test error after some data. next_record should not discard data.
@@ -404,7 +868,7 @@ class TestFetcher(unittest.TestCase):
         client.ready.side_effect = asyncio.coroutine(lambda a: True)
         client.force_metadata_update = mock.MagicMock()
         client.force_metadata_update.side_effect = asyncio.coroutine(
-            lambda: False)
+            lambda topics=None: False)
         client.send = mock.MagicMock()
 
         subscriptions = SubscriptionState(loop=self.loop)
@@ -11,7 +11,10 @@ from kafka.structs import TopicPartition
 from ._testutil import run_until_complete
 from aiokafka.util import ensure_future
 from aiokafka.producer.message_accumulator import (
-    MessageAccumulator, MessageBatch, BatchBuilder
+    MessageAccumulator, MessageBatch, BatchBuilder, RawBatchBuilder
+)
+from aiokafka.record.default_records import (
+    DefaultRecordBatch, DefaultRecordBatchBuilder
 )
 
 
@@ -225,6 +228,49 @@ class TestMessageAccumulator(unittest.TestCase):
         self.assertEqual(builder.size(), old_size)
         self.assertEqual(builder.record_count(), old_count)
 
+    def test_raw_batch_builder(self):
+        source = DefaultRecordBatchBuilder(
+            magic=2, compression_type=DefaultRecordBatch.CODEC_GZIP,
+            is_transactional=True, producer_id=123, producer_epoch=5,
+            base_sequence=10, batch_size=999999)
+        for offset in range(3):
+            source.append(
+                offset, timestamp=None, key=b"key", value=b"value",
+                headers=[])
+        data = source.build()
+        # Pretend it was fetched from a log at some offset
+        data[:8] = (1000).to_bytes(8, "big")
+        data = bytes(data)
+
+        builder = RawBatchBuilder(data, is_transactional=False)
+        self.assertEqual(builder.record_count(), 3)
+        self.assertEqual(builder.size(), len(data))
+        # Raw batches can not be appended to
+        self.assertIsNone(
+            builder.append(key=b"key", value=b"value", timestamp=None))
+        builder._set_producer_state(
+            producer_id=77, producer_epoch=1, base_sequence=4)
+
+        batch = DefaultRecordBatch(bytes(builder._build()))
+        self.assertTrue(batch.validate_crc())
+        self.assertEqual(batch.base_offset, 0)
+        self.assertFalse(batch.is_transactional)
+        self.assertEqual(batch.producer_id, 77)
+        self.assertEqual(batch.producer_epoch, 1)
+        self.assertEqual(batch.base_sequence, 4)
+        self.assertEqual(batch.compression_type, DefaultRecordBatch.CODEC_GZIP)
+        self.assertEqual(
+            [(msg.offset, msg.key, msg.value) for msg in batch],
+            [(0, b"key", b"value"), (1, b"key", b"value"),
+             (2, b"key", b"value")])
+
+        with self.assertRaises(ValueError):
+            RawBatchBuilder(data[:-1], is_transactional=False)
+        legacy = BatchBuilder(1, 1000, 0, is_transactional=False)
+        legacy.append(key=b"key", value=b"value", timestamp=None)
+        with self.assertRaises(ValueError):
+            RawBatchBuilder(legacy._build(), is_transactional=False)
+
     @run_until_complete
     async def test_add_batch_builder(self):
         tp0 = TopicPartition("test-topic", 0)
@@ -16,6 +16,7 @@ from aiokafka.protocol.produce import ProduceResponse
 from aiokafka.producer import AIOKafkaProducer
 from aiokafka.client import AIOKafkaClient
 from aiokafka.consumer import AIOKafkaConsumer
+from aiokafka.structs import TopicPartition
 from aiokafka.util import create_future
 
 from aiokafka.errors import (
@@ -403,6 +404,72 @@ class TestKafkaProducerIntegration(KafkaIntegrationTestCase):
                 bootstrap_servers=self.hosts,
                 security_protocol="SSL", ssl_context=None)
 
+    @run_until_complete
+    async def test_producer_metadata_max_idle(self):
+        producer = AIOKafkaProducer(
+            loop=self.loop, bootstrap_servers=self.hosts,
+            metadata_max_idle_ms=1000)
+        client = producer.client
+        client.force_metadata_update = mock.Mock()
+
+        async def wait_on_metadata(topic):
+            client.add_topic(topic)
+            return {0}
+        client._wait_on_metadata = mock.Mock(side_effect=wait_on_metadata)
+        producer._producer_magic = 1
+        producer._partition = mock.Mock(return_value=0)
+        producer._message_accumulator.add_message = mock.Mock(
+            side_effect=asyncio.coroutine(lambda *a, **kw: None))
+
+        with mock.patch.object(self.loop, "time", return_value=100):
+            await producer.send("topic1", b"value")
+            await producer.send("topic2", b"value")
+        with mock.patch.object(self.loop, "time", return_value=100.5):
+            await producer.send("topic2", b"value")
+
+        with mock.patch.object(self.loop, "time", return_value=101):
+            producer._expire_idle_topics(client.cluster)
+        self.assertEqual(client._topics, {"topic1", "topic2"})
+        # Only the topic not sent to for `metadata_max_idle_ms` is dropped
+        with mock.patch.object(self.loop, "time", return_value=101.1):
+            producer._expire_idle_topics(client.cluster)
+        self.assertEqual(client._topics, {"topic2"})
+        self.assertEqual(list(producer._topics_last_used), ["topic2"])
+
+        # Topics are kept if all are idle, as no topics means all topics
+        with mock.patch.object(self.loop, "time", return_value=103):
+            producer._expire_idle_topics(client.cluster)
+        self.assertEqual(client._topics, {"topic2"})
+        await producer.stop()
+
+    @run_until_complete
+    async def test_producer_metadata_max_idle_new_topic(self):
+        producer = AIOKafkaProducer(
+            loop=self.loop, bootstrap_servers=self.hosts,
+            metadata_max_idle_ms=1000)
+        client = producer.client
+        client.force_metadata_update = mock.Mock()
+        producer._producer_magic = 1
+        producer._partition = mock.Mock(return_value=0)
+        producer._message_accumulator.add_message = mock.Mock(
+            side_effect=asyncio.coroutine(lambda *a, **kw: None))
+
+        async def wait_on_metadata(topic):
+            client.add_topic(topic)
+            # Listeners run on the metadata update fetching the new topic
+            producer._expire_idle_topics(client.cluster)
+            return {0}
+        client._wait_on_metadata = mock.Mock(side_effect=wait_on_metadata)
+
+        with mock.patch.object(self.loop, "time", return_value=100):
+            await producer.send("idle", b"value")
+        with mock.patch.object(self.loop, "time", return_value=102):
+            await producer.send("new", b"value")
+        # The topic being added survives expiry of the idle one
+        self.assertEqual(client._topics, {"new"})
+        self.assertEqual(list(producer._topics_last_used), ["new"])
+        await producer.stop()
+
     @run_until_complete
     async def test_producer_flush_test(self):
         producer = AIOKafkaProducer(
@@ -539,6 +606,50 @@ class TestKafkaProducerIntegration(KafkaIntegrationTestCase):
             await producer.start()
         await producer.stop()
 
+    @kafka_versions('>=0.11.0')
+    @run_until_complete
+    async def test_producer_send_raw_batch(self):
+        producer = AIOKafkaProducer(
+            loop=self.loop, bootstrap_servers=self.hosts,
+            enable_idempotence=True)
+        await producer.start()
+        self.add_cleanup(producer.stop)
+
+        batch = producer.create_batch()
+        for i in range(3):
+            batch.append(key=b"key", value=str(i).encode(), timestamp=None)
+        fut = await producer.send_batch(batch, self.topic, partition=0)
+        await fut
+
+        consumer = AIOKafkaConsumer(
+            loop=self.loop, bootstrap_servers=self.hosts,
+            auto_offset_reset="earliest")
+        await consumer.start()
+        self.add_cleanup(consumer.stop)
+        tp = TopicPartition(self.topic, 0)
+        consumer.assign([tp])
+        batches = await consumer.getbatches(tp, timeout_ms=10000)
+        raw_batch, = batches[tp]
+
+        # Republish the same data to another topic without re-encoding
+        other_topic = self.topic + "_copy"
+        await self.wait_topic(producer.client, other_topic)
+        fut = await producer.send_raw_batch(
+            other_topic, 0, raw_batch.raw_bytes())
+        meta = await fut
+        self.assertEqual(meta.offset, 0)
+
+        consumer.assign([TopicPartition(other_topic, 0)])
+        await consumer.seek_to_beginning()
+        data = await consumer.getmany(timeout_ms=10000)
+        msgs = data[TopicPartition(other_topic, 0)]
+        self.assertEqual(
+            [(msg.offset, msg.key, msg.value) for msg in msgs],
+            [(0, b"key", b"0"), (1, b"key", b"1"), (2, b"key", b"2")])
+
+        with self.assertRaises(ValueError):
+            await producer.send_raw_batch(other_topic, 0, b"invalid")
+
     @kafka_versions('>=0.11.0')
     @run_until_complete
     async def test_producer_indempotence_simple(self):
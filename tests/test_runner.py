@@ -0,0 +1,212 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from aiokafka.consumer import AIOKafkaConsumer
+from aiokafka.errors import ConsumerStoppedError
+from aiokafka.structs import ConsumerRecord, TopicPartition
+
+tp0 = TopicPartition("topic", 0)
+tp1 = TopicPartition("topic", 1)
+
+
+@pytest.fixture
+def consumer(loop):
+    consumer = AIOKafkaConsumer(loop=loop)
+    consumer._fetcher = mock.Mock()
+    consumer._fetcher.seek_to.side_effect = consumer._subscription.seek
+    consumer._subscription.assign_from_user({tp0, tp1})
+    assignment = consumer._subscription.subscription.assignment
+    for tp in (tp0, tp1):
+        assignment.state_value(tp).seek(0)
+    yield consumer
+    consumer._closed = True
+
+
+def _record(tp, offset):
+    value = str(offset).encode()
+    return ConsumerRecord(
+        tp.topic, tp.partition, offset, None, None, None, value,
+        None, -1, len(value), ())
+
+
+def mock_getmany(consumer, batches):
+    """ Returns `batches` one by one, then stops the consumer once all
+    returned records are committable.
+    """
+    batches = list(batches)
+    assignment = consumer._subscription.subscription.assignment
+
+    async def getmany(*partitions, timeout_ms=0, max_records=None):
+        while not batches:
+            done = all(
+                assignment.state_value(tp).committable_offset ==
+                assignment.state_value(tp).position
+                for tp in (tp0, tp1))
+            if done:
+                raise ConsumerStoppedError()
+            await asyncio.sleep(0.01, loop=consumer._loop)
+        data = {}
+        for tp, offsets in batches.pop(0).items():
+            if consumer._subscription._assigned_state(tp).paused:
+                continue
+            data[tp] = [_record(tp, offset) for offset in offsets]
+            assignment.state_value(tp).consumed_to(offsets[-1] + 1)
+        consumer._track_delivered(data)
+        return data
+    return mock.patch.object(consumer, "getmany", side_effect=getmany)
+
+
+def test_run_partitions_in_parallel(consumer, loop):
+    handled = []
+    in_progress = set()
+    max_in_progress = 0
+
+    async def handler(msg):
+        nonlocal max_in_progress
+        in_progress.add(msg.partition)
+        max_in_progress = max(max_in_progress, len(in_progress))
+        await asyncio.sleep(0.01, loop=loop)
+        in_progress.discard(msg.partition)
+        handled.append((msg.partition, msg.offset))
+
+    with mock_getmany(consumer, [{tp0: [0, 1, 2], tp1: [0, 1]}, {tp1: [2]}]):
+        loop.run_until_complete(consumer.run(handler, concurrency=2))
+
+    assert max_in_progress == 2
+    for partition in (0, 1):
+        offsets = [o for p, o in handled if p == partition]
+        assert offsets == [0, 1, 2]
+    assert consumer._max_unacked_offsets is None
+    assert consumer._subscription.listener is None
+
+
+def _keyed_record(tp, offset, key):
+    return _record(tp, offset)._replace(key=key)
+
+
+def test_run_key_affinity(consumer, loop):
+    keys = [b"a", b"b", b"a", b"c", b"b", b"a"]
+    records = [_keyed_record(tp0, i, key) for i, key in enumerate(keys)]
+    started = []
+    handled = []
+    release = {key: asyncio.Event(loop=loop) for key in set(keys)}
+
+    async def handler(msg):
+        started.append(msg.offset)
+        await release[msg.key].wait()
+        handled.append(msg.offset)
+
+    async def check():
+        assignment = consumer._subscription.subscription.assignment
+        tp_state = assignment.state_value(tp0)
+        await asyncio.sleep(0.02, loop=loop)
+        # First record of each key is processed in parallel
+        assert sorted(started) == [0, 1, 3]
+        release[b"b"].set()
+        release[b"c"].set()
+        await asyncio.sleep(0.02, loop=loop)
+        assert sorted(handled) == [1, 3, 4]
+        # Nothing is committable past the first unhandled record
+        assert tp_state.committable_offset == 0
+        release[b"a"].set()
+
+    async def getmany(*partitions, timeout_ms=0, max_records=None):
+        if records:
+            data = {tp0: records[:]}
+            records.clear()
+            consumer._subscription._assigned_state(tp0).consumed_to(6)
+            consumer._track_delivered(data)
+            return data
+        await asyncio.sleep(0.01, loop=loop)
+        if len(handled) == len(keys):
+            raise ConsumerStoppedError()
+        return {}
+
+    with mock.patch("aiokafka.consumer.runner.hash",
+                    side_effect=lambda key: ord(key), create=True):
+        with mock.patch.object(consumer, "getmany", side_effect=getmany):
+            task = loop.create_task(check())
+            loop.run_until_complete(consumer.run(
+                handler, concurrency=3, key_affinity=True))
+            loop.run_until_complete(task)
+
+    # Order is kept per key
+    for key in set(keys):
+        offsets = [i for i in handled if keys[i] == key]
+        assert offsets == sorted(offsets)
+    assignment = consumer._subscription.subscription.assignment
+    assert assignment.state_value(tp0).committable_offset == 6
+
+
+def test_run_pause_on_full_queue(consumer, loop):
+    release = asyncio.Event(loop=loop)
+    handled = []
+
+    async def handler(msg):
+        await release.wait()
+        handled.append(msg.offset)
+
+    async def check_paused():
+        await asyncio.sleep(0.05, loop=loop)
+        assert consumer.paused() == {tp0}
+        release.set()
+
+    batches = [{tp0: [0, 1]}, {tp0: [2, 3]}, {tp0: [4]}]
+    with mock_getmany(consumer, batches):
+        task = loop.create_task(check_paused())
+        loop.run_until_complete(consumer.run(handler, max_queued_records=2))
+        loop.run_until_complete(task)
+    # Records of the paused partition are not returned until resumed
+    assert handled == [0, 1]
+    assert consumer.paused() == set()
+
+
+def test_run_handler_error(consumer, loop):
+    async def handler(msg):
+        if msg.offset == 1:
+            raise ValueError(msg.offset)
+
+    with mock_getmany(consumer, [{tp0: [0, 1, 2]}]):
+        with pytest.raises(ValueError):
+            loop.run_until_complete(consumer.run(handler))
+
+    # Records not handled are not committed, but fetched again
+    assignment = consumer._subscription.subscription.assignment
+    assert assignment.all_consumed_offsets()[tp0].offset == 1
+    tp_state = assignment.state_value(tp0)
+    assert tp_state.position == 1
+    tp_state.consumed_to(3)
+    assert tp_state.committable_offset == 3
+
+    with pytest.raises(ValueError):
+        loop.run_until_complete(consumer.run(handler, concurrency=0))
+
+
+def test_run_drain_on_revoke(consumer, loop):
+    consumer._group_id = "group"
+    consumer.commit = mock.Mock()
+    committed = []
+    listener = mock.Mock()
+
+    async def commit(offsets):
+        committed.append(offsets)
+    consumer.commit.side_effect = commit
+    consumer._subscription._listener = listener
+
+    async def handler(msg):
+        await asyncio.sleep(0.01, loop=loop)
+
+    async def revoke():
+        await asyncio.sleep(0.005, loop=loop)
+        await consumer._subscription.listener.on_partitions_revoked({tp0})
+        # All records of the revoked partition are processed
+        assert committed[0][tp0].offset == 3
+        listener.on_partitions_revoked.assert_called_with({tp0})
+
+    with mock_getmany(consumer, [{tp0: [0, 1, 2]}]):
+        task = loop.create_task(revoke())
+        loop.run_until_complete(consumer.run(handler))
+        loop.run_until_complete(task)
+    assert consumer._subscription.listener is listener
@@ -1,3 +1,4 @@
+import asyncio
 from unittest import mock
 
 from ._testutil import (
@@ -25,6 +26,7 @@ from aiokafka.protocol.produce import (
 from aiokafka.producer.message_accumulator import MessageAccumulator
 from aiokafka.client import AIOKafkaClient, CoordinationType, ConnectionGroup
 from aiokafka.structs import TopicPartition, OffsetAndMetadata
+from aiokafka.util import create_future
 
 from aiokafka.errors import (
     NoError, UnknownError,
@@ -34,7 +36,8 @@ from aiokafka.errors import (
     ProducerFenced, InvalidProducerIdMapping, InvalidTxnState,
     RequestTimedOutError, DuplicateSequenceNumber, KafkaError,
     TopicAuthorizationFailedError, OperationNotAttempted,
-    TransactionalIdAuthorizationFailed, GroupAuthorizationFailedError
+    TransactionalIdAuthorizationFailed, GroupAuthorizationFailedError,
+    NotLeaderForPartitionError
 )
 
 from kafka.protocol.metadata import MetadataRequest
@@ -816,3 +819,61 @@ class TestSender(KafkaIntegrationTestCase):
         batch_mock.done.assert_not_called()
         self.assertNotEqual(batch_mock.failure.call_count, 0)
         self.assertEqual(send_handler._to_reenqueue, [])
+
+    @run_until_complete
+    async def test_sender__produce_request_leader_moved(self):
+        client = AIOKafkaClient(loop=self.loop, bootstrap_servers=self.hosts)
+        ma = MessageAccumulator(client.cluster, 1000, 0, 30, loop=self.loop)
+        ma.reenqueue = mock.Mock()
+        sender = Sender(
+            client, acks=-1, txn_manager=None, message_accumulator=ma,
+            retry_backoff_ms=100, linger_ms=0, request_timeout_ms=40000,
+            loop=self.loop)
+        tp = TopicPartition("my_topic", 0)
+        batch_mock = mock.Mock(tp=tp)
+        batch_mock.expired.return_value = False
+
+        async def send(node_id, request):
+            return ProduceResponse[2](
+                topics=[("my_topic", [
+                    (0, NotLeaderForPartitionError.errno, -1, -1)])],
+                throttle_time_ms=0)
+        client.send = mock.Mock(side_effect=send)
+        client.cluster.leader_for_partition = mock.Mock(return_value=0)
+
+        def force_metadata_update(topics):
+            client.cluster.leader_for_partition.return_value = new_leader
+            fut = create_future(loop=self.loop)
+            self.loop.call_later(metadata_delay, fut.set_result, True)
+            return fut
+        client.force_metadata_update = mock.Mock(
+            side_effect=force_metadata_update)
+
+        # Retried without backoff once metadata points to the new leader
+        new_leader = 1
+        metadata_delay = 0
+        with mock.patch.object(
+                asyncio, "sleep", wraps=asyncio.sleep) as sleep_mock:
+            await SendProduceReqHandler(sender, {tp: batch_mock}).do(0)
+            self.assertFalse(sleep_mock.called)
+        client.force_metadata_update.assert_called_with(["my_topic"])
+        ma.reenqueue.assert_called_with(batch_mock)
+
+        # Leader did not change
+        new_leader = 0
+        with mock.patch.object(
+                asyncio, "sleep", wraps=asyncio.sleep) as sleep_mock:
+            await SendProduceReqHandler(sender, {tp: batch_mock}).do(0)
+            delay = sleep_mock.call_args[0][0]
+            self.assertTrue(0.09 < delay <= 0.1)
+
+        # Time spent on metadata update counts towards the backoff
+        metadata_delay = 0.06
+        start = self.loop.time()
+        with mock.patch.object(
+                asyncio, "sleep", wraps=asyncio.sleep) as sleep_mock:
+            await SendProduceReqHandler(sender, {tp: batch_mock}).do(0)
+            delay = sleep_mock.call_args[0][0]
+            self.assertTrue(0.02 < delay <= 0.045)
+        self.assertLess(self.loop.time() - start, 0.15)
+        await client.close()
@@ -1,7 +1,10 @@
 import pytest
 import re
+from unittest import mock
 
-from aiokafka.consumer.subscription_state import SubscriptionState
+from aiokafka.consumer.subscription_state import (
+    AckTracker, SubscriptionState
+)
 from aiokafka.errors import IllegalStateError
 from aiokafka.structs import TopicPartition
 from aiokafka.abc import ConsumerRebalanceListener
@@ -162,6 +165,131 @@ def test_is_assigned(subscription_state):
     assert not subscription_state.is_assigned(tp2)
 
 
+def test_incremental_assignment(subscription_state):
+    tp1 = TopicPartition("topic", 0)
+    tp2 = TopicPartition("topic", 1)
+    tp3 = TopicPartition("topic", 2)
+
+    subscription_state.subscribe({"topic"})
+    subscription_state.assign_from_subscribed({tp1, tp2})
+    old_assignment = subscription_state.subscription.assignment
+    tp1_state = old_assignment.state_value(tp1)
+    tp1_state.seek(10)
+    tp1_state.pause()
+
+    subscription_state.assign_from_subscribed({tp1, tp3}, incremental=True)
+    assignment = subscription_state.subscription.assignment
+    assert assignment is not old_assignment
+    assert not old_assignment.active
+    assert assignment.state_value(tp1) is tp1_state
+    assert tp1_state.assignment is assignment
+    assert tp1_state.position == 10
+    assert tp1_state.paused
+    assert not assignment.state_value(tp3).has_valid_position
+
+    # Without `incremental` all partitions get a fresh state
+    subscription_state.assign_from_subscribed({tp1, tp3})
+    assert subscription_state.subscription.assignment.state_value(tp1) \
+        is not tp1_state
+
+
+def test_partition_consumption_stats(subscription_state, loop):
+    tp = TopicPartition("topic", 0)
+    subscription_state.assign_from_user({tp})
+    tp_state = subscription_state._assigned_state(tp)
+    assert tp_state.consumption_rate() is None
+    assert tp_state.lag is None
+
+    with mock.patch.object(loop, "time", return_value=100):
+        tp_state.reset_to(10)
+    tp_state.highwater = 50
+    tp_state.consumed_to(30)
+    with mock.patch.object(loop, "time", return_value=110):
+        assert tp_state.consumption_rate() == 2
+    assert tp_state.lag == 20
+
+    # Seek restarts the rate estimation
+    with mock.patch.object(loop, "time", return_value=110):
+        tp_state.seek(0)
+        assert tp_state.consumption_rate() is None
+    with mock.patch.object(loop, "time", return_value=111):
+        assert tp_state.consumption_rate() == 0
+
+
+def test_ack_tracker():
+    acks = AckTracker(max_window=10)
+    assert acks.outstanding == 0
+    assert acks.window == 0
+
+    # Gaps in offsets (compacted or control records) don't need an ack
+    acks.delivered([5, 6, 7, 9])
+    assert acks.outstanding == 4
+    assert acks.lowest_outstanding == 5
+    assert acks.window == 5
+    assert not acks.full
+
+    assert acks.ack(7)
+    assert not acks.ack(7)
+    assert not acks.ack(8)
+    assert not acks.ack(4)
+    assert acks.lowest_outstanding == 5
+    assert acks.ack(5)
+    assert acks.lowest_outstanding == 6
+    assert acks.ack(6)
+    assert acks.lowest_outstanding == 9
+
+    acks.delivered(list(range(10, 19)))
+    assert acks.window == 10
+    assert acks.full
+    assert acks.ack(9)
+    assert not acks.full
+    assert acks.lowest_outstanding == 10
+
+    for offset in reversed(range(10, 19)):
+        assert acks.ack(offset)
+    assert acks.outstanding == 0
+    assert acks.window == 0
+
+    # Start over after a gap
+    acks.delivered([100])
+    assert acks.lowest_outstanding == 100
+    assert acks.window == 1
+
+
+def test_partition_acks(subscription_state, loop):
+    tp = TopicPartition("topic", 0)
+    subscription_state.assign_from_user({tp})
+    assignment = subscription_state.subscription.assignment
+    tp_state = subscription_state._assigned_state(tp)
+    tp_state.reset_to(10)
+    tp_state.consumed_to(15)
+    assert tp_state.committable_offset == 15
+    assert tp_state.acks_fut is None
+
+    tp_state.delivered([10, 11, 12, 13, 14], max_unacked_offsets=5)
+    fut = tp_state.acks_fut
+    assert fut is not None
+    assert tp_state.committable_offset == 10
+    assert assignment.all_consumed_offsets()[tp].offset == 10
+
+    assert tp_state.ack(11)
+    assert not fut.done()
+    assert tp_state.ack(10)
+    assert fut.done()
+    assert tp_state.acks_fut is None
+    assert tp_state.committable_offset == 12
+    assert not tp_state.ack(10)
+
+    # Position change drops tracked records
+    tp_state.delivered([15, 16, 17, 18, 19], max_unacked_offsets=5)
+    fut = tp_state.acks_fut
+    assert fut is not None
+    tp_state.seek(20)
+    assert fut.done()
+    assert tp_state.committable_offset == 20
+    assert not tp_state.ack(12)
+
+
 def test_assigned_state(subscription_state):
     tp1 = TopicPartition("topic", 0)
     tp2 = TopicPartition("topic", 1)